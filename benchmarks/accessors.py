@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluation against pydantic models and dataclasses: converting the object graph to dicts first compared with
+reading it through context accessors
+"""
+import dataclasses
+from typing import List
+
+from pydantic import BaseModel
+
+from bkflow_feel.accessors import ObjectContext
+from bkflow_feel.api import compile_expression
+
+
+@dataclasses.dataclass
+class Address:
+    city: str
+    zip_code: str
+
+
+class Line(BaseModel):
+    sku: str
+    quantity: int
+    price: float
+
+
+class Order(BaseModel):
+    tier: str
+    amount: int
+    address: Address
+    lines: List[Line]
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+ORDER = Order(
+    tier="gold",
+    amount=150,
+    address=Address(city="shenzhen", zip_code="518000"),
+    lines=[Line(sku=f"sku-{index}", quantity=index, price=index * 1.5) for index in range(20)],
+)
+
+# (name, expression)
+ACCESSOR_CASES = [
+    ("flat", 'tier = "gold" and amount > 100'),
+    ("nested", 'address.city = "shenzhen" and tier = "gold"'),
+]
+
+
+def accessor_cases(cases=ACCESSOR_CASES):
+    for name, expression in cases:
+        compiled = compile_expression(expression, use_cache=False)
+        yield f"{name}:to_dict", lambda compiled=compiled: compiled.evaluate(ORDER.dict())
+        yield f"{name}:accessor", lambda compiled=compiled: compiled.evaluate(ObjectContext(ORDER))
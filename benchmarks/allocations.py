@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Memory allocated while evaluating each corpus expression, measured with tracemalloc
+
+    python -m benchmarks.allocations
+
+The figure is the peak of memory allocated during one evaluation of a compiled expression, the minimum over a few
+repeats. Zero means the evaluation allocated no Python objects at all.
+"""
+import argparse
+import sys
+import tracemalloc
+
+from bkflow_feel.api import compile_expression
+
+from .corpus import CORPUS
+from .functions import register_functions
+
+# 标量算术、比较及布尔运算，计算过程不应分配任何对象
+SCALAR_CASES = [
+    ("compare", "a > b", {"a": 3, "b": 2}),
+    ("compare_float", "f >= 1.5", {"f": 2.5}),
+    ("equal_string", 's = "open"', {"s": "open"}),
+    ("not_equal", "a != b", {"a": 3, "b": 2}),
+    ("arithmetic", "(a + b) * 2 - c", {"a": 3, "b": 2, "c": 1}),
+    ("arithmetic_compare", "a * 2 > b + 1", {"a": 3, "b": 2}),
+    ("and_chain", 'a > 1 and b < 5 and s = "open"', {"a": 3, "b": 2, "s": "open"}),
+    ("or_chain", "a > 5 or b > 5 or c", {"a": 3, "b": 2, "c": True}),
+    ("not", "not(a > 1)", {"a": 3}),
+    ("between", "a between 1 and 5", {"a": 3}),
+    ("range", "a in (1..5]", {"a": 3}),
+    ("string_functions", 'starts with(s, "op") and contains(s, "e")', {"s": "open"}),
+]
+
+
+def allocated_bytes(func, repeat=5, warmup=100):
+    """
+    Peak bytes allocated by one call of func, the minimum over repeat calls after warmup calls
+    """
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    try:
+        # 预热让解释器完成字节码特化，特化本身会分配内存
+        for _ in range(warmup):
+            func()
+        results = []
+        for _ in range(repeat):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            func()
+            results.append(tracemalloc.get_traced_memory()[1] - before)
+        return min(results)
+    finally:
+        if not started:
+            tracemalloc.stop()
+
+
+def evaluation_allocations(expression, context, repeat=5, **compile_kwargs):
+    compiled = compile_expression(expression, **compile_kwargs)
+    return allocated_bytes(lambda: compiled.evaluate(context), repeat)
+
+
+def allocation_report(corpus=CORPUS, repeat=5):
+    """
+    Yield (area, name, bytes allocated per evaluation) for the scalar cases and every corpus expression
+    """
+    register_functions()
+    for name, expression, context in SCALAR_CASES:
+        yield "scalar", name, evaluation_allocations(expression, context, repeat)
+    for area, items in corpus.items():
+        for name, expression, context in items:
+            yield area, name, evaluation_allocations(expression, context, repeat)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="bkflow-feel allocations per evaluation")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args(argv)
+    for area, name, allocated in allocation_report(repeat=args.repeat):
+        print(f"{area + '/' + name:<48} {allocated:>10} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of computing the fingerprint of transformed trees, paid once per compile with canonical=True
+"""
+from bkflow_feel import parser, transformer
+from bkflow_feel.canonical import fingerprint
+
+# (name, expression)
+CANONICAL_CASES = [
+    ("comparison", "1 = a"),
+    ("rule", 'tier = "gold" and amount > 100 and region in ["cn", "hk"] and not(blocked)'),
+    ("nested", '{"order": {"tier": "gold"}}.order.tier = tier or (a > 1 and (b > 2 or c < 3))'),
+]
+
+
+def canonical_cases(cases=CANONICAL_CASES):
+    for name, expression in cases:
+        ast = transformer.transform(parser.parse(expression))
+        yield name, lambda ast=ast: fingerprint(ast)
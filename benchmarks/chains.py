@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Flattened n-ary and / or nodes compared with the former left-deep binary form and the explicit-stack evaluator
+"""
+from bkflow_feel import parser, transformer
+from bkflow_feel.evaluator import evaluate_iteratively
+from bkflow_feel.generator import and_chain, or_chain
+from bkflow_feel.parsers import And, Or
+
+CHAIN_SIZES = (10, 100, 500, 5000)
+# 更长的左深二叉链在递归计算时会超出 Python 递归深度限制
+MAX_NESTED_SIZE = 500
+
+
+def nest(node):
+    """
+    Rebuild an n-ary And / Or as the left-deep binary tree produced before flattening
+    """
+    node_cls = type(node)
+    nested = node_cls(node.operands[0])
+    for operand in node.operands[1:]:
+        nested = node_cls(nested, operand)
+    return nested
+
+
+def chain_cases(sizes=CHAIN_SIZES):
+    """
+    Yield (name, evaluate function) pairs, the whole chain is evaluated in each case
+    """
+    for size in sizes:
+        for kind, expression, node_cls, context in (
+            ("or", or_chain(size), Or, {"a": size - 1}),
+            ("and", and_chain(size), And, {"a": 1}),
+        ):
+            ast = transformer.transform(parser.parse(expression))
+            assert type(ast) is node_cls
+            yield f"{kind}[{size}]:flat", lambda ast=ast, context=context: ast.evaluate(context)
+            if size <= MAX_NESTED_SIZE:
+                nested = nest(ast)
+                yield f"{kind}[{size}]:nested", lambda nested=nested, context=context: nested.evaluate(context)
+            yield f"{kind}[{size}]:iterative", lambda ast=ast, context=context: evaluate_iteratively(ast, context)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Representative expressions for each grammar area, as (name, expression, context)
+"""
+
+ORDER = {"id": 1, "amount": 320, "status": "open", "tags": ["vip", "new"], "owner": {"name": "alice", "level": 3}}
+
+CORPUS = {
+    "arithmetic": [
+        ("add", "a + b", {"a": 1, "b": 2}),
+        ("mixed", "(a + b) * c - d / e", {"a": 1.0, "b": 2.0, "c": 3.0, "d": 4.0, "e": 2.0}),
+        ("power", "a ** 3", {"a": 7}),
+        ("compare_chain", "a > 1 and b < 10 and c >= 3 and d <= 4", {"a": 2, "b": 3, "c": 3, "d": 4}),
+        ("between", "a between 1 and 10", {"a": 5}),
+    ],
+    "strings": [
+        ("concat", '"order-" + string(id)', {"id": 123}),
+        ("equal", 'status = "open"', {"status": "open"}),
+        ("starts_with", 'starts with(name, "ord")', {"name": "order-1"}),
+        ("contains", 'contains(name, "-")', {"name": "order-1"}),
+        ("matches_literal", r'matches(name, "^order-\d+$")', {"name": "order-123"}),
+        ("matches_dynamic", "matches(name, pattern)", {"name": "order-123", "pattern": r"^order-\d+$"}),
+    ],
+    "lists": [
+        ("literal", "[1, 2, 3, 4, 5]", {}),
+        ("item", "items[2]", {"items": [1, 2, 3]}),
+        ("filter", "items[item > 2]", {"items": [1, 2, 3, 4, 5]}),
+        ("filter_dict", "orders[amount > 100]", {"orders": [{"amount": 50}, {"amount": 150}, {"amount": 300}]}),
+        ("some", "some x in [1, 2, 3, 4] satisfies x > 3", {}),
+        ("every", "every x in [1, 2, 3], y in [2, 3, 4] satisfies x < y", {}),
+        ("list_contains", "list contains([1, 2, 3], a)", {"a": 2}),
+        ("count", "count([1, 2, 3])", {}),
+        ("in_list", 'status in ["open", "pending", "closed"]', {"status": "closed"}),
+    ],
+    "contexts": [
+        ("literal", '{"a": 1, "b": {"c": 2}}', {}),
+        ("item", "order.owner.level > 2", {"order": ORDER}),
+        ("is_defined", "is defined(order.owner)", {"order": ORDER}),
+        ("get_or_else", 'get or else(order.remark, "none")', {"order": ORDER}),
+        ("json_loads", "json loads(data)", {"data": '{"a": 1, "b": [1, 2, 3]}'}),
+    ],
+    "ranges": [
+        ("closed", "a in [1..10]", {"a": 5}),
+        ("open", "a in (1.5..10.5)", {"a": 5}),
+        ("before", "before([1..5], [6..10])", {}),
+        ("includes", "includes([1..10], (1..10))", {}),
+    ],
+    "datetimes": [
+        ("date", 'date("2023-08-21")', {}),
+        ("time", 'time("10:00:00")', {}),
+        ("time_offset", 'time("10:00:00+08:00")', {}),
+        ("time_zone", 'time("10:00:00@Asia/Shanghai")', {}),
+        ("date_and_time", 'date and time("2023-08-21T10:00:00")', {}),
+        (
+            "time_window",
+            'time("09:00:00") < time("18:00:00") and date and time("2023-08-21T10:00:00") in '
+            '[date and time("2023-08-01T00:00:00")..date and time("2023-09-01T00:00:00")]',
+            {},
+        ),
+        ("day_of_week", 'day of week(date("2023-08-21"))', {}),
+    ],
+    "functions": [
+        ("builtin_not", "not(a > 1)", {"a": 2}),
+        ("registered", "bench add(a, b)", {"a": 1, "b": 2}),
+        ("class_based", "bench score(amount, level)", {"amount": 10, "level": 3}),
+        ("class_based_named", "bench score(amount: amount, level: level)", {"amount": 10, "level": 3}),
+    ],
+}
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Parsing date / time literals with dateutil and pytz lookups, as done before, compared with the fixed format parsers
+"""
+import datetime
+
+import pytz
+from dateutil.parser import parse as date_parse
+
+from bkflow_feel.literals import get_offset_timezone, get_timezone, parse_date, parse_time
+
+# (name, date, time, timezone method, timezone value)
+LITERAL_CASES = [
+    ("time", None, "10:00:00", None, None),
+    ("time_offset", None, "10:00:00", "offset", "+08:00"),
+    ("time_zone", None, "10:00:00", "name", "Asia/Shanghai"),
+    ("date_and_time", "2023-08-21", "10:00:00", None, None),
+]
+
+
+def _dateutil_literal(date, time, method, value):
+    timezone = None
+    if method == "name":
+        timezone = pytz.timezone(value)
+    elif method == "offset":
+        hours, minutes = map(int, value.split(":"))
+        timezone = pytz.FixedOffset((-1 if hours < 0 else 1) * (abs(hours) * 60 + minutes))
+    parsed = date_parse(time)
+    result = datetime.time(parsed.hour, parsed.minute, parsed.second, tzinfo=timezone)
+    if date is not None:
+        year, month, day = date.split("-")
+        result = datetime.datetime.combine(datetime.date(int(year), int(month), int(day)), result, tzinfo=timezone)
+    return result
+
+
+def _fast_literal(date, time, method, value):
+    timezone = None
+    if method == "name":
+        timezone = get_timezone(value)
+    elif method == "offset":
+        timezone = get_offset_timezone(value)
+    result = datetime.time(*parse_time(time), tzinfo=timezone)
+    if date is not None:
+        result = datetime.datetime.combine(parse_date(date), result, tzinfo=timezone)
+    return result
+
+
+def datetime_cases(cases=LITERAL_CASES):
+    """
+    Yield (name, parse function) pairs, literals are parsed on every call without the per node cache
+    """
+    for name, date, time, method, value in cases:
+        args = (date, time, method, value)
+        yield f"{name}:dateutil", lambda args=args: _dateutil_literal(*args)
+        yield f"{name}:fixed_format", lambda args=args: _fast_literal(*args)
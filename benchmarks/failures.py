@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of failing evaluations compared with successful ones, through the non-raising result API and through
+parse_expression with raise_exception=False, whose repeated errors are rate limited
+"""
+from bkflow_feel.api import evaluate_result, parse_expression
+
+CONTEXT = {"amount": 150, "tier": "gold"}
+BAD_CONTEXT = {"amount": "150", "tier": "gold"}
+EXPRESSION = 'amount > 100 and tier = "gold"'
+
+
+def failure_cases():
+    yield "success", lambda: evaluate_result(EXPRESSION, CONTEXT)
+    yield "evaluation_error", lambda: evaluate_result(EXPRESSION, BAD_CONTEXT)
+    yield "compile_error", lambda: evaluate_result("amount >", CONTEXT)
+    yield "parse_expression_error", lambda: parse_expression(EXPRESSION, BAD_CONTEXT, raise_exception=False)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from bkflow_feel.utils import BaseFEELInvocation, FEELFunctionsManager, InvocationInputsModel
+
+
+def bench_add(a, b):
+    return a + b
+
+
+class BenchScoreFunc(BaseFEELInvocation):
+    class Meta:
+        func_name = "bench score"
+        pure = True
+
+    class Inputs(InvocationInputsModel):
+        amount: int
+        level: int
+
+        class Meta:
+            ordering = ["amount", "level"]
+
+    def invoke(self, amount, level, *args, **kwargs):
+        return amount * level
+
+
+def register_functions():
+    if "bench add" not in FEELFunctionsManager.all_funcs():
+        FEELFunctionsManager.register_funcs({"bench add": "benchmarks.functions.bench_add"})
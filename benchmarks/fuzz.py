@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Differential fuzzer: random expressions must give the same outcome when interpreted, compiled, cached, evaluated
+with an explicit stack and optimized
+
+    python -m benchmarks.fuzz --count 1000 --seed 42
+"""
+import argparse
+import logging
+import sys
+
+from bkflow_feel import parser, transformer
+from bkflow_feel.api import compile_expression
+from bkflow_feel.evaluator import evaluate_iteratively
+from bkflow_feel.generator import ExpressionGenerator
+
+
+def outcome(func):
+    """
+    ("ok", value) or ("error", exception type name)
+    """
+    try:
+        return "ok", func()
+    except Exception as e:
+        return "error", type(e).__name__
+
+
+def _same(left, right):
+    # NaN 不等于自身，按 repr 比较
+    return left == right or repr(left) == repr(right)
+
+
+def interpreted(expression, context):
+    return transformer.transform(parser.parse(expression)).evaluate(context)
+
+
+def compiled(expression, context):
+    return compile_expression(expression, use_cache=False, optimize=False).evaluate(context)
+
+
+def cached(expression, context):
+    compile_expression(expression, optimize=False)
+    return compile_expression(expression, optimize=False).evaluate(context)
+
+
+def iterative(expression, context):
+    return evaluate_iteratively(transformer.transform(parser.parse(expression)), context)
+
+
+def optimized(expression, context):
+    return compile_expression(expression, use_cache=False, optimize=True).evaluate(context)
+
+
+def adaptive(expression, context):
+    return compile_expression(expression, use_cache=False, adaptive=True).evaluate(context)
+
+
+MODES = {
+    "interpreted": interpreted,
+    "compiled": compiled,
+    "cached": cached,
+    "iterative": iterative,
+    "optimized": optimized,
+    "adaptive": adaptive,
+}
+# and / or 重排后可能在原本会报错的操作数之前短路，原始顺序报错时不要求结果一致
+RELAXED_MODES = ("optimized", "adaptive")
+
+
+def check(expression, context, modes=MODES):
+    """
+    Return None when all modes agree with the first one, otherwise {mode: outcome}
+    """
+    outcomes = {name: outcome(lambda: mode(expression, context)) for name, mode in modes.items()}
+    first, *others = outcomes.items()
+    for name, other in others:
+        if _same(first[1], other):
+            continue
+        if name in RELAXED_MODES and first[1][0] == "error":
+            continue
+        return outcomes
+    return None
+
+
+def fuzz(count=1000, seed=None, modes=MODES, **generator_kwargs):
+    """
+    Yield (expression, context, outcomes) of every mismatch among count random expressions
+    """
+    generator = ExpressionGenerator(seed=seed, **generator_kwargs)
+    for _ in range(count):
+        expression, context = generator.expression(), generator.context()
+        outcomes = check(expression, context, modes)
+        if outcomes is not None:
+            yield expression, context, outcomes
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="python -m benchmarks.fuzz", description="differential fuzzer")
+    arg_parser.add_argument("--count", type=int, default=1000)
+    arg_parser.add_argument("--seed", type=int, default=None)
+    arg_parser.add_argument("--max-tokens", type=int, default=60)
+    arg_parser.add_argument("--max-depth", type=int, default=8)
+    args = arg_parser.parse_args(argv)
+
+    # 随机表达式大多计算失败，屏蔽求值时的异常日志
+    logging.disable(logging.CRITICAL)
+    mismatches = 0
+    for expression, context, outcomes in fuzz(
+        args.count, args.seed, max_tokens=args.max_tokens, max_depth=args.max_depth
+    ):
+        mismatches += 1
+        print(f"MISMATCH {expression!r}\n  context: {context!r}")
+        for name, result in outcomes.items():
+            print(f"  {name}: {result!r}")
+    print(f"{args.count} expressions, {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Large JSON payloads decoded in full before evaluation compared with LazyJSON decoding only the accessed paths
+"""
+import json
+
+from bkflow_feel.api import compile_expression
+from bkflow_feel.lazyjson import LazyJSON
+
+# 访问位于文档开头和结尾的字段，后者需要跳过之前的全部值
+EXPRESSIONS = {
+    "front": 'order.status = "open" and order.amount > 100',
+    "tail": 'profile.name = "alice"',
+}
+HISTORY_SIZES = (100, 2000)
+
+
+def payload(history_size):
+    document = {
+        "order": {"status": "open", "amount": 150},
+        "history": [
+            {"id": index, "status": "closed", "amount": index * 10, "remark": "x" * 50, "tags": ["a", "b"]}
+            for index in range(history_size)
+        ],
+        "profile": {"name": "alice", "levels": list(range(100))},
+    }
+    return json.dumps(document).encode()
+
+
+def lazyjson_cases(history_sizes=HISTORY_SIZES):
+    """
+    Yield (name, evaluate function) pairs, each call starts from the raw bytes
+    """
+    for position, expression in EXPRESSIONS.items():
+        compiled = compile_expression(expression, use_cache=False)
+        for size in history_sizes:
+            data = payload(size)
+            name = f"{position}_{len(data) // 1024}kb"
+            yield f"{name}:json_loads", lambda compiled=compiled, data=data: compiled.evaluate(json.loads(data))
+            yield f"{name}:lazy", lambda compiled=compiled, data=data: compiled.evaluate(LazyJSON(data))
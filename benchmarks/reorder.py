@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+and / or evaluated in the written order compared with cost based and adaptive reordering
+"""
+from bkflow_feel import parser, transformer
+from bkflow_feel.api import compile_expression
+
+from .functions import register_functions
+
+REORDER_CASES = [
+    (
+        "function_first",
+        'bench score(amount, level) > 10 and status = "open"',
+        {"amount": 10, "level": 3, "status": "closed"},
+    ),
+    (
+        "regex_first",
+        r'matches(name, "^order-\d+$") or priority = 1',
+        {"name": "item-1", "priority": 1},
+    ),
+    (
+        "filter_first",
+        'items[amount > 100] != null and owner = "alice"',
+        {"items": [{"amount": amount} for amount in range(0, 200, 10)], "owner": "bob"},
+    ),
+    # 静态开销相同，只有按运行时短路概率排序才能减少计算量
+    (
+        "selectivity",
+        "a > 0 and b > 0 and c > 0 and d > 0",
+        {"a": 1, "b": 1, "c": 1, "d": -1},
+    ),
+]
+
+
+def reorder_cases(cases=REORDER_CASES):
+    """
+    Yield (name, evaluate function) pairs
+    """
+    register_functions()
+    for name, expression, context in cases:
+        written = transformer.transform(parser.parse(expression))
+        optimized = compile_expression(expression, use_cache=False, optimize=True)
+        adaptive = compile_expression(expression, use_cache=False, adaptive=True)
+        yield f"{name}:written", lambda ast=written, context=context: ast.evaluate(context)
+        yield f"{name}:optimized", lambda compiled=optimized, context=context: compiled.evaluate(context)
+        yield f"{name}:adaptive", lambda compiled=adaptive, context=context: compiled.evaluate(context)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluation of expressions with a result cache compared with plain evaluation, contexts repeat the values read
+"""
+from bkflow_feel.api import compile_expression
+
+# (name, expression, context)
+RESULT_CACHE_CASES = [
+    (
+        "rule",
+        'order.tier = "gold" and region in ["cn", "hk"] and amount > 100',
+        {"order": {"tier": "gold", "id": 1}, "region": "cn", "amount": 150, "user": "a"},
+    ),
+    (
+        "strings",
+        'matches(name, "^[a-z]+-[0-9]+$") and starts with(name, "abc") and ends with(name, "123")',
+        {"name": "abc-123", "request_id": "r1"},
+    ),
+    (
+        "lists",
+        "every item in [1, 2, 3, 4, 5] satisfies item < limit",
+        {"limit": 10, "other": [1, 2, 3]},
+    ),
+]
+
+
+def result_cache_cases(cases=RESULT_CACHE_CASES):
+    for name, expression, context in cases:
+        plain = compile_expression(expression, use_cache=False)
+        cached = compile_expression(expression, use_cache=False)
+        cached.enable_result_cache()
+        yield f"{name}:plain", lambda compiled=plain, context=context: compiled.evaluate(context)
+        yield f"{name}:cached", lambda compiled=cached, context=context: compiled.evaluate(context)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Standalone benchmark suite for bkflow-feel
+
+    python -m benchmarks                      # run all cases and print results
+    python -m benchmarks --save-baseline      # store results as the local baseline
+    python -m benchmarks --compare            # fail if any case regresses more than --threshold
+    python -m benchmarks -k datetimes -k lists --phase evaluate
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+from bkflow_feel import parser, transformer
+
+from .accessors import accessor_cases
+from .canonical import canonical_cases
+from .chains import chain_cases
+from .corpus import CORPUS
+from .datetimes import datetime_cases
+from .failures import failure_cases
+from .functions import register_functions
+from .lazyjson import lazyjson_cases
+from .reorder import reorder_cases
+from .result_cache import result_cache_cases
+from .specialize import specialize_cases
+from .scaling import SCALING
+from .syntax import syntax_cases
+from .typecheck import typecheck_cases
+
+PHASES = ("parse", "transform", "evaluate")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+class Case:
+    def __init__(self, group, name, phase, func):
+        self.group = group
+        self.name = name
+        self.phase = phase
+        self.func = func
+
+    @property
+    def key(self):
+        return f"{self.group}/{self.name}/{self.phase}"
+
+
+def build_phase_cases(group, name, expression, context, phases=PHASES):
+    parse_tree = parser.parse(expression)
+    ast = transformer.transform(parse_tree)
+    phase_funcs = {
+        "parse": lambda: parser.parse(expression),
+        "transform": lambda: transformer.transform(parse_tree),
+        "evaluate": lambda: ast.evaluate(context),
+    }
+    return [Case(group, name, phase, phase_funcs[phase]) for phase in phases]
+
+
+def collect_cases(phases=PHASES):
+    register_functions()
+    cases = []
+    for area, items in CORPUS.items():
+        for name, expression, context in items:
+            cases.extend(build_phase_cases(area, name, expression, context, phases))
+    for dimension, generate in SCALING.items():
+        for name, expression, context in generate():
+            cases.extend(build_phase_cases(dimension, name, expression, context, phases))
+    if "parse" in phases:
+        cases.extend(Case("syntax_check", name, "parse", func) for name, func in syntax_cases())
+    if "transform" in phases:
+        cases.extend(Case("canonical", name, "transform", func) for name, func in canonical_cases())
+    if "evaluate" in phases:
+        cases.extend(Case("boolean_chain", name, "evaluate", func) for name, func in chain_cases())
+        cases.extend(Case("reorder", name, "evaluate", func) for name, func in reorder_cases())
+        cases.extend(Case("specialize", name, "evaluate", func) for name, func in specialize_cases())
+        cases.extend(Case("lazy_json", name, "evaluate", func) for name, func in lazyjson_cases())
+        cases.extend(Case("literal_parsing", name, "evaluate", func) for name, func in datetime_cases())
+        cases.extend(Case("type_check", name, "evaluate", func) for name, func in typecheck_cases())
+        cases.extend(Case("result_cache", name, "evaluate", func) for name, func in result_cache_cases())
+        cases.extend(Case("accessors", name, "evaluate", func) for name, func in accessor_cases())
+        cases.extend(Case("failure_path", name, "evaluate", func) for name, func in failure_cases())
+    return cases
+
+
+def measure(func, repeat=5, min_time=0.02):
+    """
+    Best time per call in microseconds, each repeat runs for about min_time seconds
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time / 10 or number >= 10**6:
+            break
+        number *= 10
+    number = max(int(number * min_time / max(elapsed, 1e-9)), 1)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def measure_import(repeat=5):
+    """
+    Time of `import bkflow_feel` in a fresh interpreter, interpreter startup excluded
+    """
+
+    def _run(code):
+        script = f"import time; start = time.perf_counter(); {code}; print(time.perf_counter() - start)"
+        command = [sys.executable, "-c", script]
+        return float(subprocess.check_output(command, cwd=os.path.dirname(os.path.dirname(DEFAULT_BASELINE))))
+
+    return min(_run("import bkflow_feel.api") for _ in range(repeat)) * 1e6
+
+
+def run(cases, repeat=5, min_time=0.02, include_import=True, output=sys.stdout):
+    results = {}
+    if include_import:
+        results["import/bkflow_feel/import"] = measure_import(repeat)
+        print(f"{'import/bkflow_feel/import':<64} {results['import/bkflow_feel/import']:>12.2f} us", file=output)
+    for case in cases:
+        results[case.key] = measure(case.func, repeat=repeat, min_time=min_time)
+        print(f"{case.key:<64} {results[case.key]:>12.2f} us", file=output)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Return (key, baseline, current, ratio) of cases slower than baseline * (1 + threshold)
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous and current > previous * (1 + threshold):
+            regressions.append((key, previous, current, current / previous))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path, results):
+    with open(path, "w") as f:
+        json.dump({"python": sys.version, "results": results}, f, indent=2, sort_keys=True)
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="python -m benchmarks", description="bkflow-feel benchmark suite")
+    arg_parser.add_argument("-k", "--group", action="append", help="only run cases of these groups")
+    arg_parser.add_argument("--phase", action="append", choices=PHASES, help="only run these phases")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--min-time", type=float, default=0.02, help="seconds per repeat, default 0.02")
+    arg_parser.add_argument("--no-import", action="store_true", help="skip the import time measurement")
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file path")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="store results as baseline")
+    arg_parser.add_argument("--compare", action="store_true", help="compare results with baseline")
+    arg_parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown ratio, default 0.2")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = collect_cases(tuple(args.phase or PHASES))
+    if args.group:
+        cases = [case for case in cases if case.group in args.group]
+    results = run(
+        cases, repeat=args.repeat, min_time=args.min_time, include_import=not args.no_import and not args.group
+    )
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline saved to {args.baseline}")
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"baseline {args.baseline} not found, run with --save-baseline first")
+            return 2
+        regressions = compare(results, load_baseline(args.baseline), args.threshold)
+        for key, previous, current, ratio in regressions:
+            print(f"REGRESSION {key}: {previous:.2f}us -> {current:.2f}us ({(ratio - 1) * 100:+.1f}%)")
+        if regressions:
+            return 1
+        print(f"no regression over {args.threshold * 100:.0f}%")
+    return 0
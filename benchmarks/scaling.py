@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Parametrized inputs which grow list length, context width and expression depth
+"""
+from bkflow_feel.api import compile_expression
+from bkflow_feel.generator import DEFAULT_EXCLUDE, ExpressionGenerator, and_chain, in_list, nested_context, or_chain
+
+SIZES = (10, 100, 1000)
+
+
+def list_length_cases(sizes=SIZES):
+    for size in sizes:
+        items = list(range(size))
+        yield f"list_filter[{size}]", "items[item > 5]", {"items": items}
+        yield f"list_literal_some[{size}]", "some x in {} satisfies x < 0".format(items), {}
+        yield f"in_list[{size}]", in_list(size), {"a": size - 1}
+
+
+def context_width_cases(sizes=SIZES):
+    for size in sizes:
+        context = {f"key_{index}": index for index in range(size)}
+        yield f"context_lookup[{size}]", f"key_0 + key_{size - 1}", context
+        yield f"context_literal[{size}]", "{" + ", ".join(f"k{index}: {index}" for index in range(size)) + "}", {}
+
+
+def expression_depth_cases(sizes=(10, 50, 200)):
+    for size in sizes:
+        yield f"or_chain[{size}]", or_chain(size), {"a": size - 1}
+        yield f"and_chain[{size}]", and_chain(size), {"a": 1}
+        yield f"nested_parens[{size}]", "(" * size + "a" + " + 1)" * size, {"a": 0}
+        yield f"nested_context[{size}]", nested_context(size), {}
+
+
+def generated_cases(count=10, seed=0, max_tokens_list=(20, 60, 200)):
+    """
+    Random expressions from the grammar generator with at least max_tokens / 4 tokens, only those evaluating
+    successfully with their context are kept
+    """
+    for max_tokens in max_tokens_list:
+        # list filter 会记录单个元素的计算异常日志，不适合作为计时用例
+        generator = ExpressionGenerator(seed=seed, max_tokens=max_tokens, exclude=DEFAULT_EXCLUDE + ("list_filter",))
+        found = 0
+        while found < count:
+            expression, context = generator.expression(), generator.context()
+            if len(expression.split()) < max_tokens // 4:
+                continue
+            try:
+                compile_expression(expression, use_cache=False, optimize=False).evaluate(context)
+            except Exception:
+                continue
+            yield f"random[{max_tokens}]#{found}", expression, context
+            found += 1
+
+
+SCALING = {
+    "list_length": list_length_cases,
+    "context_width": context_width_cases,
+    "expression_depth": expression_depth_cases,
+    "generated": generated_cases,
+}
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Expressions evaluated as written compared with their residual specialized against the deploy time context
+"""
+from bkflow_feel.api import compile_expression
+from bkflow_feel.specializer import specialize
+
+from .functions import register_functions
+
+# (name, expression, known context, request context)
+SPECIALIZE_CASES = [
+    (
+        "tenant_tier",
+        'tier = "gold" and amount > threshold',
+        {"tier": "gold", "threshold": 100},
+        {"amount": 150},
+    ),
+    (
+        "tenant_disabled",
+        'enabled and bench score(amount, level) > limit and status = "open"',
+        {"enabled": False, "level": 3, "limit": 10},
+        {"amount": 10, "status": "open"},
+    ),
+    (
+        "config_lookup",
+        'amount > config.limits.large * rate and region = config.region and matches(name, config.pattern)',
+        {"config": {"limits": {"large": 1000}, "region": "cn", "pattern": "^order-"}, "rate": 2},
+        {"amount": 2500, "region": "cn", "name": "order-1"},
+    ),
+]
+
+
+def specialize_cases(cases=SPECIALIZE_CASES):
+    """
+    Yield (name, evaluate function) pairs
+    """
+    register_functions()
+    for name, expression, known, context in cases:
+        original = compile_expression(expression, use_cache=False)
+        residual = specialize(original, known)
+        full_context = {**known, **context}
+        yield f"{name}:original", lambda compiled=original, context=full_context: compiled.evaluate(context)
+        yield f"{name}:residual", lambda compiled=residual, context=context: compiled.evaluate(context)
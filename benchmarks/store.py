@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Python memory held by a worker serving every rule once: all rules compiled in process compared with a memory-mapped
+rule store, measured with tracemalloc
+
+    python -m benchmarks.store --rules 5000
+
+The store keeps at most --cache-size decoded rules, its figure stays flat as the number of rules grows. Pages of the
+mapped file are shared between processes and are not counted.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from bkflow_feel.api import compile_expression
+from bkflow_feel.store import RuleStore, build_rule_store
+
+CONTEXT = {"amount": 120, "tier": "gold", "region": "cn", "tags": ["a", "b"]}
+
+
+def generate_rules(count):
+    templates = [
+        'amount > {i} and tier = "gold"',
+        'region in ["cn", "hk"] and amount between {i} and {j}',
+        'starts with(tier, "g") or amount * 2 > {i}',
+        'not(amount > {i}) and tags != null',
+    ]
+    return {f"rule-{i}": templates[i % len(templates)].format(i=i, j=i + 100) for i in range(count)}
+
+
+def held_bytes(func):
+    """
+    Bytes still allocated after func returns while its result is kept alive
+    """
+    tracemalloc.start()
+    try:
+        result = func()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+
+def compile_all(rules):
+    compiled = {key: compile_expression(expression, use_cache=False) for key, expression in rules.items()}
+    for item in compiled.values():
+        item.evaluate(CONTEXT)
+    return compiled
+
+
+def serve_from_store(path, keys, cache_size):
+    store = RuleStore(path, cache_size=cache_size)
+    for key in keys:
+        store.evaluate(key, CONTEXT)
+    return store
+
+
+def store_report(count, cache_size):
+    rules = generate_rules(count)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rules.bin")
+        build_rule_store(path, rules)
+        return {
+            "compiled": held_bytes(lambda: compile_all(rules)),
+            "store": held_bytes(lambda: serve_from_store(path, list(rules), cache_size)),
+            "file": os.path.getsize(path),
+        }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="bkflow-feel memory of compiled rules per worker")
+    arg_parser.add_argument("--rules", type=int, default=5000)
+    arg_parser.add_argument("--cache-size", type=int, default=256)
+    args = arg_parser.parse_args(argv)
+    report = store_report(args.rules, args.cache_size)
+    print(f"rules: {args.rules}, store file: {report['file']} bytes")
+    print(f"{'compiled in process':<24} {report['compiled']:>12} bytes")
+    print(f"{'rule store':<24} {report['store']:>12} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Validate-only syntax check compared with a full Lark parse of the same corpus expressions
+"""
+from bkflow_feel import parser
+from bkflow_feel.syntax import check_syntax
+
+from .corpus import CORPUS
+
+
+def syntax_cases(corpus=CORPUS):
+    for area, items in corpus.items():
+        for name, expression, _ in items:
+            yield f"{area}.{name}:lark_parse", lambda expression=expression: parser.parse(expression)
+            yield f"{area}.{name}:check_syntax", lambda expression=expression: check_syntax(expression)
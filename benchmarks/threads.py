@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluation throughput with an increasing number of threads sharing the engine
+
+    python -m benchmarks.threads --threads 1 2 4 8 --calls 20000
+
+Every call looks the expression up in the compile cache and evaluates it, so the shared cache, function registry
+and expression trees are all exercised. On a GIL build throughput stays flat, on free-threaded builds it should
+grow with the thread count.
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bkflow_feel.api import compile_expression
+
+from .functions import register_functions
+
+WORKLOAD = [
+    ('amount > 100 and status = "open"', {"amount": 150, "status": "open"}),
+    ('bench score(amount, level) > 10 or matches(name, "^order-")', {"amount": 1, "level": 2, "name": "order-1"}),
+    ("items[amount > 100]", {"items": [{"amount": amount} for amount in range(0, 300, 30)]}),
+    ('date and time("2023-08-21T10:00:00") < date and time("2023-08-22T10:00:00")', {}),
+]
+DEFAULT_THREADS = (1, 2, 4, 8)
+
+
+def _worker(calls, barrier):
+    barrier.wait()
+    for index in range(calls):
+        expression, context = WORKLOAD[index % len(WORKLOAD)]
+        compile_expression(expression).evaluate(context)
+
+
+def measure_throughput(threads, calls_per_thread):
+    """
+    Evaluations per second with threads running calls_per_thread evaluations each
+    """
+    barrier = threading.Barrier(threads + 1)
+    with ThreadPoolExecutor(threads) as executor:
+        futures = [executor.submit(_worker, calls_per_thread, barrier) for _ in range(threads)]
+        barrier.wait()
+        start = time.perf_counter()
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+    return threads * calls_per_thread / elapsed
+
+
+def thread_scaling(thread_counts=DEFAULT_THREADS, calls_per_thread=20000):
+    """
+    Yield (threads, evaluations per second, speedup over the first thread count)
+    """
+    register_functions()
+    for expression, context in WORKLOAD:
+        compile_expression(expression).evaluate(context)
+    base = None
+    for threads in thread_counts:
+        throughput = measure_throughput(threads, calls_per_thread)
+        base = base or throughput
+        yield threads, throughput, throughput / base
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="bkflow-feel thread scaling benchmark")
+    arg_parser.add_argument("--threads", type=int, nargs="+", default=list(DEFAULT_THREADS))
+    arg_parser.add_argument("--calls", type=int, default=20000, help="evaluations per thread")
+    args = arg_parser.parse_args(argv)
+
+    gil = "enabled" if getattr(sys, "_is_gil_enabled", lambda: True)() else "disabled"
+    print(f"python {sys.version.split()[0]}, GIL {gil}")
+    for threads, throughput, speedup in thread_scaling(args.threads, args.calls):
+        print(f"{threads:>3} threads {throughput:>12.0f} evaluations/s {speedup:>6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
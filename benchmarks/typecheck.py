@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluation with runtime operand type checks compared with operations proven type safe by the type check pass
+"""
+from bkflow_feel.api import compile_expression
+
+# (name, expression, schema, context)
+TYPECHECK_CASES = [
+    ("arithmetic", "a + 2 * n > 10", {"a": int, "n": int}, {"a": 1, "n": 5}),
+    ("string_concat", 'prefix + string(x)', {"prefix": str}, {"x": 1, "prefix": "id-"}),
+    ("string_operator", 'starts with(name, "ab") and ends with(name, "z")', {"name": str}, {"name": "abcz"}),
+    (
+        "nested",
+        "order.price * 0.9 >= limit",
+        {"order": {"price": float}, "limit": float},
+        {"order": {"price": 150.0}, "limit": 1.0},
+    ),
+]
+
+
+def typecheck_cases(cases=TYPECHECK_CASES):
+    for name, expression, schema, context in cases:
+        checked = compile_expression(expression, use_cache=False)
+        unchecked = compile_expression(expression, use_cache=False, schema=schema)
+        yield f"{name}:checked", lambda compiled=checked, context=context: compiled.evaluate(context)
+        yield f"{name}:type_checked", lambda compiled=unchecked, context=context: compiled.evaluate(context)
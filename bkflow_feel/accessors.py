@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Context accessors for objects which are not dicts
+
+An accessor reads a key of a value, path reads like `order.customer.tier` and list filter scopes go through the
+accessor resolved for the type of each value, so dataclasses, pydantic models and other domain objects are read
+where they are, without converting the whole object graph to dicts:
+
+    compiled.evaluate({"order": order_model})
+    compiled.evaluate(ObjectContext(order_model))  # top level names read from the object
+
+Built-in adapters cover dicts and other mappings, dataclasses and pydantic models (declared fields only), other
+classes can be registered with register_accessor. Values of unsupported types have no keys, reading a key of them
+gives None like reading a key of a string does. The accessor of each type is resolved once and cached.
+"""
+import dataclasses
+import threading
+from collections.abc import Mapping
+
+from pydantic import BaseModel
+
+
+class Accessor:
+    """
+    Read key of value, return None if value has no such key
+    """
+
+    def get(self, value, key):
+        raise NotImplementedError
+
+
+class MappingAccessor(Accessor):
+    def get(self, value, key):
+        return value.get(key)
+
+
+class AttributeAccessor(Accessor):
+    """
+    Read public attributes, names starting with an underscore are never exposed
+    """
+
+    def get(self, value, key):
+        if key.startswith("_"):
+            return None
+        return getattr(value, key, None)
+
+
+class FieldsAccessor(Accessor):
+    """
+    Read the declared fields of a class only
+    """
+
+    def __init__(self, fields):
+        self.fields = frozenset(fields)
+
+    def get(self, value, key):
+        return getattr(value, key) if key in self.fields else None
+
+
+def _no_keys(value, key):
+    return None
+
+
+# 类型 -> 注册的 Accessor，按 MRO 查找
+_registered = {}
+# 类型 -> 解析后的读取函数，None 表示该类型不作为上下文
+_resolved = {}
+_lock = threading.Lock()
+
+
+def register_accessor(cls, accessor=None):
+    """
+    Read values of cls and its subclasses with accessor, an AttributeAccessor by default
+    """
+    with _lock:
+        _registered[cls] = accessor or AttributeAccessor()
+        _resolved.clear()
+
+
+def unregister_accessor(cls):
+    with _lock:
+        _registered.pop(cls, None)
+        _resolved.clear()
+
+
+def _resolve(cls):
+    for base in cls.__mro__:
+        accessor = _registered.get(base)
+        if accessor is not None:
+            return accessor
+    if issubclass(cls, BaseModel):
+        # pydantic 2 使用 model_fields，pydantic 1 使用 __fields__
+        fields = getattr(cls, "model_fields", None)
+        return FieldsAccessor(fields if fields is not None else cls.__fields__)
+    if dataclasses.is_dataclass(cls):
+        return FieldsAccessor(field.name for field in dataclasses.fields(cls))
+    if issubclass(cls, Mapping):
+        return MappingAccessor()
+    return None
+
+
+def accessor_for(cls):
+    """
+    Bound get of the accessor of cls, None if values of cls have no keys
+    """
+    try:
+        return _resolved[cls]
+    except KeyError:
+        accessor = _resolve(cls)
+        getter = accessor.get if accessor is not None else None
+        with _lock:
+            _resolved[cls] = getter
+        return getter
+
+
+def get_key(value, key):
+    """
+    Value of key in value, None if missing or value has no keys
+    """
+    if isinstance(value, dict):
+        return value.get(key)
+    getter = accessor_for(type(value))
+    return getter(value, key) if getter is not None else None
+
+
+def get_path(value, keys):
+    for key in keys:
+        if isinstance(value, dict):
+            value = value.get(key)
+        else:
+            value = get_key(value, key)
+    return value
+
+
+def as_scope(item):
+    """
+    Context used to evaluate a list filter against item, values without keys are bound to `item`
+    """
+    if isinstance(item, dict):
+        return item
+    if accessor_for(type(item)) is not None:
+        return ObjectContext(item)
+    return {"item": item}
+
+
+class ObjectContext:
+    """
+    Evaluation context reading top level names from an object through its accessor
+
+    Names bound while evaluating, e.g. the variables of some / every, shadow those of the object.
+    """
+
+    __slots__ = ("value", "bindings")
+
+    def __init__(self, value, bindings=None):
+        self.value = value
+        self.bindings = bindings if bindings is not None else {}
+
+    def get(self, name, default=None):
+        if name in self.bindings:
+            return self.bindings[name]
+        result = get_key(self.value, name)
+        return default if result is None else result
+
+    def get_path(self, name, keys):
+        return get_path(self.get(name), keys)
+
+    def __setitem__(self, name, value):
+        self.bindings[name] = value
+
+    def scope(self):
+        """
+        Child context for bindings which must not leak into this one
+        """
+        return ObjectContext(self.value, dict(self.bindings))
+
+    def __bool__(self):
+        # 避免 `context or {}` 替换掉对象上下文
+        return True
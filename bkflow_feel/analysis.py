@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Static analysis of expression trees
+"""
+from . import parsers
+from .visitors import iter_child_nodes, walk
+
+# 结果随时间变化的节点，相同上下文下两次计算结果也可能不同
+VOLATILE_NODES = (parsers.NowFunc, parsers.TodayFunc)
+COMPARISONS = {"equal", "less_than", "greater_than", "less_than_or_equal", "greater_than_or_equal"}
+# 计算结果总是布尔值的节点
+BOOLEAN_NODES = (
+    parsers.Boolean,
+    parsers.NotEqual,
+    parsers.Not,
+    parsers.Between,
+    parsers.In,
+    parsers.ListEvery,
+    parsers.ListSome,
+    parsers.StringOperator,
+    parsers.IsDefinedFunc,
+    parsers.BeforeFunc,
+    parsers.AfterFunc,
+    parsers.IncludesFunc,
+)
+
+
+def free_variables(node):
+    """
+    Names of the top level context keys read by node
+
+    Names bound by some / every are excluded, conditions of list filters are evaluated against the list items
+    and never read the outer context.
+    """
+    return {item.name for item in free_variable_nodes(node)}
+
+
+def free_variable_nodes(node):
+    """
+    Yield Variable and FunctionCall nodes which read the top level context
+    """
+    stack = [(node, frozenset())]
+    while stack:
+        node, bound = stack.pop()
+        if isinstance(node, parsers.Variable):
+            if node.name not in bound:
+                yield node
+            continue
+        if isinstance(node, parsers.FunctionCall) and node.name not in bound:
+            yield node
+        if isinstance(node, parsers.ListFilter):
+            # 过滤条件以列表元素作为上下文计算
+            stack.append((node.list_expr, bound))
+            continue
+        if isinstance(node, parsers.ListMatch):
+            stack.extend((list_expr, bound) for _, list_expr in node.iter_pairs)
+            stack.append((node.expr, bound | {name.value for name, _ in node.iter_pairs}))
+            continue
+        stack.extend((child, bound) for child in iter_child_nodes(node))
+
+
+def context_paths(node):
+    """
+    Sorted (name, keys) pairs of the context values read by node, keys is empty when the whole value is read
+
+    `order.tier` only reads the tier of order, unless order is also read as a whole somewhere else.
+    """
+    parents = {}
+    for item in walk(node):
+        for child in iter_child_nodes(item):
+            parents[id(child)] = item
+    paths = {}
+    for item in free_variable_nodes(node):
+        parent = parents.get(id(item))
+        if isinstance(parent, parsers.ContextItem) and parent.expr is item and paths.get(item.name, set()) is not None:
+            paths.setdefault(item.name, set()).add(tuple(str(key) for key in parent.keys))
+        else:
+            paths[item.name] = None
+    return tuple(
+        sorted((name, keys) for name, key_paths in paths.items() for keys in (key_paths if key_paths else [()]))
+    )
+
+
+def is_volatile_node(node):
+    if isinstance(node, VOLATILE_NODES):
+        return True
+    # 未声明为无副作用的自定义函数可能依赖外部状态
+    return isinstance(node, parsers.FuncInvocation) and not node.functions.is_pure(node.func_name)
+
+
+def is_volatile(node):
+    """
+    Whether the result of node may change without any change of its context
+    """
+    return any(is_volatile_node(item) for item in walk(node))
+
+
+def is_boolean_node(node, children_boolean):
+    """
+    Whether node always evaluates to a bool, children_boolean holds the same flag of its direct children
+    """
+    if isinstance(node, BOOLEAN_NODES):
+        return True
+    if isinstance(node, parsers.SameTypeBinaryOperator):
+        return node.operation in COMPARISONS
+    if isinstance(node, parsers.ListOperator):
+        return node.operation != "list_count"
+    if isinstance(node, parsers.Constant):
+        return isinstance(node.value, bool)
+    if isinstance(node, (parsers.BooleanOperator, parsers.Expr)):
+        return all(children_boolean)
+    return False
+
+
+def is_boolean(node):
+    """
+    Whether node always evaluates to a bool
+    """
+    flags = {}
+    for item in reversed(list(walk(node))):
+        flags[id(item)] = is_boolean_node(item, [flags[id(child)] for child in iter_child_nodes(item)])
+    return flags[id(node)]
@@ -1,37 +1,92 @@
 # -*- coding: utf-8 -*-
-import logging
-
+"""
+Module level API, a thin wrapper of the default engine which uses the global function registry and caches
+"""
 from . import parser as default_parser
 from . import transformer as default_transformer
-from .exceptions import ValidationError
-from .parsers import Expression
+from .caches import LRUCache
+from .engine import DEFAULT_MAX_EXPRESSIONS, CompiledExpression, Engine  # noqa: F401
+from .metrics import metrics
+from .patterns import pattern_cache
+from .utils import FEELFunctionsManager
+
+expression_cache = LRUCache(maxsize=DEFAULT_MAX_EXPRESSIONS)
+metrics.register_cache("expression", expression_cache)
+
+default_engine = Engine(functions=FEELFunctionsManager, expression_cache=expression_cache, pattern_cache=pattern_cache)
+
+
+def compile_expression(
+    expression,
+    parser=default_parser,
+    transformer=default_transformer,
+    use_cache=True,
+    optimize=False,
+    adaptive=False,
+    type_check=False,
+    schema=None,
+    canonical=False,
+):
+    """
+    Parse and transform expression into a CompiledExpression
+
+    - optimize: reorder side-effect free and / or operands cheapest first, an expression raising in the written
+      order may then return a value instead, off by default
+    - adaptive: also reorder by the runtime short-circuit rate of and / or operands, implies optimize
+    - type_check: skip runtime type checks proven unnecessary and report proven type errors, implied by schema
+    - schema: types of context keys, e.g. {"amount": int, "order": {"tier": str}}
+    - canonical: share the compiled expression of equivalent expressions, e.g. `a = 1 and b` and `(1 = a) and b`
+    """
+    return default_engine.compile(
+        expression,
+        use_cache=use_cache,
+        optimize=optimize,
+        adaptive=adaptive,
+        parser=parser,
+        transformer=transformer,
+        type_check=type_check,
+        schema=schema,
+        canonical=canonical,
+    )
+
+
+def preload(expressions, workers=1, chunk_size=None, freeze=True, **options):
+    """
+    Compile a rule set into the expression cache ahead of time and prepare the heap for forking, return a
+    PreloadReport with the timing of each expression and the errors of the failed ones
+
+    - workers: number of processes parsing expressions in parallel
+    - freeze: gc.freeze the compiled objects, call it right before forking workers
+    - options: optimize, adaptive, type_check and schema of compile_expression
+    """
+    return default_engine.preload(expressions, workers=workers, chunk_size=chunk_size, freeze=freeze, **options)
+
 
-logger = logging.getLogger(__name__)
+def evaluate_result(expression, context=None, budget=None, hook=None, **options):
+    """
+    Compile and evaluate expression without raising, return an EvaluationResult with the value, or the error code
+    and exception of the failure. options are passed to compile_expression.
+    """
+    return default_engine.evaluate_result(expression, context, budget=budget, hook=hook, **options)
 
 
 def parse_expression(
-    expression, context=None, raise_exception=True, parser=default_parser, transformer=default_transformer,
+    expression,
+    context=None,
+    raise_exception=True,
+    parser=default_parser,
+    transformer=default_transformer,
+    budget=None,
+    hook=None,
+    optimize=False,
 ):
-    parse_tree = parser.parse(expression)
-    logger.debug(parse_tree)
-    ast = transformer.transform(parse_tree)
-    logger.debug(ast)
-    if not isinstance(ast, Expression):
-        msg = f"Invalid FEEL expression: {expression}, ast: {ast}"
-        logger.error(msg)
-        if raise_exception:
-            raise ValueError(msg)
-        return None
-    try:
-        result = ast.evaluate(context or {})
-    except ValidationError as e:
-        logger.exception(f"evaluate expression error: {e}")
-        if raise_exception:
-            raise e
-        return None
-    except Exception as e:
-        logger.exception(f"evaluate expression error: {e}")
-        if raise_exception:
-            raise e
-        return None
-    return result
+    return default_engine.parse_expression(
+        expression,
+        context,
+        raise_exception=raise_exception,
+        parser=parser,
+        transformer=transformer,
+        budget=budget,
+        hook=hook,
+        optimize=optimize,
+    )
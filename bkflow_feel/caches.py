@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import OrderedDict
+
+
+class CacheStats:
+    def __init__(self, hits=0, misses=0, evictions=0, size=0, maxsize=0):
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+        self.size = size
+        self.maxsize = maxsize
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self.size,
+            "maxsize": self.maxsize,
+            "hit_ratio": self.hit_ratio,
+        }
+
+    def __repr__(self):
+        return "CacheStats({})".format(", ".join(f"{k}={v}" for k, v in self.to_dict().items()))
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with hit/miss counters
+
+    Safe to share between threads: every change of the order or content of the entries is serialized by a lock,
+    lookups never wait for it. A hit is only moved to the end when the lock is free at that moment, so under
+    contention recency is approximate. Counters are updated without locking and may be slightly off under
+    concurrency.
+
+    With max_weight, weigher(value) gives the weight of each entry (e.g. its estimated size in bytes) and least
+    recently used entries are also evicted while the total weight exceeds max_weight. A single entry heavier than
+    max_weight is not cached.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=1024, max_weight=None, weigher=None):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize should be positive, get {maxsize}")
+        if max_weight is not None and weigher is None:
+            raise ValueError("weigher is required when max_weight is set")
+        self.maxsize = maxsize
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.weight = 0
+        self._weights = {}
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        value = self._data.get(key, self._MISSING)
+        if value is self._MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        # 调整顺序同样修改 OrderedDict 的结构，需与写入互斥；锁被占用时跳过调整，读取不等待
+        if self._lock.acquire(blocking=False):
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                # 读取后条目已被其他线程淘汰
+                pass
+            finally:
+                self._lock.release()
+        return value
+
+    def set(self, key, value):
+        weight = self.weigher(value) if self.max_weight is not None else 0
+        with self._lock:
+            if self.max_weight is not None:
+                if weight > self.max_weight:
+                    return
+                self.weight += weight - self._weights.get(key, 0)
+                self._weights[key] = weight
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def get_or_create(self, key, factory):
+        value = self.get(key, self._MISSING)
+        if value is self._MISSING:
+            value = factory(key)
+            self.set(key, value)
+        return value
+
+    def resize(self, maxsize):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize should be positive, get {maxsize}")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def _evict(self):
+        while len(self._data) > self.maxsize or (self.max_weight is not None and self.weight > self.max_weight):
+            key, _ = self._data.popitem(last=False)
+            self.weight -= self._weights.pop(key, 0)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self.weight = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._data), self.maxsize)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Canonical form and fingerprint of transformed expression trees
+
+Expressions differing only in whitespace, parentheses, key quoting of context literals, nesting of and / or chains
+or the operand order of side-effect free boolean and / or operands have the same canonical form. Operands of `=`
+and `!=` keep their order: the runtime type check is not symmetric, `a = true` raises for a = 1 while `true = a`
+does not.
+Operand orders are normalized exactly where the optimizer may reorder them anyway, equivalent expressions can
+only differ when an operand raises an error, e.g. `a > 1 and a != null` with a null `a`.
+"""
+import hashlib
+
+from . import parser as default_parser
+from . import parsers
+from . import transformer as default_transformer
+from .analysis import is_boolean_node
+from .optimizer import is_pure_node
+from .visitors import iter_child_nodes, walk
+
+# 计算时缓存或绑定到节点上的属性，不属于表达式本身
+RUNTIME_ATTRS = frozenset(["parsed", "pattern", "pattern_cache", "functions", "checked"])
+
+
+def _encode(value, forms):
+    if isinstance(value, parsers.Expression):
+        return forms[id(value)]
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_encode(item, forms) for item in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ",".join(sorted(f"{key!r}:{_encode(item, forms)}" for key, item in value.items())) + "}"
+    if isinstance(value, str):
+        # lark Token 按普通字符串处理
+        return repr(str(value))
+    return f"{type(value).__name__}:{value!r}"
+
+
+def _is_boolean(node, boolean):
+    flag = boolean.get(id(node))
+    return is_boolean_node(node, ()) if flag is None else flag
+
+
+def _sort_runs(forms, reorderable):
+    # 与优化器一致，只在连续的可调整操作数内排序，不跨越不可调整的操作数
+    ordered, run = [], []
+    for form, flag in zip(forms, reorderable):
+        if flag:
+            run.append(form)
+            continue
+        ordered.extend(sorted(run))
+        ordered.append(form)
+        run = []
+    ordered.extend(sorted(run))
+    return ordered
+
+
+def canonical_form(ast):
+    """
+    Canonical text of a transformed tree, the tree must not be optimized yet
+    """
+    # 节点 id -> 规范文本 / 子树是否有副作用 / and、or 节点的结果是否必为布尔值
+    forms, impure, boolean = {}, {}, {}
+    # 先序遍历的逆序保证子节点总是先于父节点被处理
+    for node in reversed(list(walk(ast))):
+        name = type(node).__name__
+        impure[id(node)] = not is_pure_node(node) or any(impure[id(child)] for child in iter_child_nodes(node))
+        if isinstance(node, parsers.BooleanOperator):
+            # 无副作用且结果必为布尔值的操作数才可以调整顺序
+            operands_boolean = [_is_boolean(operand, boolean) for operand in node.operands]
+            boolean[id(node)] = all(operands_boolean)
+            reorderable = [flag and not impure[id(operand)] for operand, flag in zip(node.operands, operands_boolean)]
+            operands = _sort_runs([forms[id(operand)] for operand in node.operands], reorderable)
+            form = f"{name}({','.join(operands)})"
+        else:
+            fields = sorted((attr, value) for attr, value in vars(node).items() if attr not in RUNTIME_ATTRS)
+            form = f"{name}(" + ",".join(f"{attr}={_encode(value, forms)}" for attr, value in fields) + ")"
+        forms[id(node)] = form
+    return forms[id(ast)]
+
+
+def fingerprint(expression, parser=default_parser, transformer=default_transformer):
+    """
+    SHA-256 hex digest of the canonical form, expression can be a string or a transformed tree
+    """
+    if isinstance(expression, str):
+        expression = transformer.transform(parser.parse(expression))
+    return hashlib.sha256(canonical_form(expression).encode("utf-8")).hexdigest()
+
+
+def group_equivalent(expressions, parser=default_parser, transformer=default_transformer):
+    """
+    Group expressions by fingerprint, groups and the expressions in them keep the input order
+    """
+    groups = {}
+    for expression in expressions:
+        groups.setdefault(fingerprint(expression, parser, transformer), []).append(expression)
+    return groups
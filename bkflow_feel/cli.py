@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluate expressions over JSON lines, each line holds one context object
+
+    python -m bkflow_feel -e 'amount > 100' -e 'status = "open"' contexts.jsonl > results.jsonl
+
+Each output line is `{"results": [...], "errors": [...]}` with one item per expression in the order given, a
+failing evaluation or an invalid input line fills the error column instead of aborting the run. Output line N always
+belongs to input line N, blank input lines included, and errors of invalid input lines give their line number.
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import sys
+import time
+from itertools import islice
+
+from .api import compile_expression
+
+CHUNK_SIZE = 256
+WRITE_BUFFER_SIZE = 1 << 16
+PERCENTILES = (50, 90, 99)
+
+# 工作进程中预编译的表达式
+_worker_compiled = ()
+
+
+def _load_modules(modules):
+    # 导入注册自定义函数的模块，spawn 方式启动的工作进程同样需要导入
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _init_worker(expressions, modules):
+    global _worker_compiled
+    _load_modules(modules)
+    _worker_compiled = tuple(compile_expression(expression) for expression in expressions)
+
+
+def _format_error(e):
+    return f"{type(e).__name__}: {e}"
+
+
+def evaluate_line(line, compiled, number=None):
+    """
+    Evaluate every compiled expression against the context on line, return (output line, seconds, failed)
+
+    number is the input line number reported in the errors of an invalid line.
+    """
+    start = time.perf_counter()
+    results, errors = [], []
+    try:
+        if not line.strip():
+            raise ValueError("empty line")
+        context = json.loads(line)
+        if not isinstance(context, dict):
+            raise ValueError(f"context should be a JSON object, got {type(context).__name__}")
+    except ValueError as e:
+        # JSON 解析错误中的行号是相对于该行的，补充输入文件中的行号
+        error = _format_error(e) if number is None else f"{_format_error(e)} (input line {number})"
+        results, errors = [None] * len(compiled), [error] * len(compiled)
+    else:
+        for item in compiled:
+            try:
+                results.append(item.evaluate(context))
+                errors.append(None)
+            except Exception as e:
+                results.append(None)
+                errors.append(_format_error(e))
+    duration = time.perf_counter() - start
+    # 日期等无法直接序列化的结果转换为字符串
+    output = json.dumps({"results": results, "errors": errors}, ensure_ascii=False, default=str)
+    return output, duration, any(error is not None for error in errors)
+
+
+def evaluate_chunk(chunk, compiled=None):
+    """
+    Evaluate a (number of the first line, lines) chunk
+    """
+    compiled = _worker_compiled if compiled is None else compiled
+    first, lines = chunk
+    return [evaluate_line(line, compiled, number) for number, line in enumerate(lines, first)]
+
+
+def _chunks(lines, size):
+    # 空行同样输出一行，保证输出行与输入行一一对应
+    lines = iter(lines)
+    first = 1
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield first, chunk
+        first += len(chunk)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Stats:
+    def __init__(self):
+        self.lines = 0
+        self.errors = 0
+        self.durations = []
+        self.elapsed = 0.0
+
+    def add(self, duration, failed):
+        self.lines += 1
+        self.durations.append(duration)
+        if failed:
+            self.errors += 1
+
+    def summary(self):
+        durations = sorted(self.durations)
+        throughput = self.lines / self.elapsed if self.elapsed else 0.0
+        latencies = ", ".join(f"p{q} {percentile(durations, q) * 1e6:.1f}us" for q in PERCENTILES)
+        max_latency = durations[-1] * 1e6 if durations else 0.0
+        return (
+            f"lines: {self.lines}, lines with errors: {self.errors}, elapsed: {self.elapsed:.3f}s, "
+            f"throughput: {throughput:.1f} lines/s, latency: {latencies}, max {max_latency:.1f}us"
+        )
+
+
+def run(expressions, lines, output, workers=1, chunk_size=CHUNK_SIZE, modules=(), stats=None):
+    """
+    Evaluate expressions against each JSON line of lines and write result lines to output in input order
+    """
+    start = time.perf_counter()
+    chunks = _chunks(lines, chunk_size)
+    if workers > 1:
+        with multiprocessing.Pool(workers, _init_worker, (tuple(expressions), tuple(modules))) as pool:
+            # imap 按提交顺序返回结果，保证输出与输入顺序一致
+            _write(pool.imap(evaluate_chunk, chunks), output, stats)
+    else:
+        _load_modules(modules)
+        compiled = tuple(compile_expression(expression) for expression in expressions)
+        _write((evaluate_chunk(chunk, compiled) for chunk in chunks), output, stats)
+    if stats is not None:
+        stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def _write(batches, output, stats):
+    for batch in batches:
+        output.write("".join(f"{line}\n" for line, _, _ in batch))
+        if stats is not None:
+            for _, duration, failed in batch:
+                stats.add(duration, failed)
+    output.flush()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bkflow_feel", description="Evaluate FEEL expressions over JSONL")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file of contexts, - for stdin")
+    parser.add_argument(
+        "-e", "--expression", action="append", required=True, help="expression to evaluate, can be repeated"
+    )
+    parser.add_argument("-o", "--output", default="-", help="result file, - for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="lines sent to a worker at a time")
+    parser.add_argument(
+        "--import", dest="modules", action="append", default=[], help="module registering custom functions"
+    )
+    parser.add_argument("--stats", action="store_true", help="print throughput and latency percentiles to stderr")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        _load_modules(args.modules)
+        for expression in args.expression:
+            compile_expression(expression)
+    except Exception as e:
+        print(f"invalid expression or module: {_format_error(e)}", file=sys.stderr)
+        return 2
+
+    stats = Stats() if args.stats else None
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+    try:
+        run(args.expression, source, target, args.workers, args.chunk_size, args.modules, stats)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    if stats is not None:
+        print(stats.summary(), file=sys.stderr)
+    return 0
@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""
+Isolated evaluation environments
+
+An Engine owns its function registry view, expression cache and regex cache, so tenants served by one process do
+not evict each other's hot rules. Engines share the grammar tables of the default parser, creating one is cheap.
+"""
+import logging
+import sys
+import time
+
+from . import parser as default_parser
+from . import transformer as default_transformer
+from .accessors import get_path
+from .analysis import context_paths, is_volatile_node
+from .caches import LRUCache
+from .canonical import fingerprint
+from .evaluator import ITERATIVE_DEPTH_THRESHOLD, evaluate_iteratively, tree_depth
+from .instrumentation import combine_hooks, evaluate_with_hook, instrument
+from .lazyjson import json_loads_memo, json_loads_scope
+from .metrics import metrics
+from .optimizer import optimize as optimize_ast
+from .parsers import Expression, FuncInvocation, FunctionCall, JsonLoadsFunc, String, StringOperator
+from .patterns import PatternCache
+from .preload import preload_expressions
+from .profiler import Profiler
+from .results import INVALID_EXPRESSION, EvaluationResult, detach_traceback, error_log
+from .slowlog import slow_log
+from .syntax import check_syntax
+from .typecheck import check_types, schema_key
+from .utils import FunctionRegistry
+from .visitors import walk
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_EXPRESSIONS = 1024
+DEFAULT_MAX_PATTERNS = 4096
+DEFAULT_RESULT_CACHE_SIZE = 1024
+_MISSING = object()
+# 影响编译结果缓存 key 的 compile 参数
+COMPILE_KEY_OPTIONS = ("optimize", "adaptive", "type_check", "schema", "canonical")
+
+
+class CompiledExpression:
+    """
+    FEEL expression which has been parsed and transformed, can be evaluated repeatedly
+    """
+
+    # 结果缓存，通过 enable_result_cache 开启
+    result_cache = None
+    result_paths = ()
+    # 以 canonical=True 编译时记录等价表达式共用的指纹
+    fingerprint = None
+
+    def __init__(self, expression, ast):
+        self.expression = expression
+        self.ast = ast
+        self.depth = tree_depth(ast)
+        self.uses_json_loads = any(isinstance(node, JsonLoadsFunc) for node in walk(ast))
+        self._instrumented_ast = None
+
+    @property
+    def memoizable(self):
+        """
+        Whether the result only depends on the context, false with now(), today(), custom functions not declared
+        pure or functions taken from the context
+        """
+        return not any(is_volatile_node(node) or isinstance(node, FunctionCall) for node in walk(self.ast))
+
+    def enable_result_cache(self, maxsize=DEFAULT_RESULT_CACHE_SIZE):
+        """
+        Cache results keyed by the context values the expression reads, return whether the cache is enabled
+
+        The key only holds the values read, e.g. `order.tier` and `region` for `order.tier = "gold" and region =
+        "cn"`, contexts with unhashable values there are evaluated without the cache. Evaluations with a budget or
+        a hook bypass the cache, errors are not cached. Cached results are shared between calls and must not be
+        modified.
+        """
+        if not self.memoizable:
+            return False
+        if self.result_cache is None:
+            self.result_paths = context_paths(self.ast)
+            self.result_cache = LRUCache(maxsize)
+        elif self.result_cache.maxsize != maxsize:
+            self.result_cache.resize(maxsize)
+        return True
+
+    def disable_result_cache(self):
+        self.result_cache = None
+
+    def result_cache_stats(self):
+        return self.result_cache.stats() if self.result_cache is not None else None
+
+    def result_key(self, context):
+        """
+        Values of the context read by the expression, with their types since 1, 1.0 and True are equal keys
+        """
+        key = []
+        for name, keys in self.result_paths:
+            value = read_path(context, name, keys)
+            key.append(type(value))
+            key.append(value)
+        return tuple(key)
+
+    @property
+    def instrumented_ast(self):
+        if self._instrumented_ast is None:
+            self._instrumented_ast = instrument(self.ast)
+        return self._instrumented_ast
+
+    def evaluate(self, context=None, budget=None, hook=None):
+        if self.result_cache is not None and budget is None and hook is None:
+            return self._evaluate_cached(context or {})
+        return self._evaluate_entry(context, budget, hook)
+
+    def evaluate_result(self, context=None, budget=None, hook=None):
+        """
+        Evaluate without raising, return an EvaluationResult holding the value or the error code and exception
+        """
+        try:
+            return EvaluationResult(self.evaluate(context, budget, hook))
+        except Exception as e:
+            return EvaluationResult.failure(e, self.expression)
+
+    def _evaluate_cached(self, context):
+        result_cache = self.result_cache
+        key = self.result_key(context)
+        try:
+            result = result_cache.get(key, _MISSING)
+        except TypeError:
+            # 读取的值不可哈希，不使用缓存
+            return self._evaluate_entry(context, None, None)
+        if result is not _MISSING:
+            if metrics.enabled:
+                metrics.increment("result_cache_hits_total")
+            return result
+        if metrics.enabled:
+            metrics.increment("result_cache_misses_total")
+        result = self._evaluate_entry(context, None, None)
+        result_cache.set(key, result)
+        return result
+
+    def _evaluate_entry(self, context, budget, hook):
+        if self.uses_json_loads and json_loads_memo.get() is None:
+            # 同一次计算中相同字符串的 json loads 只解码一次
+            with json_loads_scope():
+                return self._evaluate_entry(context, budget, hook)
+        if budget is None and hook is None and not metrics.enabled and not slow_log.enabled:
+            return self._evaluate_plain(context or {})
+        context = context or {}
+        slow_threshold = slow_log.threshold if slow_log.enabled and slow_log.should_sample() else None
+        if slow_threshold is None and not metrics.enabled:
+            return self._evaluate(context, budget, hook)
+
+        profiler = None
+        if slow_threshold is not None and slow_log.breakdown:
+            profiler = Profiler()
+            hook = combine_hooks(hook, profiler)
+        error = None
+        start = time.perf_counter()
+        try:
+            return self._evaluate(context, budget, hook)
+        except Exception as e:
+            error = e
+            if metrics.enabled:
+                metrics.increment("evaluation_errors_total", labels={"exception": type(e).__name__})
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            if metrics.enabled:
+                metrics.observe("evaluate_seconds", duration)
+            if slow_threshold is not None and duration >= slow_threshold:
+                slow_log.record(self.expression, duration, context, profiler=profiler, error=error)
+
+    def _evaluate_plain(self, context):
+        if self.depth > ITERATIVE_DEPTH_THRESHOLD:
+            return evaluate_iteratively(self.ast, context)
+        return self.ast.evaluate(context)
+
+    def _evaluate(self, context, budget, hook):
+        if budget is None and hook is None:
+            return self._evaluate_plain(context)
+        if budget is None:
+            return evaluate_with_hook(self.instrumented_ast, context, hook)
+        return budget.evaluate(self.instrumented_ast, context, hook=hook)
+
+    def __repr__(self):
+        return f"<CompiledExpression {self.expression!r}>"
+
+
+def read_path(context, name, keys=()):
+    """
+    Value of `name.key1.key2` in context, None when missing, same as evaluating the path
+    """
+    if keys and type(context) is not dict:
+        context_get_path = getattr(context, "get_path", None)
+        if context_get_path is not None:
+            return context_get_path(name, keys)
+    return get_path(context.get(name), keys)
+
+
+def estimate_size(compiled):
+    """
+    Approximate memory held by a CompiledExpression in bytes, used for the cache byte quota
+    """
+    size = sys.getsizeof(compiled) + sys.getsizeof(compiled.expression)
+    for node in walk(compiled.ast):
+        size += sys.getsizeof(node) + sys.getsizeof(vars(node))
+    return size
+
+
+class Engine:
+    """
+    Parser, function registry and caches used to compile and evaluate expressions
+
+    - functions: registry resolving custom functions, a new FunctionRegistry over the global one by default
+    - max_expressions / max_expression_bytes: entry and approximate memory quota of the compiled expression cache
+    - max_patterns: entry quota of the cache of regex patterns coming from context values
+    """
+
+    def __init__(
+        self,
+        functions=None,
+        parser=default_parser,
+        transformer=default_transformer,
+        max_expressions=DEFAULT_MAX_EXPRESSIONS,
+        max_expression_bytes=None,
+        max_patterns=DEFAULT_MAX_PATTERNS,
+        expression_cache=None,
+        pattern_cache=None,
+    ):
+        self.functions = functions if functions is not None else FunctionRegistry()
+        self.parser = parser
+        self.transformer = transformer
+        if expression_cache is None:
+            weigher = estimate_size if max_expression_bytes is not None else None
+            expression_cache = LRUCache(max_expressions, max_weight=max_expression_bytes, weigher=weigher)
+        self.expression_cache = expression_cache
+        self.pattern_cache = pattern_cache if pattern_cache is not None else PatternCache(maxsize=max_patterns)
+        self.compile_errors = LRUCache(max_expressions)
+
+    def register_funcs(self, func_dict, pure=False):
+        self.functions.register_funcs(func_dict, pure=pure)
+
+    def compile(
+        self,
+        expression,
+        use_cache=True,
+        optimize=False,
+        adaptive=False,
+        parser=None,
+        transformer=None,
+        type_check=False,
+        schema=None,
+        canonical=False,
+    ):
+        """
+        Parse and transform expression into a CompiledExpression bound to this engine
+
+        - optimize: reorder side-effect free and / or operands cheapest first, an expression raising in the written
+      order may then return a value instead, off by default
+        - adaptive: also reorder by the runtime short-circuit rate of and / or operands, implies optimize
+        - type_check: infer operand types, skip the runtime type check of operations proven type safe and raise
+          ValidationError for those proven to fail, implied by schema
+        - schema: types of context keys, see bkflow_feel.typecheck
+        - canonical: share the cached CompiledExpression of an equivalent expression, see bkflow_feel.canonical
+        """
+        parser = parser or self.parser
+        transformer = transformer or self.transformer
+        use_cache = use_cache and parser is self.parser and transformer is self.transformer
+        type_check = type_check or schema is not None
+        optimize = optimize or adaptive
+        if use_cache:
+            compiled = self.expression_cache.get(
+                self._cache_key(expression, optimize, adaptive, type_check, schema, canonical)
+            )
+            if compiled is not None:
+                return compiled
+
+        try:
+            if metrics.enabled:
+                ast = _parse_and_transform_with_metrics(expression, parser, transformer)
+            else:
+                parse_tree = parser.parse(expression)
+                logger.debug(parse_tree)
+                ast = transformer.transform(parse_tree)
+                logger.debug(ast)
+            return self._compile_transformed(
+                expression, ast, use_cache, optimize, adaptive, type_check, schema, canonical
+            )
+        except Exception as e:
+            # 解析、转换及之后的校验、类型推导出错都计入编译错误
+            if metrics.enabled:
+                metrics.increment("compile_errors_total", labels={"exception": type(e).__name__})
+            raise
+
+    @staticmethod
+    def _cache_key(expression, optimize=False, adaptive=False, type_check=False, schema=None, canonical=False):
+        cache_key = expression if not optimize and not adaptive else (expression, optimize, adaptive)
+        if type_check or schema is not None:
+            cache_key = (cache_key, schema_key(schema))
+        return ("canonical", cache_key) if canonical else cache_key
+
+    def _compile_transformed(
+        self,
+        expression,
+        ast,
+        use_cache=True,
+        optimize=False,
+        adaptive=False,
+        type_check=False,
+        schema=None,
+        canonical=False,
+    ):
+        options = {"optimize": optimize or adaptive, "adaptive": adaptive, "type_check": type_check, "schema": schema}
+        expression_fingerprint = fingerprint_key = None
+        if canonical and isinstance(ast, Expression):
+            # 指纹在绑定及优化前计算，等价表达式共用同一个编译结果
+            expression_fingerprint = fingerprint(ast)
+            fingerprint_key = ("fingerprint", self._cache_key(expression_fingerprint, **options))
+            compiled = self.expression_cache.get(fingerprint_key) if use_cache else None
+            if compiled is not None:
+                self.expression_cache.set(self._cache_key(expression, canonical=True, **options), compiled)
+                return compiled
+        compiled = self._finish(expression, ast, **options)
+        compiled.fingerprint = expression_fingerprint
+        if use_cache:
+            self.expression_cache.set(self._cache_key(expression, canonical=canonical, **options), compiled)
+            if fingerprint_key is not None:
+                self.expression_cache.set(fingerprint_key, compiled)
+        return compiled
+
+    def _finish(self, expression, ast, optimize=False, adaptive=False, type_check=False, schema=None):
+        # 转换得到的语法树绑定到本引擎，并完成类型推导及优化
+        if not isinstance(ast, Expression):
+            raise ValueError(f"Invalid FEEL expression: {expression}, ast: {ast}")
+        self.bind(ast)
+        if type_check:
+            check_types(ast, schema)
+        if optimize:
+            ast = optimize_ast(ast, adaptive=adaptive)
+        return CompiledExpression(expression, ast)
+
+    def preload(self, expressions, workers=1, chunk_size=None, freeze=True, **options):
+        """
+        Compile expressions into the expression cache ahead of time, return a PreloadReport
+
+        See bkflow_feel.preload.preload_expressions, options are passed to compile.
+        """
+        return preload_expressions(self, expressions, workers=workers, chunk_size=chunk_size, freeze=freeze, **options)
+
+    def bind(self, ast):
+        """
+        Let function calls and dynamic regex of ast use this engine's registry and cache
+        """
+        bind_functions = self.functions is not FuncInvocation.functions
+        bind_patterns = self.pattern_cache is not StringOperator.pattern_cache
+        for node in walk(ast):
+            if bind_functions and isinstance(node, FuncInvocation):
+                node.functions = self.functions
+            elif isinstance(node, StringOperator):
+                if bind_patterns:
+                    node.pattern_cache = self.pattern_cache
+                if isinstance(node.right, String):
+                    # 字面量正则只编译到本引擎的缓存
+                    node.compile_literal_pattern(node.right.value)
+        return ast
+
+    def evaluate_result(self, expression, context=None, budget=None, hook=None, **options):
+        """
+        Compile and evaluate expression without raising, return an EvaluationResult
+
+        Compile errors are cached like compiled expressions, a rule failing to compile again and again is not parsed
+        again. options are passed to compile, errors are not cached without use_cache or with a custom parser or
+        transformer.
+        """
+        cache_key = None
+        try:
+            cache_key = self._error_cache_key(expression, options)
+            error = self.compile_errors.get(cache_key) if cache_key is not None else None
+            if error is None:
+                compiled = self.compile(expression, **options)
+        except Exception as e:
+            error = e
+            if cache_key is not None:
+                # 缓存的异常不保留调用栈
+                self.compile_errors.set(cache_key, detach_traceback(e))
+        if error is not None:
+            return EvaluationResult.failure(error, expression, compiling=True)
+        return compiled.evaluate_result(context, budget, hook)
+
+    def _error_cache_key(self, expression, options):
+        if not options.get("use_cache", True):
+            return None
+        if options.get("parser", self.parser) not in (None, self.parser):
+            return None
+        if options.get("transformer", self.transformer) not in (None, self.transformer):
+            return None
+        return self._cache_key(expression, **{key: options[key] for key in COMPILE_KEY_OPTIONS if key in options})
+
+    def parse_expression(
+        self,
+        expression,
+        context=None,
+        raise_exception=True,
+        parser=None,
+        transformer=None,
+        budget=None,
+        hook=None,
+        optimize=False,
+    ):
+        try:
+            compiled = self.compile(expression, parser=parser, transformer=transformer, optimize=optimize)
+        except ValueError as e:
+            error_log.error((expression, INVALID_EXPRESSION), "%s", e, target_logger=logger)
+            if raise_exception:
+                raise e
+            return None
+        try:
+            result = compiled.evaluate(context, budget=budget, hook=hook)
+        except Exception as e:
+            # 相同表达式的同类错误按时间间隔限流输出
+            error_log.error((expression, type(e)), "evaluate expression error: %s", e, exc_info=e, target_logger=logger)
+            if raise_exception:
+                raise e
+            return None
+        return result
+
+    def check_syntax(self, expression):
+        """
+        Validate expression against the grammar only, return None or a SyntaxIssue
+        """
+        return check_syntax(expression, self.parser)
+
+    def stats(self):
+        return {"expression": self.expression_cache.stats(), "pattern": self.pattern_cache.stats()}
+
+
+def _parse_and_transform_with_metrics(expression, parser, transformer):
+    with metrics.timer("parse_seconds"):
+        parse_tree = parser.parse(expression)
+    logger.debug(parse_tree)
+    with metrics.timer("transform_seconds"):
+        ast = transformer.transform(parse_tree)
+    logger.debug(ast)
+    return ast
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Explicit-stack evaluation for very deep expressions
+
+Nodes taking part define iter_evaluate(context), a generator which yields child nodes, receives their values
+and returns the node result. Errors of a child are thrown into the generator at the yield point. Other nodes are
+evaluated with their own evaluate method.
+"""
+from .visitors import iter_child_nodes
+
+# 超过该深度的表达式使用显式栈计算，避免触发 Python 递归深度限制
+ITERATIVE_DEPTH_THRESHOLD = 200
+
+
+def evaluate_iteratively(node, context):
+    """
+    Evaluate node with the same semantics as node.evaluate(context), without recursion through
+    iter_evaluate nodes
+    """
+    iter_evaluate = getattr(node, "iter_evaluate", None)
+    if iter_evaluate is None:
+        return node.evaluate(context)
+
+    stack = [iter_evaluate(context)]
+    value, error = None, None
+    while stack:
+        try:
+            if error is None:
+                child = stack[-1].send(value)
+            else:
+                pending, error = error, None
+                child = stack[-1].throw(pending)
+        except StopIteration as e:
+            stack.pop()
+            value = e.value
+            continue
+        except Exception as e:
+            stack.pop()
+            if not stack:
+                raise
+            error = e
+            continue
+        iter_evaluate = getattr(child, "iter_evaluate", None)
+        if iter_evaluate is None:
+            try:
+                value = child.evaluate(context)
+            except Exception as e:
+                error = e
+        else:
+            stack.append(iter_evaluate(context))
+            value = None
+    return value
+
+
+def tree_depth(node):
+    """
+    Maximum nesting depth of the tree, computed without recursion
+    """
+    max_depth = 0
+    stack = [(node, 1)]
+    while stack:
+        node, depth = stack.pop()
+        max_depth = max(max_depth, depth)
+        stack.extend((child, depth + 1) for child in iter_child_nodes(node))
+    return max_depth
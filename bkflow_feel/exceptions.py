@@ -3,3 +3,14 @@
 
 class ValidationError(Exception):
     pass
+
+
+class BudgetExceededError(Exception):
+    def __init__(self, limit, value, max_value):
+        super().__init__(f"evaluation budget exceeded: {limit} {value} > {max_value}")
+        self.limit = limit
+        self.value = value
+        self.max_value = max_value
+
+    def __reduce__(self):
+        return self.__class__, (self.limit, self.value, self.max_value)
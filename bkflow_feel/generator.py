@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Random FEEL expression generator driven by the productions of FEEL.lark
+"""
+import random
+import string
+
+from lark.exceptions import LarkError
+from lark.grammar import NonTerminal
+
+from . import parser as default_parser
+
+DEFAULT_VARIABLES = ("a", "b", "c", "x", "y", "z", "items", "order")
+# now() / today() depend on the wall clock, results differ between two evaluations
+DEFAULT_EXCLUDE = ("now_func", "today_func", "func_invocation")
+TIMEZONES = ("Asia/Shanghai", "America/Los_Angeles", "Europe/London")
+SCALAR_KINDS = ("int", "float", "str", "bool", "null")
+# 单符号展开的权重，偏向数字与变量，减少无意义的类型组合
+DEFAULT_WEIGHTS = {"number": 4, "variable": 4, "string": 2, "null": 0.5, "context": 0.5, "list_": 1}
+
+
+class ExpressionGenerator:
+    """
+    Walk the grammar rules of the parser to emit random but syntactically valid expressions
+
+    - seed: random seed, the same seed yields the same expressions
+    - max_depth: nesting depth of grammar productions, deeper rules take the shortest way out
+    - max_tokens: soft limit of emitted tokens
+    - chain_probability: probability of choosing an operator production such as `a or b` or `a + b`
+    - variables: names used for variables, context keys and iteration names
+    - functions: custom function names, func_invocation is only generated when provided
+    - exclude: rule names never expanded
+    - weights: relative weight of expansions made of a single rule, keyed by rule name, 1 by default
+    """
+
+    def __init__(
+        self,
+        seed=None,
+        max_depth=8,
+        max_tokens=60,
+        chain_probability=0.3,
+        variables=DEFAULT_VARIABLES,
+        functions=(),
+        exclude=DEFAULT_EXCLUDE,
+        weights=None,
+        parser=default_parser,
+    ):
+        self.random = random.Random(seed)
+        self.max_depth = max_depth
+        self.max_tokens = max_tokens
+        self.chain_probability = chain_probability
+        self.variables = tuple(variables)
+        self.functions = tuple(functions)
+        self.parser = parser
+        self.weights = DEFAULT_WEIGHTS if weights is None else weights
+        exclude = set(exclude)
+        if self.functions:
+            exclude.discard("func_invocation")
+
+        self.terminals = {terminal.name: terminal for terminal in parser.terminals}
+        self.rules = {}
+        for rule in parser.rules:
+            if rule.origin.name in exclude or any(symbol.name in exclude for symbol in rule.expansion):
+                continue
+            self.rules.setdefault(rule.origin.name, []).append(rule.expansion)
+        self.min_depth = self._compute_min_depth()
+
+    def _compute_min_depth(self):
+        min_depth = {}
+        changed = True
+        while changed:
+            changed = False
+            for origin, expansions in self.rules.items():
+                for expansion in expansions:
+                    depths = [
+                        min_depth.get(symbol.name) if isinstance(symbol, NonTerminal) else 0 for symbol in expansion
+                    ]
+                    if None in depths:
+                        continue
+                    depth = max(depths, default=0) + 1
+                    if depth < min_depth.get(origin, float("inf")):
+                        min_depth[origin] = depth
+                        changed = True
+        return min_depth
+
+    def _expansion_depth(self, expansion):
+        return max(
+            (self.min_depth.get(symbol.name, float("inf")) for symbol in expansion if isinstance(symbol, NonTerminal)),
+            default=0,
+        )
+
+    def _choose_expansion(self, origin, depth, tokens):
+        expansions = [
+            expansion for expansion in self.rules[origin] if self._expansion_depth(expansion) != float("inf")
+        ]
+        if depth >= self.max_depth or len(tokens) >= self.max_tokens:
+            shortest = min(self._expansion_depth(expansion) for expansion in expansions)
+            expansions = [expansion for expansion in expansions if self._expansion_depth(expansion) == shortest]
+        else:
+            # 运算符展开（如 term "+" term、disjunction "or" conjunction）按 chain_probability 选取
+            passthrough = {expansion[0].name for expansion in expansions if len(expansion) == 1}
+            passthrough.add(origin)
+            operators = [
+                expansion
+                for expansion in expansions
+                if len(expansion) > 1 and any(symbol.name in passthrough for symbol in expansion)
+            ]
+            others = [expansion for expansion in expansions if expansion not in operators]
+            if operators and others:
+                expansions = operators if self.random.random() < self.chain_probability else others
+        if len(expansions) == 1:
+            return expansions[0]
+        weights = [self.weights.get(expansion[0].name, 1) if len(expansion) == 1 else 1 for expansion in expansions]
+        return self.random.choices(expansions, weights)[0]
+
+    def _expand(self, origin, depth, tokens):
+        # 使用显式栈避免深层语法展开时递归过深
+        stack = [(origin, depth)]
+        while stack:
+            symbol_name, depth = stack.pop()
+            if symbol_name in self.rules:
+                if symbol_name == "func_name":
+                    tokens.append(self.random.choice(self.functions))
+                    continue
+                if symbol_name == "tz_name":
+                    tokens.append(self.random.choice(("Z",) + tuple(f"@{name}" for name in TIMEZONES)))
+                    continue
+                expansion = self._choose_expansion(symbol_name, depth, tokens)
+                # 单符号展开（优先级层级间的传递）不计入嵌套深度
+                child_depth = depth if len(expansion) == 1 else depth + 1
+                stack.extend((symbol.name, child_depth) for symbol in reversed(expansion))
+            else:
+                tokens.append(self.terminal_value(symbol_name))
+        return tokens
+
+    def terminal_value(self, name):
+        if name == "NAME":
+            return self.random.choice(self.variables)
+        if name == "SIGNED_INT":
+            return str(self.random.randint(-10, 100))
+        if name == "SIGNED_FLOAT":
+            return "{:.2f}".format(self.random.uniform(-10, 100))
+        if name == "STRING":
+            return '"{}"'.format("".join(self.random.choice(string.ascii_lowercase) for _ in range(3)))
+
+        pattern = self.terminals[name].pattern
+        if pattern.type == "str":
+            return pattern.value
+        # date / time / tz_offset 等匿名正则终结符
+        source = pattern.value
+        if source == r"\d{4}-\d{2}-\d{2}":
+            return "{:04d}-{:02d}-{:02d}".format(
+                self.random.randint(2000, 2030), self.random.randint(1, 12), self.random.randint(1, 28)
+            )
+        if source == r"\d{2}:\d{2}:\d{2}":
+            return "{:02d}:{:02d}:{:02d}".format(
+                self.random.randint(0, 23), self.random.randint(0, 59), self.random.randint(0, 59)
+            )
+        if source == r"[\+\-]\d{2}:\d{2}":
+            return "{}{:02d}:{:02d}".format(self.random.choice("+-"), self.random.randint(0, 12), 0)
+        raise ValueError(f"can not generate value for terminal {name}: {source}")
+
+    def tokens(self, start="expr"):
+        return self._expand(start, 0, [])
+
+    def expression(self, start="expr", max_attempts=20):
+        """
+        Generate one expression which can be parsed by the parser
+        """
+        for _ in range(max_attempts):
+            expression = " ".join(self.tokens(start))
+            try:
+                self.parser.parse(expression)
+            except LarkError:
+                continue
+            return expression
+        raise RuntimeError(f"can not generate a valid expression in {max_attempts} attempts")
+
+    def expressions(self, count, start="expr"):
+        return [self.expression(start) for _ in range(count)]
+
+    def scalar(self, kind=None):
+        kind = kind or self.random.choice(SCALAR_KINDS)
+        if kind == "int":
+            return self.random.randint(-10, 100)
+        if kind == "float":
+            return round(self.random.uniform(-10, 100), 2)
+        if kind == "str":
+            return "".join(self.random.choice(string.ascii_lowercase) for _ in range(3))
+        if kind == "bool":
+            return self.random.choice((True, False))
+        return None
+
+    def value(self, depth=2):
+        kind = self.random.choice(SCALAR_KINDS + (("list", "dict") if depth > 0 else ()))
+        if kind == "list":
+            item_kind = self.random.choice(SCALAR_KINDS[:-1])
+            return [self.scalar(item_kind) for _ in range(self.random.randint(0, 5))]
+        if kind == "dict":
+            return {name: self.value(depth - 1) for name in self.random.sample(self.variables, 3)}
+        return self.scalar(kind)
+
+    def context(self, depth=2):
+        """
+        Random context which defines every generator variable
+        """
+        return {name: self.value(depth) for name in self.variables}
+
+
+def or_chain(size, variable="a"):
+    return " or ".join(f"{variable} = {index}" for index in range(size))
+
+
+def and_chain(size, variable="a"):
+    return " and ".join(f"{variable} > {-index}" for index in range(size))
+
+
+def nested_context(depth, leaf="1"):
+    expression = leaf
+    for index in range(depth):
+        expression = "{" + f"k{index}: {expression}" + "}"
+    return expression + "".join(f".k{index}" for index in reversed(range(depth)))
+
+
+def in_list(size, variable="a"):
+    return "{} in [{}]".format(variable, ", ".join(str(index) for index in range(size)))
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import time
+from contextvars import ContextVar
+
+from .exceptions import BudgetExceededError
+from .instrumentation import EvaluationHook, combine_hooks, evaluate_with_hook
+
+_active_tracker = ContextVar("bkflow_feel_budget_tracker", default=None)
+
+
+class EvaluationBudget:
+    """
+    Resource limits of a single evaluation, None means unlimited
+
+    - max_steps: max count of evaluated nodes
+    - max_depth: max nesting depth of node evaluation
+    - timeout: max wall time in seconds, checked between node evaluations
+    - max_number_bits: max bit length of integer results
+    - max_string_length: max length of string results
+    - max_list_length: max length of list results
+    """
+
+    def __init__(
+        self,
+        max_steps=None,
+        max_depth=None,
+        timeout=None,
+        max_number_bits=None,
+        max_string_length=None,
+        max_list_length=None,
+    ):
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.max_number_bits = max_number_bits
+        self.max_string_length = max_string_length
+        self.max_list_length = max_list_length
+
+    def evaluate(self, ast, context, hook=None):
+        """
+        Evaluate an instrumented ast under this budget, hook is called together with the budget tracker
+        """
+        tracker = BudgetTracker(self)
+        tracker_token = _active_tracker.set(tracker)
+        try:
+            return evaluate_with_hook(ast, context, combine_hooks(tracker, hook))
+        finally:
+            _active_tracker.reset(tracker_token)
+
+
+class BudgetTracker(EvaluationHook):
+    def __init__(self, budget: EvaluationBudget):
+        self.budget = budget
+        self.steps = 0
+        self.depth = 0
+        self.deadline = time.perf_counter() + budget.timeout if budget.timeout is not None else None
+
+    def enter(self, node, context):
+        budget = self.budget
+        self.steps += 1
+        if budget.max_steps is not None and self.steps > budget.max_steps:
+            raise BudgetExceededError("steps", self.steps, budget.max_steps)
+        self.depth += 1
+        if budget.max_depth is not None and self.depth > budget.max_depth:
+            raise BudgetExceededError("depth", self.depth, budget.max_depth)
+        self.check_time()
+
+    def exit(self, node, token, result=None, error=None):
+        self.depth -= 1
+        if error is None:
+            self.check_time()
+            self.check_size(result)
+
+    def check_time(self):
+        if self.deadline is not None:
+            now = time.perf_counter()
+            if now > self.deadline:
+                elapsed = now - self.deadline + self.budget.timeout
+                raise BudgetExceededError("time", round(elapsed, 6), self.budget.timeout)
+
+    def check_size(self, value):
+        budget = self.budget
+        value_type = type(value)
+        if value_type is int:
+            if budget.max_number_bits is not None and value.bit_length() > budget.max_number_bits:
+                raise BudgetExceededError("number_bits", value.bit_length(), budget.max_number_bits)
+        elif value_type is str:
+            if budget.max_string_length is not None and len(value) > budget.max_string_length:
+                raise BudgetExceededError("string_length", len(value), budget.max_string_length)
+        elif value_type is list:
+            if budget.max_list_length is not None and len(value) > budget.max_list_length:
+                raise BudgetExceededError("list_length", len(value), budget.max_list_length)
+
+    def check_power(self, base, exponent):
+        """
+        Estimate the size of base ** exponent before computing it
+        """
+        max_bits = self.budget.max_number_bits
+        if max_bits is None or type(base) is not int or type(exponent) is not int or exponent <= 0:
+            return
+        estimated_bits = max(abs(base).bit_length() - 1, 0) * exponent + 1
+        if estimated_bits > max_bits:
+            raise BudgetExceededError("number_bits", estimated_bits, max_bits)
+
+
+def active_tracker():
+    return _active_tracker.get()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections.abc import Mapping
+
+from .analysis import free_variables, is_volatile
+from .api import CompiledExpression, compile_expression
+
+
+class ResultChange:
+    """
+    Result of a registered expression which differs from the previous evaluation, error is the exception raised
+    """
+
+    def __init__(self, key, old, new, old_error=None, new_error=None):
+        self.key = key
+        self.old = old
+        self.new = new
+        self.old_error = old_error
+        self.new_error = new_error
+
+    def __eq__(self, other):
+        if not isinstance(other, ResultChange):
+            return NotImplemented
+        return (self.key, self.old, self.new, self.old_error, self.new_error) == (
+            other.key,
+            other.old,
+            other.new,
+            other.old_error,
+            other.new_error,
+        )
+
+    def __repr__(self):
+        return f"<ResultChange {self.key!r}: {self.old!r} -> {self.new!r}>"
+
+
+class Subscription:
+    def __init__(self, key, index, compiled: CompiledExpression, variables, volatile):
+        self.key = key
+        self.index = index
+        self.compiled = compiled
+        self.variables = variables
+        self.volatile = volatile
+        self.value = None
+        self.error = None
+
+
+class IncrementalEvaluator:
+    """
+    Keep the results of registered expressions against one mutable context up to date
+
+    Each expression is indexed by the context keys it reads, update only re-evaluates expressions reading a
+    changed key, and those containing volatile nodes (now(), today(), custom functions not declared pure).
+    """
+
+    def __init__(self, context=None, budget=None):
+        self.context = context if context is not None else {}
+        self.budget = budget
+        self.subscriptions = {}
+        self._dependents = {}
+        self._volatile = set()
+        self._index = 0
+        self._lock = threading.RLock()
+
+    def register(self, key, expression, **compile_kwargs):
+        """
+        Register expression (str or CompiledExpression) under key, evaluate it and return its current result
+        """
+        if isinstance(expression, CompiledExpression):
+            compiled = expression
+        else:
+            compiled = compile_expression(expression, **compile_kwargs)
+        with self._lock:
+            self._index += 1
+            subscription = Subscription(
+                key, self._index, compiled, free_variables(compiled.ast), is_volatile(compiled.ast)
+            )
+            self.unregister(key)
+            self.subscriptions[key] = subscription
+            for name in subscription.variables:
+                self._dependents.setdefault(name, set()).add(key)
+            if subscription.volatile:
+                self._volatile.add(key)
+            self._evaluate(subscription)
+        return subscription.value
+
+    def unregister(self, key):
+        with self._lock:
+            subscription = self.subscriptions.pop(key, None)
+            if subscription is None:
+                return
+            for name in subscription.variables:
+                keys = self._dependents.get(name)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._dependents[name]
+            self._volatile.discard(key)
+
+    def dependents(self, name):
+        """
+        Keys of registered expressions reading the context key name
+        """
+        return set(self._dependents.get(name, ()))
+
+    def result(self, key):
+        subscription = self.subscriptions[key]
+        if subscription.error is not None:
+            raise subscription.error
+        return subscription.value
+
+    @property
+    def results(self):
+        return {key: subscription.value for key, subscription in self.subscriptions.items()}
+
+    @property
+    def errors(self):
+        return {key: subscription.error for key, subscription in self.subscriptions.items() if subscription.error}
+
+    def update(self, changes=()):
+        """
+        Re-evaluate expressions affected by changes and return a ResultChange for every result which differs
+
+        changes is either a mapping merged into the context, or the keys already modified in place. Nested keys
+        like `order.status` are matched by their top level key.
+        """
+        with self._lock:
+            if isinstance(changes, Mapping):
+                self.context.update(changes)
+            affected = set(self._volatile)
+            for changed_key in changes:
+                affected.update(self._dependents.get(str(changed_key).split(".", 1)[0], ()))
+            return self._reevaluate(affected)
+
+    def refresh(self):
+        """
+        Re-evaluate all registered expressions
+        """
+        with self._lock:
+            return self._reevaluate(set(self.subscriptions))
+
+    def _reevaluate(self, keys):
+        changes = []
+        # 按注册顺序计算，保证返回结果的顺序稳定
+        for key in sorted(keys, key=lambda key: self.subscriptions[key].index):
+            subscription = self.subscriptions[key]
+            old, old_error = subscription.value, subscription.error
+            self._evaluate(subscription)
+            if not _same_outcome(old, old_error, subscription.value, subscription.error):
+                changes.append(ResultChange(key, old, subscription.value, old_error, subscription.error))
+        return changes
+
+    def _evaluate(self, subscription):
+        try:
+            subscription.value = subscription.compiled.evaluate(self.context, budget=self.budget)
+            subscription.error = None
+        except Exception as e:
+            subscription.value, subscription.error = None, e
+
+
+def _same_outcome(old, old_error, new, new_error):
+    if old_error is not None or new_error is not None:
+        return type(old_error) is type(new_error) and str(old_error) == str(new_error)
+    return type(old) is type(new) and old == new
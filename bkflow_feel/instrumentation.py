@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+from contextvars import ContextVar
+
+from .visitors import transform_nodes
+
+_active_hook = ContextVar("bkflow_feel_evaluation_hook", default=None)
+_instrumented_classes = {}
+
+
+class EvaluationHook:
+    """
+    Hook called around every node evaluation of an instrumented expression tree
+    """
+
+    def enter(self, node, context):
+        """
+        Called before node is evaluated, the return value is passed to exit as token
+        """
+        return None
+
+    def exit(self, node, token, result=None, error=None):
+        """
+        Called after node is evaluated, error is the raised exception if evaluation failed
+        """
+        pass
+
+
+class CompositeHook(EvaluationHook):
+    """
+    Dispatch to several hooks, exit is called in reverse order of enter
+    """
+
+    def __init__(self, hooks):
+        self.hooks = list(hooks)
+
+    def enter(self, node, context):
+        return [hook.enter(node, context) for hook in self.hooks]
+
+    def exit(self, node, token, result=None, error=None):
+        for hook, hook_token in zip(reversed(self.hooks), reversed(token)):
+            hook.exit(node, hook_token, result=result, error=error)
+
+
+def combine_hooks(*hooks):
+    hooks = [hook for hook in hooks if hook is not None]
+    if not hooks:
+        return None
+    return hooks[0] if len(hooks) == 1 else CompositeHook(hooks)
+
+
+def evaluate_with_hook(ast, context, hook):
+    """
+    Evaluate an instrumented ast with hook activated
+    """
+    token = activate_hook(hook)
+    try:
+        return ast.evaluate(context)
+    finally:
+        deactivate_hook(token)
+
+
+def _instrumented_class(cls):
+    instrumented_cls = _instrumented_classes.get(cls)
+    if instrumented_cls is not None:
+        return instrumented_cls
+
+    base_evaluate = cls.evaluate
+
+    def evaluate(self, context):
+        hook = _active_hook.get()
+        if hook is None:
+            return base_evaluate(self, context)
+        token = hook.enter(self, context)
+        try:
+            result = base_evaluate(self, context)
+        except Exception as e:
+            hook.exit(self, token, error=e)
+            raise
+        hook.exit(self, token, result=result)
+        return result
+
+    # 使用子类保证 isinstance 判断不受影响
+    instrumented_cls = type(cls)(
+        cls.__name__,
+        (cls,),
+        {
+            "evaluate": evaluate,
+            "__instrumented__": True,
+            "__qualname__": cls.__qualname__,
+            "__module__": cls.__module__,
+        },
+    )
+    # 并发创建时以先写入的类为准，保证同一节点类型只对应一个插桩类
+    return _instrumented_classes.setdefault(cls, instrumented_cls)
+
+
+def is_instrumented(node):
+    return type(node).__dict__.get("__instrumented__", False)
+
+
+def instrument(ast):
+    """
+    Return a copy of ast whose nodes call the active hook around evaluation
+
+    The original tree is left untouched, so evaluations without hooks keep running at full speed.
+    """
+
+    def _instrument_node(node):
+        if not is_instrumented(node):
+            node.__class__ = _instrumented_class(type(node))
+        return node
+
+    return transform_nodes(ast, _instrument_node)
+
+
+def activate_hook(hook):
+    return _active_hook.set(hook)
+
+
+def deactivate_hook(token):
+    _active_hook.reset(token)
+
+
+def active_hook():
+    return _active_hook.get()
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Lazily decoded JSON contexts
+
+LazyJSON wraps a raw JSON object document and only builds Python objects for the keys an expression reads:
+`a.b.c` locates the value of `a`, then `b` inside it, and decodes the value of `c` alone. Parts of the document
+after the last key read are neither decoded nor validated.
+"""
+import contextlib
+import contextvars
+import json
+import re
+from collections.abc import Mapping
+from json.decoder import scanstring
+
+from .accessors import get_path as get_value_path
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+_MISSING = object()
+
+# 单次计算内 json loads 的结果缓存，None 表示未开启
+json_loads_memo = contextvars.ContextVar("bkflow_feel_json_loads_memo", default=None)
+
+
+@contextlib.contextmanager
+def json_loads_scope():
+    """
+    Memoize json loads of the same string until the block exits
+    """
+    token = json_loads_memo.set({})
+    try:
+        yield
+    finally:
+        json_loads_memo.reset(token)
+
+
+def memoized_json_loads(value):
+    memo = json_loads_memo.get()
+    if memo is None or not isinstance(value, (str, bytes)):
+        return json.loads(value)
+    result = memo.get(value, _MISSING)
+    if result is _MISSING:
+        result = memo[value] = json.loads(value)
+    return result
+
+
+def _skip_whitespace(text, pos):
+    return _WHITESPACE.match(text, pos).end()
+
+
+class LazyJSON(Mapping):
+    """
+    Read only mapping over a JSON object document, values are decoded when first accessed
+
+    data can be str, bytes, bytearray or memoryview, bytes are decoded as UTF-8 once. Keys are indexed from the
+    start of the object only as far as needed, so values after the last accessed key are never touched. Unlike
+    json.loads, the first occurrence of a duplicated key wins.
+    """
+
+    def __init__(self, data, start=None):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("utf-8")
+        self.text = data
+        self.start = _skip_whitespace(data, 0) if start is None else start
+        if data[self.start : self.start + 1] != "{":
+            raise ValueError("LazyJSON requires a JSON object document")
+        # key -> 值的起始位置，已解码的值同时记录结束位置
+        self._spans = {}
+        self._ends = {}
+        self._values = {}
+        self._children = {}
+        # 索引游标，_pending 为游标处尚未跳过的值对应的 key
+        self._cursor = _skip_whitespace(data, self.start + 1)
+        self._pending = None
+        self._complete = data[self._cursor : self._cursor + 1] == "}"
+
+    def _index_next(self):
+        text, pos = self.text, self._cursor
+        if self._pending is not None:
+            key, self._pending = self._pending, None
+            if self._spans[key] == pos and key in self._ends:
+                pos = self._ends[key]
+            else:
+                # 跳过值时使用 C 实现的解码器，解码结果顺便缓存
+                value, pos = _decoder.raw_decode(text, pos)
+                self._values.setdefault(key, value)
+            pos = _skip_whitespace(text, pos)
+            char = text[pos : pos + 1]
+            if char == "}":
+                self._complete = True
+                return None
+            if char != ",":
+                raise ValueError(f"Expecting ',' or '}}' at char {pos}")
+            pos = _skip_whitespace(text, pos + 1)
+        if text[pos : pos + 1] != '"':
+            raise ValueError(f"Expecting property name at char {pos}")
+        key, pos = scanstring(text, pos + 1)
+        pos = _skip_whitespace(text, pos)
+        if text[pos : pos + 1] != ":":
+            raise ValueError(f"Expecting ':' at char {pos}")
+        self._cursor = _skip_whitespace(text, pos + 1)
+        self._pending = key
+        self._spans.setdefault(key, self._cursor)
+        return key
+
+    def _find(self, key):
+        """
+        Start position of the value of key, None if the object has no such key
+        """
+        start = self._spans.get(key)
+        while start is None and not self._complete:
+            if self._index_next() == key:
+                start = self._spans[key]
+        return start
+
+    def _index_all(self):
+        while not self._complete:
+            self._index_next()
+        return self._spans
+
+    def __getitem__(self, key):
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            start = self._find(key)
+            if start is None:
+                raise KeyError(key)
+            value, self._ends[key] = _decoder.raw_decode(self.text, start)
+            self._values[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._index_all())
+
+    def __len__(self):
+        return len(self._index_all())
+
+    def __bool__(self):
+        # 避免 `context or {}` 触发完整索引
+        return bool(self._spans) or not self._complete
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def get_path(self, name, keys):
+        """
+        Same as reading `name.key1.key2` from a decoded context, only the last value is decoded
+        """
+        node, path = self, (name, *keys)
+        for index, key in enumerate(path[:-1]):
+            if key in node._values:
+                # 已解码的值按普通字典继续查找
+                result = node._values[key]
+                for rest in path[index + 1 :]:
+                    if not isinstance(result, dict):
+                        return None
+                    result = result.get(rest)
+                return result
+            start = node._find(key)
+            if start is None or node.text[start] != "{":
+                return None
+            child = node._children.get(key)
+            if child is None:
+                child = node._children[key] = LazyJSON(node.text, start)
+            node = child
+        return node.get(path[-1])
+
+    def scope(self):
+        """
+        Overlay context for the variables of some / every, the document itself stays lazy
+        """
+        return LazyScope(self)
+
+    def decoded_items(self):
+        """
+        Keys decoded so far with their values, partially read objects are returned as LazyJSON
+        """
+        items = dict(self._children)
+        items.update(self._values)
+        return items
+
+    def decode(self):
+        """
+        Fully decoded object
+        """
+        return _decoder.raw_decode(self.text, self.start)[0]
+
+
+class LazyScope:
+    """
+    Evaluation context over a LazyJSON, names bound while evaluating shadow those of the document
+    """
+
+    __slots__ = ("document", "bindings")
+
+    def __init__(self, document, bindings=None):
+        self.document = document
+        self.bindings = bindings if bindings is not None else {}
+
+    def get(self, name, default=None):
+        if name in self.bindings:
+            return self.bindings[name]
+        return self.document.get(name, default)
+
+    def get_path(self, name, keys):
+        if name in self.bindings:
+            return get_value_path(self.bindings[name], keys)
+        return self.document.get_path(name, keys)
+
+    def __setitem__(self, name, value):
+        self.bindings[name] = value
+
+    def scope(self):
+        return LazyScope(self.document, dict(self.bindings))
+
+    def __bool__(self):
+        return True
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Parsers for the fixed date / time literal formats of the grammar and process-wide timezone caches
+"""
+import datetime
+import functools
+import re
+
+import pytz
+
+DATE_PATTERN = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+TIME_PATTERN = re.compile(r"(\d{2}):(\d{2}):(\d{2})")
+OFFSET_PATTERN = re.compile(r"([+-])(\d{2}):(\d{2})")
+TIMEZONE_CACHE_SIZE = 512
+
+
+def parse_date(value):
+    """
+    `YYYY-MM-DD` to datetime.date
+    """
+    match = DATE_PATTERN.fullmatch(value)
+    if match is None:
+        raise ValueError(f"Invalid date literal: {value}")
+    year, month, day = match.groups()
+    return datetime.date(int(year), int(month), int(day))
+
+
+def parse_time(value):
+    """
+    `HH:MM:SS` to (hour, minute, second)
+    """
+    match = TIME_PATTERN.fullmatch(value)
+    if match is None:
+        raise ValueError(f"Invalid time literal: {value}")
+    hour, minute, second = match.groups()
+    return int(hour), int(minute), int(second)
+
+
+@functools.lru_cache(maxsize=TIMEZONE_CACHE_SIZE)
+def get_timezone(name):
+    return pytz.timezone(name)
+
+
+@functools.lru_cache(maxsize=TIMEZONE_CACHE_SIZE)
+def get_offset_timezone(value):
+    """
+    `+HH:MM` / `-HH:MM` to a fixed offset timezone
+    """
+    match = OFFSET_PATTERN.fullmatch(value)
+    if match is None:
+        raise ValueError(f"Invalid timezone offset: {value}")
+    sign, hours, minutes = match.groups()
+    offset = int(hours) * 60 + int(minutes)
+    return pytz.FixedOffset(-offset if sign == "-" else offset)
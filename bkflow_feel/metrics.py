@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+import bisect
+import math
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+class MetricsSink:
+    """
+    Receiver of metric events, subclasses decide how to aggregate or ship them
+    """
+
+    def increment(self, name, value=1, labels=None):
+        pass
+
+    def observe(self, name, value, labels=None):
+        """
+        Record a duration in seconds
+        """
+        pass
+
+    def gauge(self, name, value, labels=None):
+        pass
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        result, total = [], 0
+        for upper_bound, count in zip(self.buckets + (math.inf,), self.counts):
+            total += count
+            result.append((upper_bound, total))
+        return result
+
+    def quantile(self, q):
+        """
+        Estimated quantile, returns the upper bound of the bucket containing it
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for upper_bound, total in self.cumulative_counts():
+            if total >= rank:
+                return upper_bound
+        return math.inf
+
+
+class InProcessCollector(MetricsSink):
+    """
+    Aggregate counters, gauges and latency histograms in memory
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, labels=None):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def gauge(self, name, value, labels=None):
+        with self._lock:
+            self.gauges[(name, _labels_key(labels))] = value
+
+    def get_counter(self, name, **labels):
+        return self.counters.get((name, _labels_key(labels)), 0)
+
+    def get_gauge(self, name, **labels):
+        return self.gauges.get((name, _labels_key(labels)))
+
+    def get_histogram(self, name, **labels):
+        return self.histograms.get((name, _labels_key(labels)))
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+
+def _format_prometheus_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for key, value in items
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == math.inf else repr(float(bound))
+
+
+def format_prometheus(collector: InProcessCollector, prefix="bkflow_feel_"):
+    """
+    Render collector in the Prometheus text exposition format
+    """
+    lines = []
+    with collector._lock:
+        counters = sorted(collector.counters.items())
+        gauges = sorted(collector.gauges.items())
+        histograms = sorted(collector.histograms.items(), key=lambda item: item[0])
+
+    typed = set()
+    for (name, labels), value in counters:
+        metric = f"{prefix}{name}"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_format_prometheus_labels(labels)} {value}")
+    for (name, labels), value in gauges:
+        metric = f"{prefix}{name}"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric}{_format_prometheus_labels(labels)} {value}")
+    for (name, labels), histogram in histograms:
+        metric = f"{prefix}{name}"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} histogram")
+        for upper_bound, total in histogram.cumulative_counts():
+            bucket_labels = _format_prometheus_labels(labels, [("le", _format_bound(upper_bound))])
+            lines.append(f"{metric}_bucket{bucket_labels} {total}")
+        lines.append(f"{metric}_sum{_format_prometheus_labels(labels)} {histogram.sum}")
+        lines.append(f"{metric}_count{_format_prometheus_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+class StatsDSink(MetricsSink):
+    """
+    Format metrics as StatsD lines (with DogStatsD style tags) and hand them to write
+
+    write can be any callable accepting a str, e.g. a UDP socket wrapper or list.append in tests.
+    """
+
+    def __init__(self, write, prefix="bkflow_feel.", with_tags=True):
+        self.write = write
+        self.prefix = prefix
+        self.with_tags = with_tags
+
+    def _format(self, name, value, metric_type, labels):
+        line = f"{self.prefix}{name}:{value}|{metric_type}"
+        if self.with_tags and labels:
+            line += "|#" + ",".join(f"{key}:{value}" for key, value in sorted(labels.items()))
+        return line
+
+    def increment(self, name, value=1, labels=None):
+        self.write(self._format(name, value, "c", labels))
+
+    def observe(self, name, value, labels=None):
+        self.write(self._format(name, round(value * 1000, 6), "ms", labels))
+
+    def gauge(self, name, value, labels=None):
+        self.write(self._format(name, value, "g", labels))
+
+
+class MetricsRegistry:
+    """
+    Dispatch metric events to registered sinks, disabled until a sink is added
+    """
+
+    def __init__(self):
+        self.sinks = []
+        self.enabled = False
+        self._caches = {}
+
+    def add_sink(self, sink: MetricsSink):
+        self.sinks = self.sinks + [sink]
+        self.enabled = True
+        return sink
+
+    def remove_sink(self, sink: MetricsSink):
+        self.sinks = [item for item in self.sinks if item is not sink]
+        self.enabled = bool(self.sinks)
+
+    def clear_sinks(self):
+        self.sinks = []
+        self.enabled = False
+
+    def increment(self, name, value=1, labels=None):
+        for sink in self.sinks:
+            sink.increment(name, value, labels)
+
+    def observe(self, name, value, labels=None):
+        for sink in self.sinks:
+            sink.observe(name, value, labels)
+
+    def gauge(self, name, value, labels=None):
+        for sink in self.sinks:
+            sink.gauge(name, value, labels)
+
+    def timer(self, name, labels=None):
+        return _Timer(self, name, labels)
+
+    def register_cache(self, name, cache):
+        """
+        Register an object with a stats() method, its counters are reported by collect_caches
+        """
+        self._caches[name] = cache
+
+    def unregister_cache(self, name):
+        self._caches.pop(name, None)
+
+    def collect_caches(self):
+        """
+        Push current cache statistics as gauges to all sinks
+        """
+        for name, cache in list(self._caches.items()):
+            stats = cache.stats()
+            labels = {"cache": name}
+            self.gauge("cache_hits", stats.hits, labels)
+            self.gauge("cache_misses", stats.misses, labels)
+            self.gauge("cache_evictions", stats.evictions, labels)
+            self.gauge("cache_size", stats.size, labels)
+            self.gauge("cache_hit_ratio", round(stats.hit_ratio, 6), labels)
+
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start, self.labels)
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Reorder and / or operands so that cheap and selective operands are evaluated first
+
+Only operands which are side-effect free and always evaluate to a bool are moved, an operand which is not stays
+at its position and operands are never moved across it. If evaluating in the new order raises, evaluation
+continues in the original order without evaluating any operand twice, so guards like `a != null and a > 1` keep
+working. An expression raising in the original order can still give a value once reordered, e.g.
+`matches(s, "x") and a = 1` with a number s and a = 2, which is why optimizing is opt-in.
+"""
+import threading
+
+from . import parsers
+from .analysis import is_boolean_node
+from .exceptions import BudgetExceededError
+from .visitors import iter_child_nodes, walk
+
+DEFAULT_COST = 2
+# 节点自身的相对计算开销，不含子节点
+NODE_COSTS = {
+    "Number": 0,
+    "String": 0,
+    "Boolean": 0,
+    "Null": 0,
+    "Constant": 0,
+    "Expr": 0,
+    "Variable": 1,
+    "ContextItem": 2,
+    "Not": 1,
+    "NotEqual": 2,
+    "SameTypeBinaryOperator": 3,
+    "Between": 4,
+    "In": 5,
+    "RangeGroup": 5,
+    "IsDefinedFunc": 1,
+    "GetOrElseFunc": 1,
+    "ToString": 3,
+    "Date": 20,
+    "Time": 20,
+    "DateAndTime": 20,
+    "JsonLoadsFunc": 20,
+    "ListOperator": 5,
+    "ListFilter": 10,
+    "ListEvery": 10,
+    "ListSome": 10,
+    "FuncInvocation": 50,
+    "FunctionCall": 50,
+}
+STRING_OPERATION_COSTS = {"contains": 3, "starts_with": 3, "ends_with": 3, "matches": 30}
+# 列表过滤、some / every 中的条件会对每个元素计算一次，按假定的列表长度放大开销
+ITERATION_FACTOR = 10
+ADAPT_INTERVAL = 1000
+
+
+class NodeInfo:
+    __slots__ = ("cost", "pure", "boolean")
+
+    def __init__(self, cost, pure, boolean):
+        self.cost = cost
+        self.pure = pure
+        self.boolean = boolean
+
+    @property
+    def reorderable(self):
+        return self.pure and self.boolean
+
+
+def _node_cost(node, child_costs):
+    if isinstance(node, parsers.StringOperator):
+        cost = STRING_OPERATION_COSTS.get(node.operation, DEFAULT_COST)
+    else:
+        cost = NODE_COSTS.get(type(node).__name__, DEFAULT_COST)
+    return cost + sum(child_costs)
+
+
+def is_pure_node(node):
+    if isinstance(node, parsers.FuncInvocation):
+        return node.functions.is_pure(node.func_name)
+    # FunctionCall 调用的是上下文中的任意可调用对象
+    return not isinstance(node, parsers.FunctionCall)
+
+
+def analyze(node, info):
+    """
+    Compute NodeInfo of node, info must contain the NodeInfo of its children keyed by id
+    """
+    children_info = [info[id(child)] for child in iter_child_nodes(node)]
+    if isinstance(node, (parsers.ListFilter, parsers.ListMatch)):
+        # 条件表达式为最后一个子节点
+        child_costs = [child.cost for child in children_info[:-1]] + [children_info[-1].cost * ITERATION_FACTOR]
+    else:
+        child_costs = [child.cost for child in children_info]
+    return NodeInfo(
+        cost=_node_cost(node, child_costs),
+        pure=is_pure_node(node) and all(child.pure for child in children_info),
+        boolean=is_boolean_node(node, [child.boolean for child in children_info]),
+    )
+
+
+def _segments(operands_info):
+    """
+    Split operand indexes into runs, indexes of a reorderable run can be permuted freely
+    """
+    segments, run = [], []
+    for index, info in enumerate(operands_info):
+        if info.reorderable:
+            run.append(index)
+            continue
+        if run:
+            segments.append((True, run))
+            run = []
+        segments.append((False, [index]))
+    if run:
+        segments.append((True, run))
+    return segments
+
+
+def _order(segments, rank):
+    order = []
+    for reorderable, indexes in segments:
+        order.extend(sorted(indexes, key=rank) if reorderable else indexes)
+    return tuple(order)
+
+
+class _ReorderedMixin:
+    """
+    operands keep the original order, order is the evaluation order as operand indexes
+    """
+
+    def __init__(self, operands, order):
+        self.operands = list(operands)
+        self.setup(order)
+
+    def setup(self, order):
+        self.order = tuple(order)
+
+    def evaluate(self, context):
+        # 按下标遍历，不创建迭代器对象
+        operands, order = self.operands, self.order
+        last = len(order) - 1
+        position = 0
+        try:
+            while position < last:
+                result = operands[order[position]].evaluate(context)
+                if bool(result) is self.short_circuit_on:
+                    return result
+                position += 1
+            return operands[order[last]].evaluate(context)
+        except BudgetExceededError:
+            raise
+        except Exception as e:
+            return self.evaluate_after_error(context, order, position, e)
+
+    def iter_evaluate(self, context):
+        operands, order = self.operands, self.order
+        position = 0
+        try:
+            for position, index in enumerate(order):
+                result = yield operands[index]
+                if bool(result) is self.short_circuit_on:
+                    return result
+            return result
+        except BudgetExceededError:
+            raise
+        except Exception as e:
+            for index in self.pending_operands(order, position):
+                result = yield operands[index]
+                if bool(result) is self.short_circuit_on:
+                    return result
+            raise e
+
+    @staticmethod
+    def pending_operands(order, position):
+        """
+        Indexes of the operands the written order evaluates before operand order[position], skipping those
+        already evaluated
+        """
+        # 已计算的操作数没有短路且无副作用，不必重新计算；不可调整的操作数不会被越过，出错前的计算与原始顺序一致
+        evaluated = set(order[:position])
+        return [index for index in range(order[position]) if index not in evaluated]
+
+    def evaluate_after_error(self, context, order, position, error):
+        """
+        Finish in the written order after operand order[position] raised error, so the outcome is the one of the
+        unoptimized expression: an operand written before the failing one short-circuits, or error is raised
+        """
+        operands = self.operands
+        for index in self.pending_operands(order, position):
+            result = operands[index].evaluate(context)
+            if bool(result) is self.short_circuit_on:
+                return result
+        raise error
+
+
+class ReorderedAnd(_ReorderedMixin, parsers.And):
+    short_circuit_on = False
+
+
+class ReorderedOr(_ReorderedMixin, parsers.Or):
+    short_circuit_on = True
+
+
+class _AdaptiveMixin(_ReorderedMixin):
+    """
+    Learn how often each operand short-circuits and periodically reorder by cost / short-circuit probability
+    """
+
+    adapt_interval = ADAPT_INTERVAL
+
+    def __init__(self, operands, order, costs, segments):
+        self.operands = list(operands)
+        self.setup(order, costs, segments)
+
+    def setup(self, order, costs, segments):
+        self.order = tuple(order)
+        self.costs = list(costs)
+        self.segments = segments
+        self.evaluations = [0] * len(self.operands)
+        self.short_circuits = [0] * len(self.operands)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_lock", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def evaluate(self, context):
+        self.calls += 1
+        if self.calls % self.adapt_interval == 0:
+            self.adapt()
+        # 统计数据允许存在并发误差，仅用于估算
+        operands, order, evaluations = self.operands, self.order, self.evaluations
+        position = 0
+        try:
+            for position, index in enumerate(order):
+                result = operands[index].evaluate(context)
+                evaluations[index] += 1
+                if bool(result) is self.short_circuit_on:
+                    self.short_circuits[index] += 1
+                    return result
+            return result
+        except BudgetExceededError:
+            raise
+        except Exception as e:
+            return self.evaluate_after_error(context, order, position, e)
+
+    def selectivity(self, index):
+        # 拉普拉斯平滑，未计算过的操作数视为 50%
+        return (self.short_circuits[index] + 1) / (self.evaluations[index] + 2)
+
+    def adapt(self):
+        with self._lock:
+            self.order = _order(self.segments, lambda index: self.costs[index] / self.selectivity(index))
+
+
+class AdaptiveAnd(_AdaptiveMixin, parsers.And):
+    short_circuit_on = False
+
+
+class AdaptiveOr(_AdaptiveMixin, parsers.Or):
+    short_circuit_on = True
+
+
+REORDERED_CLASSES = {parsers.And: ReorderedAnd, parsers.Or: ReorderedOr}
+ADAPTIVE_CLASSES = {parsers.And: AdaptiveAnd, parsers.Or: AdaptiveOr}
+
+
+def optimize(ast, adaptive=False):
+    """
+    Let and / or nodes of the tree evaluate their operands cheapest first, the tree is modified in place
+
+    Reordered nodes switch their class to ReorderedAnd / ReorderedOr (AdaptiveAnd / AdaptiveOr with adaptive),
+    which also learn the runtime short-circuit rate of their operands.
+    """
+    nodes = list(walk(ast))
+    if not any(type(node) in REORDERED_CLASSES and len(node.operands) > 1 for node in nodes):
+        return ast
+
+    info = {}
+    # 先序遍历的逆序保证子节点总是先于父节点被分析
+    for node in reversed(nodes):
+        if type(node) in REORDERED_CLASSES and len(node.operands) > 1:
+            _reorder(node, [info[id(operand)] for operand in node.operands], adaptive)
+        info[id(node)] = analyze(node, info)
+    return ast
+
+
+def _reorder(node, operands_info, adaptive):
+    segments = _segments(operands_info)
+    if not any(reorderable and len(indexes) > 1 for reorderable, indexes in segments):
+        return
+    costs = [operand_info.cost for operand_info in operands_info]
+    order = _order(segments, lambda index: costs[index])
+    if adaptive:
+        node.__class__ = ADAPTIVE_CLASSES[type(node)]
+        node.setup(order, costs, segments)
+    elif order != tuple(range(len(node.operands))):
+        node.__class__ = REORDERED_CLASSES[type(node)]
+        node.setup(order)
@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 import abc
 import datetime
-import json
 import logging
-import re
-
-import pytz
-from dateutil.parser import parse as date_parse
+import time
 
+from .accessors import as_scope, get_key
 from .data_models import RangeGroupData, RangeGroupOperator
+from .exceptions import BudgetExceededError, ValidationError
+from .governor import active_tracker
+from .lazyjson import memoized_json_loads
+from .literals import get_offset_timezone, get_timezone, parse_date, parse_time
+from .metrics import metrics
+from .patterns import pattern_cache as default_pattern_cache
+from .results import error_log
 from .utils import FEELFunctionsManager
 from .validators import BinaryOperationValidator, DummyValidator, ListsLengthValidator
 
@@ -17,6 +21,8 @@ logger = logging.getLogger(__name__)
 
 class Expression(metaclass=abc.ABCMeta):
     validator_cls = DummyValidator
+    # 插桩后的节点是同名子类，以类属性区分区间节点；isinstance 判断 ABCMeta 类较慢
+    is_range = False
 
     @abc.abstractmethod
     def evaluate(self, context):
@@ -35,6 +41,9 @@ class Expr(CommonExpression):
     def evaluate(self, context):
         return self.value.evaluate(context)
 
+    def iter_evaluate(self, context):
+        return (yield self.value)
+
 
 class Number(CommonExpression):
     pass
@@ -53,6 +62,30 @@ class Null(Expression):
         return None
 
 
+def _copy_containers(value):
+    if isinstance(value, list):
+        return [_copy_containers(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy_containers(item) for key, item in value.items()}
+    return value
+
+
+class Constant(CommonExpression):
+    """
+    Value known before evaluation, e.g. a variable or sub expression folded by specialization
+
+    List and dict values are copied on every evaluation, so a caller mutating a result does not change the value
+    shared by every evaluation of the expression.
+    """
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.mutable = isinstance(value, (list, dict))
+
+    def evaluate(self, context):
+        return _copy_containers(self.value) if self.mutable else self.value
+
+
 class List(Expression):
     def __init__(self, *items):
         self.items = items
@@ -60,6 +93,12 @@ class List(Expression):
     def evaluate(self, context):
         return [item.evaluate(context) for item in self.items]
 
+    def iter_evaluate(self, context):
+        result = []
+        for item in self.items:
+            result.append((yield item))
+        return result
+
 
 class ListItem(Expression):
     def __init__(self, list_expr, index):
@@ -86,12 +125,25 @@ class ListMatch(Expression):
         self.validator_cls()(lists=[pair[1] for pair in iter_pairs])
         return iter_pairs
 
+    @staticmethod
+    def new_scope(context):
+        # ObjectContext、LazyJSON 等上下文通过覆盖层绑定变量，避免读取全部字段
+        scope = getattr(context, "scope", None)
+        return scope() if scope is not None else dict(context)
+
+    @staticmethod
+    def bind_items(tmp_context, iter_pairs, index):
+        # 复用同一个上下文字典，每个元素只更新迭代变量
+        for name, items in iter_pairs:
+            tmp_context[name] = items[index]
+
 
 class ListEvery(ListMatch):
     def evaluate(self, context):
         iter_pairs = self.evaluate_and_validate_iter_pairs(context)
+        tmp_context = self.new_scope(context)
         for i in range(0, len(iter_pairs[0][1])):
-            tmp_context = {**context, **{pair[0]: pair[1][i] for pair in iter_pairs}}
+            self.bind_items(tmp_context, iter_pairs, i)
             if self.expr.evaluate(tmp_context) is False:
                 return False
         return True
@@ -100,8 +152,9 @@ class ListEvery(ListMatch):
 class ListSome(ListMatch):
     def evaluate(self, context):
         iter_pairs = self.evaluate_and_validate_iter_pairs(context)
+        tmp_context = self.new_scope(context)
         for i in range(0, len(iter_pairs[0][1])):
-            tmp_context = {**context, **{pair[0]: pair[1][i] for pair in iter_pairs}}
+            self.bind_items(tmp_context, iter_pairs, i)
             if self.expr.evaluate(tmp_context) is True:
                 return True
         return False
@@ -120,11 +173,12 @@ class ListFilter(Expression):
         for item in items:
             try:
                 # 当 item 为 dict 且 filter 中对比的 key 缺失时，可能报错
-                if self.filter_expr.evaluate(item if isinstance(item, dict) else {"item": item}):
+                if self.filter_expr.evaluate(as_scope(item)):
                     result.append(item)
+            except BudgetExceededError:
+                raise
             except Exception as e:
-                logger.exception(e)
-                pass
+                error_log.error((id(self), type(e)), "%s", e, exc_info=e, target_logger=logger)
         return result
 
 
@@ -151,11 +205,18 @@ class ContextItem(Expression):
         self.keys = keys
 
     def evaluate(self, context):
+        if type(context) is not dict and isinstance(self.expr, Variable):
+            # LazyJSON 等上下文只解码访问路径上的值
+            get_path = getattr(context, "get_path", None)
+            if get_path is not None:
+                return get_path(self.expr.name, self.keys)
         result = self.expr.evaluate(context)
         for key in self.keys:
-            if not isinstance(result, dict):
-                return None
-            result = result.get(key)
+            if isinstance(result, dict):
+                result = result.get(key)
+            else:
+                # dataclass、pydantic 模型等对象通过按类型缓存的 accessor 读取
+                result = get_key(result, key)
         return result
 
 
@@ -187,16 +248,27 @@ class BinaryOperator(Expression):
 
 class SameTypeBinaryOperator(BinaryOperator):
     validator_cls = BinaryOperationValidator
+    # 类型推导证明两侧类型满足校验时置为 False，跳过运行时校验
+    checked = True
 
     def __init__(self, operation, left, right):
         super().__init__(left, right)
         self.operation = operation
 
     def evaluate(self, context):
-        left_val = self.left.evaluate(context)
-        right_val = self.right.evaluate(context)
-        self.validator_cls()(left_val, right_val)
-        return getattr(self, self.operation)(left_val, right_val)
+        return self.operate(self.left.evaluate(context), self.right.evaluate(context))
+
+    def iter_evaluate(self, context):
+        left_val = yield self.left
+        right_val = yield self.right
+        return self.operate(left_val, right_val)
+
+    def operate(self, left_val, right_val):
+        # 两侧类型相同时必然通过校验，不必创建校验器
+        if self.checked and type(left_val) is not type(right_val):
+            self.validator_cls()(left_val, right_val)
+        # 从类上取函数，避免每次计算创建绑定方法
+        return getattr(type(self), self.operation)(self, left_val, right_val)
 
     def add(self, left_val, right_val):
         return left_val + right_val
@@ -211,7 +283,14 @@ class SameTypeBinaryOperator(BinaryOperator):
         return left_val / right_val
 
     def power(self, left_val, right_val):
-        return left_val**right_val
+        tracker = active_tracker()
+        if tracker is not None:
+            tracker.check_power(left_val, right_val)
+        result = left_val**right_val
+        if type(result) is complex:
+            # 负数的非整数次幂结果为复数，不属于 FEEL 的数值类型
+            raise ValidationError(f"Power of negative base {left_val} with fractional exponent {right_val}")
+        return result
 
     def equal(self, left_val, right_val):
         return left_val == right_val
@@ -233,34 +312,73 @@ class NotEqual(BinaryOperator):
     def evaluate(self, context):
         return self.left.evaluate(context) != self.right.evaluate(context)
 
+    def iter_evaluate(self, context):
+        left_val = yield self.left
+        right_val = yield self.right
+        return left_val != right_val
 
-class And(BinaryOperator):
+
+class BooleanOperator(Expression):
+    """
+    N-ary and / or, operands are evaluated from left to right and short-circuit like Python's and / or
+    """
+
+    def __init__(self, *operands):
+        self.operands = list(operands)
+
+
+class And(BooleanOperator):
     def evaluate(self, context):
-        return self.left.evaluate(context) and self.right.evaluate(context)
+        # 按下标遍历，不创建迭代器对象
+        operands = self.operands
+        last = len(operands) - 1
+        index = 0
+        while index < last:
+            result = operands[index].evaluate(context)
+            if not result:
+                return result
+            index += 1
+        return operands[last].evaluate(context)
+
+    def iter_evaluate(self, context):
+        for operand in self.operands:
+            result = yield operand
+            if not result:
+                return result
+        return result
 
 
-class Or(BinaryOperator):
+class Or(BooleanOperator):
     def evaluate(self, context):
-        return self.left.evaluate(context) or self.right.evaluate(context)
+        operands = self.operands
+        last = len(operands) - 1
+        index = 0
+        while index < last:
+            result = operands[index].evaluate(context)
+            if result:
+                return result
+            index += 1
+        return operands[last].evaluate(context)
+
+    def iter_evaluate(self, context):
+        for operand in self.operands:
+            result = yield operand
+            if result:
+                return result
+        return result
 
 
 class In(BinaryOperator):
     def evaluate(self, context):
         left_val = self.left.evaluate(context)
-        right_val = self.right.evaluate(context)
-        if isinstance(self.right, RangeGroup):
-            left_operation = (
-                left_val > right_val.left_val
-                if right_val.left_operator == RangeGroupOperator.GT
-                else left_val >= right_val.left_val
-            )
-            right_operation = (
-                left_val < right_val.right_val
-                if right_val.right_operator == RangeGroupOperator.LT
-                else left_val <= right_val.right_val
-            )
+        if self.right.is_range:
+            # 直接计算区间端点，不构建 RangeGroupData
+            range_group = self.right
+            low, high = range_group.left.evaluate(context), range_group.right.evaluate(context)
+            left_operation = left_val > low if range_group.left_open else left_val >= low
+            right_operation = left_val < high if range_group.right_open else left_val <= high
             return left_operation and right_operation
-        return left_val in right_val
+        return left_val in self.right.evaluate(context)
 
 
 class Between(Expression):
@@ -273,13 +391,23 @@ class Between(Expression):
         value = self.value.evaluate(context)
         return self.min.evaluate(context) <= value <= self.max.evaluate(context)
 
+    def iter_evaluate(self, context):
+        value = yield self.value
+        min_value = yield self.min
+        return min_value <= value <= (yield self.max)
+
 
 class RangeGroup(BinaryOperator):
+    is_range = True
+
     def __init__(self, left, right, left_operator, right_operator):
         self.left = left
         self.right = right
         self.left_operator = left_operator
         self.right_operator = right_operator
+        # 开区间标记预先计算，访问枚举成员会创建临时对象
+        self.left_open = left_operator == RangeGroupOperator.GT
+        self.right_open = right_operator == RangeGroupOperator.LT
 
     def evaluate(self, context):
         left_val = self.left.evaluate(context)
@@ -292,63 +420,61 @@ class RangeGroup(BinaryOperator):
         }
         return RangeGroupData(**data)
 
+    def bounds(self, context):
+        return self.left.evaluate(context), self.right.evaluate(context)
+
 
 class BeforeFunc(BinaryOperator):
     def evaluate(self, context):
-        left_val = self.left.evaluate(context)
-        right_val = self.right.evaluate(context)
-        operator = None
-        if isinstance(self.left, RangeGroup):
-            if left_val.right_operator == RangeGroupOperator.LT:
-                operator = RangeGroupOperator.GTE
-            left_val = left_val.right_val
-        if isinstance(self.right, RangeGroup):
-            if right_val.left_operator == RangeGroupOperator.GT:
-                operator = RangeGroupOperator.GTE
-            right_val = right_val.left_val
-
-        if operator == RangeGroupOperator.GTE:
-            return left_val <= right_val
-
-        return left_val < right_val
+        # 区间只取需要的端点，不构建 RangeGroupData
+        inclusive = False
+        if self.left.is_range:
+            left_val = self.left.bounds(context)[1]
+            inclusive = self.left.right_open
+        else:
+            left_val = self.left.evaluate(context)
+        if self.right.is_range:
+            right_val = self.right.bounds(context)[0]
+            inclusive = inclusive or self.right.left_open
+        else:
+            right_val = self.right.evaluate(context)
+        return left_val <= right_val if inclusive else left_val < right_val
 
 
 class AfterFunc(BinaryOperator):
     def evaluate(self, context):
-        left_val = self.left.evaluate(context)
-        right_val = self.right.evaluate(context)
-        operator = None
-        if isinstance(self.left, RangeGroup):
-            if left_val.left_operator == RangeGroupOperator.GT:
-                operator = RangeGroupOperator.GTE
-            left_val = left_val.left_val
-        if isinstance(self.right, RangeGroup):
-            if right_val.right_operator == RangeGroupOperator.LT:
-                operator = RangeGroupOperator.GTE
-            right_val = right_val.right_val
-        if operator == RangeGroupOperator.GTE:
-            return left_val >= right_val
-        return left_val > right_val
+        inclusive = False
+        if self.left.is_range:
+            left_val = self.left.bounds(context)[0]
+            inclusive = self.left.left_open
+        else:
+            left_val = self.left.evaluate(context)
+        if self.right.is_range:
+            right_val = self.right.bounds(context)[1]
+            inclusive = inclusive or self.right.right_open
+        else:
+            right_val = self.right.evaluate(context)
+        return left_val >= right_val if inclusive else left_val > right_val
 
 
 class IncludesFunc(BinaryOperator):
     def evaluate(self, context):
-        left_val: RangeGroupData = self.left.evaluate(context)
-        right_val = self.right.evaluate(context)
-        if isinstance(self.right, RangeGroup):
-            left_operation = left_val.left_val <= right_val.left_val
-            if left_val.left_operator == RangeGroupOperator.GT and right_val.left_operator == RangeGroupOperator.GTE:
-                left_operation = left_val.left_val < right_val.left_val
-            right_operation = left_val.right_val >= right_val.right_val
-            if left_val.right_operator == RangeGroupOperator.LT and right_val.right_operator == RangeGroupOperator.LTE:
-                right_operation = left_val.right_val > right_val.right_val
+        if self.left.is_range:
+            low, high = self.left.bounds(context)
+            low_open, high_open = self.left.left_open, self.left.right_open
+        else:
+            left_val: RangeGroupData = self.left.evaluate(context)
+            low, high = left_val.left_val, left_val.right_val
+            low_open = left_val.left_operator == RangeGroupOperator.GT
+            high_open = left_val.right_operator == RangeGroupOperator.LT
+        if self.right.is_range:
+            other_low, other_high = self.right.bounds(context)
+            left_operation = low < other_low if low_open and not self.right.left_open else low <= other_low
+            right_operation = high > other_high if high_open and not self.right.right_open else high >= other_high
         else:
-            left_operation = left_val.left_val <= right_val
-            if left_val.left_operator == RangeGroupOperator.GT:
-                left_operation = left_val.left_val < right_val
-            right_operation = left_val.right_val >= right_val
-            if left_val.right_operator == RangeGroupOperator.LT:
-                right_operation = left_val.right_val > right_val
+            right_val = self.right.evaluate(context)
+            left_operation = low < right_val if low_open else low <= right_val
+            right_operation = high > right_val if high_open else high >= right_val
         return left_operation and right_operation
 
 
@@ -367,7 +493,7 @@ class IsDefinedFunc(CommonExpression):
 class JsonLoadsFunc(CommonExpression):
     def evaluate(self, context):
         value = self.value.evaluate(context)
-        return json.loads(value)
+        return memoized_json_loads(value)
 
 
 class Not(Expression):
@@ -377,11 +503,18 @@ class Not(Expression):
     def evaluate(self, context):
         return not self.value.evaluate(context)
 
+    def iter_evaluate(self, context):
+        return not (yield self.value)
+
 
 class Date(CommonExpression):
+    # 字面量只在第一次计算时解析，非法日期仍在计算时报错
+    parsed = None
+
     def evaluate(self, context):
-        year, month, day = self.value.split("-")
-        return datetime.date(int(year), int(month), int(day))
+        if self.parsed is None:
+            self.parsed = parse_date(self.value)
+        return self.parsed
 
 
 class TZInfo(Expression):
@@ -391,35 +524,39 @@ class TZInfo(Expression):
 
     def evaluate(self, context):
         if self.method == "name":
-            return pytz.timezone(self.value)
+            return get_timezone(self.value)
         elif self.method == "offset":
-            hours, minutes = map(int, self.value.split(":"))
-            sign = -1 if hours < 0 else 1
-            hours = abs(hours)
-            offset = hours * 60 + minutes
-            return pytz.FixedOffset(sign * offset)
+            return get_offset_timezone(self.value)
 
 
 class Time(Expression):
+    parsed = None
+
     def __init__(self, value, timezone: TZInfo = None):
         self.value = value
         self.timezone = timezone
 
     def evaluate(self, context):
-        parsed_dt = date_parse(self.value)
-        timezone = self.timezone.evaluate(context) if self.timezone is not None else None
-        return datetime.time(parsed_dt.hour, parsed_dt.minute, parsed_dt.second, tzinfo=timezone)
+        if self.parsed is None:
+            hour, minute, second = parse_time(self.value)
+            timezone = self.timezone.evaluate(context) if self.timezone is not None else None
+            self.parsed = datetime.time(hour, minute, second, tzinfo=timezone)
+        return self.parsed
 
 
 class DateAndTime(Expression):
+    parsed = None
+
     def __init__(self, date: Date, time: Time):
         self.date = date
         self.time = time
 
     def evaluate(self, context):
-        date = self.date.evaluate(context)
-        time = self.time.evaluate(context)
-        return datetime.datetime.combine(date, time, tzinfo=time.tzinfo)
+        if self.parsed is None:
+            date = self.date.evaluate(context)
+            time = self.time.evaluate(context)
+            self.parsed = datetime.datetime.combine(date, time, tzinfo=time.tzinfo)
+        return self.parsed
 
 
 class NowFunc(Expression):
@@ -477,16 +614,34 @@ class ToString(CommonExpression):
 
 class StringOperator(BinaryOperator):
     validator_cls = BinaryOperationValidator
+    # 动态正则使用的缓存，Engine 编译时替换为自身的缓存
+    pattern_cache = default_pattern_cache
+    checked = True
 
     def __init__(self, operation, left, right):
         super().__init__(left, right)
         self.operation = operation
+        # 字面量正则在绑定到引擎时编译，计入该引擎的缓存
+        self.pattern = None
+
+    def compile_literal_pattern(self, literal):
+        """
+        Compile the literal pattern of matches with the bound pattern cache
+        """
+        if self.operation != "matches":
+            return
+        try:
+            self.pattern = self.pattern_cache.compile(literal)
+        except Exception:
+            # 非法的正则延迟到计算时再抛出异常
+            self.pattern = None
 
     def evaluate(self, context):
         left_val = self.left.evaluate(context)
         right_val = self.right.evaluate(context)
-        self.validator_cls()(left_val, right_val, instance_type=str)
-        return getattr(self, self.operation)(left_val, right_val)
+        if self.checked and not (type(left_val) is str and type(right_val) is str):
+            self.validator_cls()(left_val, right_val, instance_type=str)
+        return getattr(type(self), self.operation)(self, left_val, right_val)
 
     def contains(self, left_str, right_str):
         return right_str in left_str
@@ -498,7 +653,8 @@ class StringOperator(BinaryOperator):
         return left_str.endswith(right_str)
 
     def matches(self, left_str, right_str):
-        return re.match(right_str, left_str) is not None
+        pattern = self.pattern if self.pattern is not None else self.pattern_cache.compile(right_str)
+        return pattern.match(left_str) is not None
 
 
 class ListOperator(Expression):
@@ -507,7 +663,7 @@ class ListOperator(Expression):
         self.expr = expr
 
     def evaluate(self, context):
-        return getattr(self, self.operation)(context)
+        return getattr(type(self), self.operation)(self, context)
 
     def list_contains(self, context):
         list_ = self.expr[0].evaluate(context)
@@ -528,6 +684,9 @@ class ListOperator(Expression):
 
 
 class FuncInvocation(Expression):
+    # 函数注册表，Engine 编译时替换为自身的注册表
+    functions = FEELFunctionsManager
+
     def __init__(self, func_name, args=None, named_args=None):
         self.func_name = func_name
         self.args = args or []
@@ -535,18 +694,31 @@ class FuncInvocation(Expression):
 
     def evaluate(self, context):
         try:
-            func = FEELFunctionsManager.get_func(self.func_name)
+            func = self.functions.get_func(self.func_name)
         except Exception as e:
-            logger.exception(e)
+            error_log.error((self.func_name, type(e)), "%s", e, exc_info=e, target_logger=logger)
             func = None
         if not func:
             return None
 
+        args, kwargs = (), {}
         if self.args:
-            params = [arg.evaluate(context) for arg in self.args]
-            return func(*params)
+            args = [arg.evaluate(context) for arg in self.args]
         elif self.named_args:
-            params = {key: arg.evaluate(context) for key, arg in self.named_args.items()}
-            return func(**params)
+            kwargs = {key: arg.evaluate(context) for key, arg in self.named_args.items()}
 
-        return func()
+        if not metrics.enabled:
+            return func(*args, **kwargs)
+        return self.call_with_metrics(func, args, kwargs)
+
+    def call_with_metrics(self, func, args, kwargs):
+        labels = {"function": self.func_name}
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            metrics.increment("function_errors_total", labels={**labels, "exception": type(e).__name__})
+            raise
+        finally:
+            metrics.increment("function_calls_total", labels=labels)
+            metrics.observe("function_call_seconds", time.perf_counter() - start, labels)
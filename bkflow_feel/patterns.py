@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import re
+
+from .caches import LRUCache
+from .metrics import metrics
+from .validators import RegexComplexityValidator
+
+
+class PatternCache:
+    """
+    Bounded cache of compiled regex patterns used by `matches()`
+
+    Python's own `re` cache only keeps a few hundred patterns, dynamic patterns coming from
+    context values can easily overflow it and force recompiles.
+    """
+
+    def __init__(self, maxsize=4096, complexity_validator=None):
+        self._cache = LRUCache(maxsize=maxsize)
+        self.complexity_validator = complexity_validator
+
+    def compile(self, pattern):
+        compiled = self._cache.get(pattern)
+        if compiled is None:
+            if self.complexity_validator is not None:
+                self.complexity_validator(pattern)
+            compiled = re.compile(pattern)
+            self._cache.set(pattern, compiled)
+        return compiled
+
+    def resize(self, maxsize):
+        self._cache.resize(maxsize)
+
+    def enable_complexity_guard(self, **kwargs):
+        self.complexity_validator = RegexComplexityValidator(**kwargs)
+        # 已缓存的正则未经过复杂度校验，需要清空
+        self._cache.clear()
+
+    def disable_complexity_guard(self):
+        self.complexity_validator = None
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+pattern_cache = PatternCache()
+metrics.register_cache("pattern", pattern_cache)
+
+
+def compile_pattern(pattern):
+    return pattern_cache.compile(pattern)
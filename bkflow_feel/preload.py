@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Compile a known rule set ahead of time, typically at deploy time in the master process of a prefork server
+
+With workers > 1 expressions are parsed and transformed in worker processes, the resulting trees are sent back
+pickled and finished (bound, type checked, optimized) in the calling process. With freeze, the compiled objects are
+moved out of GC tracking by gc.freeze, so collections in forked children neither scan them nor write to their pages.
+"""
+import gc
+import logging
+import multiprocessing
+import pickle
+import time
+
+from . import parser as default_parser
+from . import transformer as default_transformer
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64
+
+
+def _format_error(e):
+    return f"{type(e).__name__}: {e}"
+
+
+class PreloadReport:
+    """
+    Outcome of a preload: seconds spent compiling each expression and the errors of the failed ones
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.failures = {}
+        self.elapsed = 0.0
+        self.frozen = 0
+
+    @property
+    def compiled(self):
+        return len(self.timings)
+
+    def slowest(self, count=10):
+        return sorted(self.timings.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def summary(self):
+        return (
+            f"compiled: {self.compiled}, failed: {len(self.failures)}, elapsed: {self.elapsed:.3f}s, "
+            f"frozen objects: {self.frozen}"
+        )
+
+    def __repr__(self):
+        return f"PreloadReport({self.summary()})"
+
+
+def _transform_chunk(expressions):
+    # 工作进程只负责解析及转换，绑定、类型推导及优化在主进程完成
+    results = []
+    for expression in expressions:
+        start = time.perf_counter()
+        try:
+            ast = default_transformer.transform(default_parser.parse(expression))
+            results.append((expression, pickle.dumps(ast, pickle.HIGHEST_PROTOCOL), None, time.perf_counter() - start))
+        except Exception as e:
+            results.append((expression, None, _format_error(e), time.perf_counter() - start))
+    return results
+
+
+def _compile_in_workers(engine, expressions, report, workers, chunk_size, options):
+    chunks = [expressions[index : index + chunk_size] for index in range(0, len(expressions), chunk_size)]
+    with multiprocessing.Pool(workers) as pool:
+        for chunk in pool.imap(_transform_chunk, chunks):
+            for expression, tree, error, duration in chunk:
+                start = time.perf_counter()
+                if error is None:
+                    try:
+                        engine._compile_transformed(expression, pickle.loads(tree), **options)
+                    except Exception as e:
+                        error = _format_error(e)
+                if error is not None:
+                    report.failures[expression] = error
+                    continue
+                report.timings[expression] = duration + time.perf_counter() - start
+
+
+def preload_expressions(engine, expressions, workers=1, chunk_size=None, freeze=True, **options):
+    """
+    Compile every expression into the expression cache of engine, failures are reported instead of raised
+
+    - workers: number of processes parsing expressions, only used with the default parser and transformer
+    - freeze: run a full collection then gc.freeze, call preload right before forking workers
+    - options: optimize, adaptive, type_check, schema and canonical of Engine.compile
+
+    The expression cache should be large enough to hold the whole rule set, otherwise early expressions are evicted.
+    """
+    report = PreloadReport()
+    start = time.perf_counter()
+    expressions = list(dict.fromkeys(expressions))
+    if len(expressions) > engine.expression_cache.maxsize:
+        logger.warning(
+            "preloading %s expressions into an expression cache of %s entries",
+            len(expressions),
+            engine.expression_cache.maxsize,
+        )
+    if options.get("schema") is not None:
+        options["type_check"] = True
+    parallel = engine.parser is default_parser and engine.transformer is default_transformer
+    if workers > 1 and parallel and len(expressions) > 1:
+        chunk_size = chunk_size or max(1, min(CHUNK_SIZE, len(expressions) // workers))
+        _compile_in_workers(engine, expressions, report, workers, chunk_size, options)
+    else:
+        for expression in expressions:
+            compile_start = time.perf_counter()
+            try:
+                engine.compile(expression, **options)
+            except Exception as e:
+                report.failures[expression] = _format_error(e)
+            else:
+                report.timings[expression] = time.perf_counter() - compile_start
+    if freeze:
+        gc.collect()
+        gc.freeze()
+        report.frozen = gc.get_freeze_count()
+    report.elapsed = time.perf_counter() - start
+    return report
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import sys
+import time
+
+from .instrumentation import EvaluationHook
+
+DESCRIBE_ATTRS = ("operation", "func_name", "name", "method", "keys", "index")
+
+
+def describe_node(node, max_length=40):
+    """
+    Short human readable description of an AST node, e.g. Variable(a), FuncInvocation(hello world)
+    """
+    for attr in DESCRIBE_ATTRS:
+        value = getattr(node, attr, None)
+        if value is not None:
+            break
+    else:
+        value = node.__dict__.get("value")
+        if isinstance(value, str):
+            value = repr(str(value))
+        elif hasattr(value, "evaluate"):
+            value = None
+    name = type(node).__name__
+    if value is None:
+        return name
+    if isinstance(value, (list, tuple)):
+        value = ".".join(str(item) for item in value)
+    value = str(value)
+    if len(value) > max_length:
+        value = value[: max_length - 3] + "..."
+    return f"{name}({value})"
+
+
+class NodeStats:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.self_time = 0.0
+
+    @property
+    def avg_time(self):
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_time": self.total_time,
+            "self_time": self.self_time,
+        }
+
+
+class Profiler(EvaluationHook):
+    """
+    Record call counts and cumulative time per node type and per node instance
+
+    total_time includes time spent in child nodes, self_time does not.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.type_stats = {}
+        self.node_stats = {}
+        self._nodes = {}
+        self._child_times = []
+
+    def enter(self, node, context):
+        self._child_times.append(0.0)
+        return self.clock()
+
+    def exit(self, node, token, result=None, error=None):
+        elapsed = self.clock() - token
+        child_time = self._child_times.pop()
+        if self._child_times:
+            self._child_times[-1] += elapsed
+
+        node_id = id(node)
+        if node_id not in self.node_stats:
+            self._nodes[node_id] = node
+            self.node_stats[node_id] = NodeStats(describe_node(node))
+        type_name = type(node).__name__
+        if type_name not in self.type_stats:
+            self.type_stats[type_name] = NodeStats(type_name)
+        for stats in (self.node_stats[node_id], self.type_stats[type_name]):
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.self_time += elapsed - child_time
+            if error is not None:
+                stats.errors += 1
+
+    def reset(self):
+        self.type_stats.clear()
+        self.node_stats.clear()
+        self._nodes.clear()
+        self._child_times.clear()
+
+    def hot_nodes(self, limit=10):
+        return sorted(self.node_stats.values(), key=lambda stats: stats.self_time, reverse=True)[:limit]
+
+    def hot_types(self, limit=10):
+        return sorted(self.type_stats.values(), key=lambda stats: stats.self_time, reverse=True)[:limit]
+
+    def report(self, limit=10):
+        lines = []
+        for title, rows in (("node type", self.hot_types(limit)), ("node", self.hot_nodes(limit))):
+            lines.append(f"{title:<48} {'calls':>8} {'errors':>7} {'total(ms)':>11} {'self(ms)':>10} {'avg(us)':>9}")
+            for stats in rows:
+                lines.append(
+                    f"{stats.name:<48} {stats.calls:>8} {stats.errors:>7} {stats.total_time * 1000:>11.3f} "
+                    f"{stats.self_time * 1000:>10.3f} {stats.avg_time * 1e6:>9.2f}"
+                )
+            lines.append("")
+        return "\n".join(lines)
+
+
+def profile_expression(expression, context=None, repeat=1, limit=10, file=None, **compile_kwargs):
+    """
+    Evaluate expression repeat times with a Profiler, print the hot node report and return the profiler
+    """
+    # engine 依赖本模块，延迟导入避免循环依赖
+    from .api import compile_expression
+
+    compiled = compile_expression(expression, **compile_kwargs)
+    profiler = Profiler()
+    for _ in range(repeat):
+        try:
+            compiled.evaluate(context, hook=profiler)
+        except Exception as e:
+            print(f"evaluate expression error: {e}", file=file or sys.stdout)
+            break
+    print(profiler.report(limit), file=file or sys.stdout)
+    return profiler
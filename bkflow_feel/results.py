@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Non-raising evaluation results and rate limited error logging
+
+evaluate_result returns an EvaluationResult instead of raising, its message is only formatted when read. Errors
+logged through error_log are deduplicated by key: the first occurrence in each interval is logged with its
+traceback, the following identical ones are only counted and reported with the next logged occurrence.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from lark.exceptions import LarkError
+
+from .exceptions import BudgetExceededError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+SYNTAX_ERROR = "syntax_error"
+INVALID_EXPRESSION = "invalid_expression"
+TYPE_ERROR = "type_error"
+BUDGET_EXCEEDED = "budget_exceeded"
+EVALUATION_ERROR = "evaluation_error"
+
+DEFAULT_LOG_INTERVAL = 60.0
+DEFAULT_LOG_KEYS = 1024
+
+
+def error_code(error, compiling=False):
+    if isinstance(error, ValidationError):
+        return TYPE_ERROR
+    if isinstance(error, BudgetExceededError):
+        return BUDGET_EXCEEDED
+    if compiling:
+        return SYNTAX_ERROR if isinstance(error, LarkError) else INVALID_EXPRESSION
+    return EVALUATION_ERROR
+
+
+def detach_traceback(error):
+    """
+    Drop the tracebacks of error and its chained exceptions so keeping it does not keep their frames alive
+    """
+    seen = set()
+    current = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        current.__traceback__ = None
+        current = current.__cause__ or current.__context__
+    return error
+
+
+def copy_error(error):
+    """
+    Shallow copy of error without traceback, raising it leaves error untouched
+    """
+    # 部分异常（如 lark 的 UnexpectedToken）的构造参数与 args 不一致，不能通过 copy.copy 复制
+    clone = BaseException.__new__(type(error), *error.args)
+    clone.__dict__.update(getattr(error, "__dict__", {}))
+    clone.__cause__ = error.__cause__
+    clone.__context__ = error.__context__
+    clone.__suppress_context__ = error.__suppress_context__
+    return clone
+
+
+class EvaluationResult:
+    """
+    Value of an evaluation, or the error code and exception of a failed one
+    """
+
+    __slots__ = ("value", "error_code", "error", "expression")
+
+    def __init__(self, value=None, error_code=None, error=None, expression=None):
+        self.value = value
+        self.error_code = error_code
+        self.error = error
+        self.expression = expression
+
+    @classmethod
+    def failure(cls, error, expression=None, compiling=False):
+        return cls(error_code=error_code(error, compiling), error=error, expression=expression)
+
+    @property
+    def ok(self):
+        return self.error_code is None
+
+    @property
+    def message(self):
+        # 出错时才格式化异常信息
+        return f"{type(self.error).__name__}: {self.error}" if self.error is not None else None
+
+    def unwrap(self):
+        """
+        Value of a successful evaluation, raise a copy of the error of a failed one
+        """
+        if self.error is not None:
+            # 缓存的异常被多个结果共享，直接抛出会不断累积调用栈
+            raise copy_error(self.error)
+        return self.value
+
+    def to_dict(self):
+        return {"value": self.value, "error_code": self.error_code, "message": self.message}
+
+    def __repr__(self):
+        if self.ok:
+            return f"EvaluationResult(value={self.value!r})"
+        return f"EvaluationResult(error_code={self.error_code!r}, message={self.message!r})"
+
+
+class RateLimitedLog:
+    """
+    Log each distinct error at most once per interval seconds
+
+    At most max_keys distinct keys are tracked, the least recently logged ones are forgotten first. Suppressed
+    counts are updated without locking and may be slightly off under concurrency.
+    """
+
+    def __init__(self, target_logger=logger, interval=DEFAULT_LOG_INTERVAL, max_keys=DEFAULT_LOG_KEYS):
+        self.logger = target_logger
+        self.interval = interval
+        self.max_keys = max_keys
+        # key -> [上次输出时间, 之后被抑制的次数]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def error(self, key, msg, *args, exc_info=None, level=logging.ERROR, target_logger=None):
+        """
+        Log msg % args to target_logger unless key was logged in the last interval seconds, return whether it was
+        logged. Arguments are only formatted when the message is logged.
+        """
+        target_logger = target_logger or self.logger
+        if not target_logger.isEnabledFor(level):
+            return False
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.interval:
+            entry[1] += 1
+            return False
+        suppressed = entry[1] if entry is not None else 0
+        with self._lock:
+            self._entries[key] = [now, 0]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        if suppressed:
+            msg = f"{msg} (%s identical errors suppressed in the last %gs)"
+            args = (*args, suppressed, self.interval)
+        target_logger.log(level, msg, *args, exc_info=exc_info)
+        return True
+
+    def suppressed(self, key):
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else 0
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+error_log = RateLimitedLog()
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import logging
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+
+from .lazyjson import LazyJSON
+
+logger = logging.getLogger(__name__)
+
+
+def context_shape(value, max_depth=4, max_keys=50):
+    """
+    Redacted shape of a context: keys, value types and list lengths, never the values themselves
+    """
+    if max_depth <= 0:
+        return type(value).__name__
+    if isinstance(value, LazyJSON):
+        # 只描述已解码的部分，记录慢日志不应解码整个文档
+        value = value.decoded_items()
+    if isinstance(value, Mapping):
+        shape = {}
+        for index, (key, item) in enumerate(value.items()):
+            if index >= max_keys:
+                shape["..."] = f"{len(value) - max_keys} more keys"
+                break
+            shape[str(key)] = context_shape(item, max_depth - 1, max_keys)
+        return shape
+    if isinstance(value, (list, tuple)):
+        return {
+            "type": type(value).__name__,
+            "length": len(value),
+            "items": context_shape(value[0], max_depth - 1, max_keys) if value else None,
+        }
+    return type(value).__name__
+
+
+class SlowLogRecord:
+    def __init__(self, expression, duration, context_shape, breakdown=None, error=None, timestamp=None):
+        self.expression = expression
+        self.duration = duration
+        self.context_shape = context_shape
+        self.breakdown = breakdown
+        self.error = error
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    def to_dict(self):
+        return {
+            "expression": self.expression,
+            "duration": self.duration,
+            "context_shape": self.context_shape,
+            "breakdown": self.breakdown,
+            "error": self.error,
+            "timestamp": self.timestamp,
+        }
+
+    def __repr__(self):
+        return f"<SlowLogRecord {self.expression!r} {self.duration * 1000:.3f}ms>"
+
+
+class SlowLog:
+    """
+    Record evaluations slower than threshold (seconds) into a bounded ring buffer and an optional sink
+
+    Only a sample_rate fraction of evaluations are timed. With breakdown enabled, sampled evaluations run
+    with a Profiler, so their durations include the profiling overhead.
+    """
+
+    def __init__(self, threshold=None, sample_rate=1.0, capacity=1000, sink=None, breakdown=True, breakdown_limit=10):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.sink = sink
+        self.breakdown = breakdown
+        self.breakdown_limit = breakdown_limit
+        self.records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.threshold is not None
+
+    def enable(self, threshold, sample_rate=None, sink=None, breakdown=None):
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if sink is not None:
+            self.sink = sink
+        if breakdown is not None:
+            self.breakdown = breakdown
+        self.threshold = threshold
+
+    def disable(self):
+        self.threshold = None
+
+    def should_sample(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def record(self, expression, duration, context, profiler=None, error=None):
+        breakdown = None
+        if profiler is not None:
+            breakdown = [stats.to_dict() for stats in profiler.hot_nodes(self.breakdown_limit)]
+        record = SlowLogRecord(
+            expression=expression,
+            duration=duration,
+            context_shape=context_shape(context),
+            breakdown=breakdown,
+            error=f"{type(error).__name__}: {error}" if error is not None else None,
+        )
+        with self._lock:
+            self.records.append(record)
+        if self.sink is not None:
+            try:
+                self.sink(record)
+            except Exception as e:
+                logger.exception(f"slow log sink error: {e}")
+        return record
+
+    def query(self, expression=None, min_duration=None, limit=None):
+        """
+        Return recorded entries, slowest first
+        """
+        with self._lock:
+            records = list(self.records)
+        if expression is not None:
+            records = [record for record in records if record.expression == expression]
+        if min_duration is not None:
+            records = [record for record in records if record.duration >= min_duration]
+        records.sort(key=lambda record: record.duration, reverse=True)
+        return records[:limit] if limit is not None else records
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+
+def logging_sink(target_logger=logger, level=logging.WARNING):
+    def _sink(record):
+        target_logger.log(
+            level,
+            "slow evaluation %.3fms: %s, context shape: %s",
+            record.duration * 1000,
+            record.expression,
+            record.context_shape,
+        )
+
+    return _sink
+
+
+slow_log = SlowLog()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Partial evaluation of expressions against the part of the context known ahead of time
+
+Known variables are replaced by constants, sub expressions which no longer read the context are evaluated once and
+and / or operands with a known value are dropped. For any context containing the known one, the residual
+expression gives the same result as the original.
+"""
+from . import api, parsers
+from .analysis import free_variable_nodes, free_variables, is_boolean, is_volatile_node
+from .optimizer import optimize as optimize_ast
+from .visitors import iter_child_nodes, map_child_nodes, walk
+
+LITERAL_NODES = (parsers.Number, parsers.String, parsers.Boolean, parsers.Null, parsers.Constant)
+# in / before / after / includes 按节点类型识别区间，区间节点不能替换为常量
+UNFOLDABLE_NODES = (parsers.RangeGroup,)
+SCOPE_NODES = (parsers.ListFilter, parsers.ListMatch)
+
+
+def specialize(compiled, known_context, optimize=False, adaptive=False):
+    """
+    Return a CompiledExpression equivalent to compiled for every context containing known_context
+
+    compiled can also be an expression string. Volatile sub expressions (now(), today(), custom functions not
+    declared pure) and those raising an error are kept, so they are still evaluated on each call.
+    """
+    if not isinstance(compiled, api.CompiledExpression):
+        compiled = api.compile_expression(compiled, optimize=False)
+    ast = specialize_ast(compiled.ast, known_context)
+    if optimize:
+        ast = optimize_ast(ast, adaptive=adaptive)
+    return api.CompiledExpression(compiled.expression, ast)
+
+
+def specialize_ast(ast, known_context):
+    """
+    Build the residual tree of ast, ast itself is left untouched
+    """
+    known = {
+        id(node): node.name
+        for node in free_variable_nodes(ast)
+        if isinstance(node, parsers.Variable) and node.name in known_context
+    }
+    residual = {}
+    # 残余树节点 id -> (是否读取上下文, 是否含易变节点)
+    flags = {}
+    # 先序遍历的逆序保证子节点总是先于父节点被处理
+    for node in reversed(list(walk(ast))):
+        if id(node) in known:
+            new_node = parsers.Constant(known_context[known[id(node)]])
+            flags[id(new_node)] = (False, False)
+            residual[id(node)] = new_node
+            continue
+        new_node = map_child_nodes(node, lambda child: residual[id(child)])
+        if isinstance(new_node, parsers.BooleanOperator):
+            new_node = _simplify_boolean(new_node)
+        elif isinstance(new_node, parsers.StringOperator):
+            _compile_pattern(new_node)
+        flags[id(new_node)] = _flags(new_node, flags)
+        residual[id(node)] = _fold(new_node, flags)
+    return residual[id(ast)]
+
+
+def _flags(node, flags):
+    children = [flags[id(child)] for child in iter_child_nodes(node)]
+    volatile = is_volatile_node(node) or any(volatile for _, volatile in children)
+    if isinstance(node, SCOPE_NODES):
+        # 条件中的变量可能来自列表元素或迭代变量，按作用域重新分析
+        return bool(free_variables(node)), volatile
+    if isinstance(node, (parsers.Variable, parsers.FunctionCall)):
+        return True, volatile
+    return any(dynamic for dynamic, _ in children), volatile
+
+
+def _fold(node, flags):
+    dynamic, volatile = flags[id(node)]
+    if dynamic or volatile or isinstance(node, LITERAL_NODES + UNFOLDABLE_NODES):
+        return node
+    try:
+        value = node.evaluate({})
+    except Exception:
+        # 计算出错的子表达式保留，错误在每次计算时照常抛出
+        return node
+    constant = parsers.Constant(value)
+    flags[id(constant)] = (False, False)
+    return constant
+
+
+def _simplify_boolean(node):
+    base = parsers.And if isinstance(node, parsers.And) else parsers.Or
+    short_circuit_on = base is parsers.Or
+    operands = []
+    for operand in node.operands:
+        operands.append(operand)
+        if _is_literal(operand) and bool(operand.evaluate({})) is short_circuit_on:
+            # 之后的操作数不会被计算
+            break
+    # 不会短路的常量只有在最后一个位置时才可能成为结果
+    operands = [
+        operand for index, operand in enumerate(operands) if index == len(operands) - 1 or not _is_literal(operand)
+    ]
+    if len(operands) > 1:
+        last_value = operands[-1].evaluate({}) if _is_literal(operands[-1]) else None
+        # x and true 与 x or false 在 x 为布尔值时等价于 x
+        if last_value is (not short_circuit_on) and is_boolean(operands[-2]):
+            operands.pop()
+    if len(operands) == 1:
+        return operands[0]
+    return base(*operands)
+
+
+def _is_literal(node):
+    return isinstance(node, LITERAL_NODES)
+
+
+def _compile_pattern(node):
+    if node.operation != "matches" or node.pattern is not None:
+        return
+    if isinstance(node.right, parsers.Constant) and isinstance(node.right.value, str):
+        # 使用节点绑定的正则缓存
+        node.compile_literal_pattern(node.right.value)
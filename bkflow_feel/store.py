@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Read-only compiled rule store shared by prefork workers
+
+build_rule_store compiles rules once into a flat file: a header, a fixed width index sorted by rule key and the
+blobs of each rule (key, source expression and pickled expression tree). RuleStore memory-maps the file, looks keys
+up with a binary search over the index and decodes a rule's tree only when it is first used, keeping at most
+cache_size decoded rules. The file pages are shared by every worker mapping it, so resident memory per worker is
+bounded by the decoded cache instead of growing with the number of rules.
+
+Trees are stored with pickle, only open store files built by trusted code. Stores built by another bkflow-feel
+version are still usable, their rules are compiled from the stored expressions instead.
+"""
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+
+from .__version__ import __version__
+from .api import compile_expression, default_engine
+from .caches import LRUCache
+from .engine import CompiledExpression
+from .visitors import walk
+
+MAGIC = b"BKFR"
+FORMAT_VERSION = 1
+DEFAULT_CACHE_SIZE = 1024
+# magic, 格式版本, 规则数量, 库版本长度
+HEADER = struct.Struct("<4sHIH")
+# key、表达式、语法树各自的 (偏移, 长度)
+INDEX_ENTRY = struct.Struct("<QIQIQI")
+# Engine.bind 绑定到节点上的属性
+ENGINE_ATTRS = ("functions", "pattern_cache")
+
+
+def build_rule_store(path, rules, optimize=False, engine=None, **options):
+    """
+    Compile rules, a mapping or iterable of (key, expression), and write them to a store file at path
+
+    Rules are compiled with engine, the default engine if not given, so they can call its registered functions.
+    options (adaptive, type_check, schema) are passed to Engine.compile. Raise ValueError for duplicated keys,
+    compile errors are raised as is. The file is replaced atomically, workers which already mapped the old file keep
+    reading it until they reopen.
+    """
+    engine = engine or default_engine
+    items = rules.items() if hasattr(rules, "items") else rules
+    entries = {}
+    for key, expression in items:
+        encoded_key = key.encode("utf-8")
+        if encoded_key in entries:
+            raise ValueError(f"duplicated rule key: {key}")
+        compiled = engine.compile(expression, use_cache=False, optimize=optimize, **options)
+        tree = pickle.dumps(_unbind(compiled.ast), pickle.HIGHEST_PROTOCOL)
+        entries[encoded_key] = (expression.encode("utf-8"), tree)
+
+    version = __version__.encode("utf-8")
+    offset = HEADER.size + len(version) + INDEX_ENTRY.size * len(entries)
+    index, blobs = [], []
+    for encoded_key in sorted(entries):
+        expression, tree = entries[encoded_key]
+        spans = []
+        for blob in (encoded_key, expression, tree):
+            spans.extend((offset, len(blob)))
+            blobs.append(blob)
+            offset += len(blob)
+        index.append(INDEX_ENTRY.pack(*spans))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".rules-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(entries), len(version)))
+            f.write(version)
+            f.writelines(index)
+            f.writelines(blobs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(entries)
+
+
+def _unbind(ast):
+    # 引擎的函数注册表及正则缓存不写入规则库，读取时由 RuleStore 的 engine 重新绑定
+    for node in walk(ast):
+        for attr in ENGINE_ATTRS:
+            node.__dict__.pop(attr, None)
+    return ast
+
+
+class RuleStore:
+    """
+    Memory-mapped store written by build_rule_store
+
+    Open it in the master process before forking so every worker shares the mapping. Decoded rules are cached per
+    process, with an engine they are bound to its function registry and regex cache.
+    """
+
+    def __init__(self, path, engine=None, cache_size=DEFAULT_CACHE_SIZE):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a rule store")
+        magic, format_version, count, version_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a rule store of format version {FORMAT_VERSION}")
+        self.path = path
+        self.count = count
+        self.version = self._mmap[HEADER.size : HEADER.size + version_size].decode("utf-8")
+        # 不同版本生成的语法树不一定兼容，改为从表达式编译
+        self.trees_compatible = self.version == __version__
+        self._index_start = HEADER.size + version_size
+        self.engine = engine
+        self.cache = LRUCache(cache_size)
+
+    def _entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._mmap, self._index_start + position * INDEX_ENTRY.size)
+
+    def _blob(self, offset, size):
+        return self._mmap[offset : offset + size]
+
+    def _find(self, encoded_key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(middle)
+            current = self._blob(entry[0], entry[1])
+            if current == encoded_key:
+                return entry
+            if current < encoded_key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return self._find(key.encode("utf-8")) is not None
+
+    def __iter__(self):
+        for position in range(self.count):
+            entry = self._entry(position)
+            yield self._blob(entry[0], entry[1]).decode("utf-8")
+
+    def keys(self):
+        return iter(self)
+
+    def expression(self, key):
+        entry = self._find(key.encode("utf-8"))
+        if entry is None:
+            raise KeyError(key)
+        return self._blob(entry[2], entry[3]).decode("utf-8")
+
+    def get(self, key):
+        """
+        CompiledExpression of rule key, raise KeyError if the store has no such rule
+        """
+        compiled = self.cache.get(key)
+        if compiled is None:
+            compiled = self._decode(key)
+            self.cache.set(key, compiled)
+        return compiled
+
+    def _decode(self, key):
+        entry = self._find(key.encode("utf-8"))
+        if entry is None:
+            raise KeyError(key)
+        expression = self._blob(entry[2], entry[3]).decode("utf-8")
+        if not self.trees_compatible:
+            return self._compile(expression)
+        ast = pickle.loads(self._blob(entry[4], entry[5]))
+        if self.engine is not None:
+            ast = self.engine.bind(ast)
+        return CompiledExpression(expression, ast)
+
+    def _compile(self, expression):
+        if self.engine is not None:
+            return self.engine.compile(expression, use_cache=False)
+        return compile_expression(expression, use_cache=False)
+
+    def evaluate(self, key, context=None, budget=None, hook=None):
+        return self.get(key).evaluate(context, budget, hook)
+
+    def cache_stats(self):
+        return self.cache.stats()
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
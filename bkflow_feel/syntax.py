@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Validate-only syntax check
+
+check_syntax runs the LALR recognizer of the parser without building a parse tree or transforming it, and reports
+the first syntax error with its position and the tokens expected there. Only the grammar is checked, errors raised
+while transforming or evaluating (e.g. an invalid date literal) are not detected.
+"""
+import multiprocessing
+import threading
+import weakref
+
+from lark.exceptions import UnexpectedCharacters, UnexpectedEOF, UnexpectedInput, UnexpectedToken
+from lark.lexer import LexerThread, Token
+from lark.parsers.lalr_analysis import Shift
+
+from . import parser as default_parser
+
+CHUNK_SIZE = 256
+
+# Lark 实例 -> Recognizer
+_recognizers = weakref.WeakKeyDictionary()
+_recognizers_lock = threading.Lock()
+
+
+class SyntaxIssue:
+    """
+    First syntax error of an expression, line and column start from 1
+    """
+
+    def __init__(self, message, line, column, position, token=None, expected=()):
+        self.message = message
+        self.line = line
+        self.column = column
+        self.position = position
+        self.token = token
+        self.expected = list(expected)
+
+    def to_dict(self):
+        return {
+            "message": self.message,
+            "line": self.line,
+            "column": self.column,
+            "position": self.position,
+            "token": self.token,
+            "expected": self.expected,
+        }
+
+    def __repr__(self):
+        return f"SyntaxIssue(line={self.line}, column={self.column}, token={self.token!r}, expected={self.expected})"
+
+
+class Recognizer:
+    """
+    LALR recognizer sharing the lexer and parse table of a Lark parser
+
+    Only the state stack is kept: no tokens are stored, no rule callback runs and no tree is built.
+    """
+
+    def __init__(self, lark_parser, start=None):
+        frontend = lark_parser.parser
+        start = start or frontend.parser_conf.start[0]
+        parse_table = frontend.parser.parser.parse_table
+        self.lexer = frontend.lexer
+        self.start_state = parse_table.start_states[start]
+        self.end_state = parse_table.end_states[start]
+        # 归约动作预先展开为 (False, 弹出的状态数, 左部符号)，移进动作为 (True, 下一状态)
+        self.states = {
+            state: {
+                symbol: (True, arg) if action is Shift else (False, len(arg.expansion), arg.origin.name)
+                for symbol, (action, arg) in actions.items()
+            }
+            for state, actions in parse_table.states.items()
+        }
+
+    def recognize(self, expression):
+        """
+        Raise lark UnexpectedInput at the first syntax error of expression
+        """
+        state = _RecognizerState(self.start_state)
+        token = None
+        for token in LexerThread.from_text(self.lexer, expression).lex(state):
+            self._feed(state, token)
+        end_token = Token.new_borrow_pos("$END", "", token) if token else Token("$END", "", 0, 1, 1)
+        self._feed(state, end_token)
+
+    def _feed(self, state, token):
+        states, stack = self.states, state.stack
+        while True:
+            try:
+                action = states[stack[-1]][token.type]
+            except KeyError:
+                expected = {symbol for symbol in states[stack[-1]] if symbol.isupper()}
+                raise UnexpectedToken(token, expected, state=state)
+            if action[0]:
+                stack.append(action[1])
+                return
+            _, size, origin = action
+            if size:
+                del stack[-size:]
+            stack.append(states[stack[-1]][origin][1])
+            if stack[-1] == self.end_state:
+                return
+
+
+class _RecognizerState:
+    # 上下文词法分析器通过 position 获取当前状态
+    __slots__ = ("stack",)
+
+    def __init__(self, start_state):
+        self.stack = [start_state]
+
+    @property
+    def position(self):
+        return self.stack[-1]
+
+
+def get_recognizer(lark_parser=default_parser):
+    recognizer = _recognizers.get(lark_parser)
+    if recognizer is None:
+        with _recognizers_lock:
+            recognizer = _recognizers.get(lark_parser)
+            if recognizer is None:
+                recognizer = _recognizers[lark_parser] = Recognizer(lark_parser)
+    return recognizer
+
+
+def _display_terminal(lark_parser, name):
+    # 字符串终结符展示字面值，匿名正则终结符展示正则，具名正则终结符展示名称
+    try:
+        pattern = lark_parser.get_terminal(name).pattern
+    except KeyError:
+        return name
+    if pattern.type == "str":
+        return repr(pattern.value)
+    return f"/{pattern.value}/" if name.startswith("__") else name
+
+
+def _end_position(expression):
+    lines = expression.split("\n")
+    return len(lines), len(lines[-1]) + 1
+
+
+def _issue(expression, error, lark_parser):
+    if isinstance(error, UnexpectedCharacters):
+        token, expected = error.char, error.allowed or ()
+        message = f"Unexpected character {error.char!r}"
+    elif isinstance(error, UnexpectedEOF):
+        token, expected = None, error.expected
+        message = "Unexpected end of expression"
+    else:
+        token, expected = str(error.token), error.expected
+        if error.token.type == "$END":
+            token, message = None, "Unexpected end of expression"
+        else:
+            message = f"Unexpected token {token!r}"
+    line, column, position = error.line, error.column, error.pos_in_stream
+    if token is None or line is None or line < 1:
+        line, column = _end_position(expression)
+        position = len(expression)
+    expected = sorted({_display_terminal(lark_parser, name) for name in expected})
+    return SyntaxIssue(message, line, column, position, token, expected)
+
+
+def check_syntax(expression, parser=default_parser):
+    """
+    Return None if expression is syntactically valid, otherwise a SyntaxIssue describing the first error
+    """
+    try:
+        get_recognizer(parser).recognize(expression)
+    except (UnexpectedToken, UnexpectedCharacters, UnexpectedEOF) as e:
+        return _issue(expression, e, parser)
+    except UnexpectedInput as e:
+        return SyntaxIssue(str(e), *_end_position(expression), len(expression))
+    return None
+
+
+def _check_chunk(expressions):
+    return [check_syntax(expression) for expression in expressions]
+
+
+def check_syntax_many(expressions, workers=1, chunk_size=CHUNK_SIZE, parser=default_parser):
+    """
+    check_syntax for every expression, results are in input order
+
+    Duplicated expressions are checked once. With workers > 1 chunks of expressions are checked in worker
+    processes, which only have the default parser: expressions of any other parser are checked serially.
+    """
+    expressions = list(expressions)
+    unique = list(dict.fromkeys(expressions))
+    # Lark 实例无法序列化传给子进程，自定义 parser 只能在当前进程检查
+    if workers > 1 and len(unique) > chunk_size and parser is default_parser:
+        chunks = [unique[index : index + chunk_size] for index in range(0, len(unique), chunk_size)]
+        with multiprocessing.Pool(workers) as pool:
+            issues = [issue for chunk in pool.imap(_check_chunk, chunks) for issue in chunk]
+    else:
+        issues = [check_syntax(expression, parser) for expression in unique]
+    results = dict(zip(unique, issues))
+    return [results[expression] for expression in expressions]
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
-from lark import Token, Transformer, v_args
+from lark import Token, v_args
+from lark.visitors import Transformer_NonRecursive
 
 from .data_models import RangeGroupOperator
 from .parsers import (
@@ -13,7 +14,6 @@ from .parsers import (
     Date,
     DateAndTime,
     DayOfWeekFunc,
-    Expr,
     FuncInvocation,
     FunctionCall,
     GetOrElseFunc,
@@ -47,8 +47,19 @@ from .parsers import (
 )
 
 
+def _flatten(node_cls, left, right):
+    # 可结合的 and / or 链展开为一个 n 元节点，左深链直接追加，避免重复拷贝
+    if type(left) is not node_cls:
+        left = node_cls(left)
+    if type(right) is node_cls:
+        left.operands.extend(right.operands)
+    else:
+        left.operands.append(right)
+    return left
+
+
 @v_args(inline=True)
-class FEELTransformer(Transformer):
+class FEELTransformer(Transformer_NonRecursive):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -72,7 +83,8 @@ class FEELTransformer(Transformer):
         return Null()
 
     def expr(self, item):
-        return Expr(item)
+        # 不生成只转发计算的 Expr 包装节点，减少每次计算的调用层级
+        return item
 
     def list_(self, *items):
         return List(*items)
@@ -153,10 +165,10 @@ class FEELTransformer(Transformer):
         return SameTypeBinaryOperator("greater_than_or_equal", left, right)
 
     def and_(self, left, right):
-        return And(left, right)
+        return _flatten(And, left, right)
 
     def or_(self, left, right):
-        return Or(left, right)
+        return _flatten(Or, left, right)
 
     def between(self, target, left, right):
         return Between(target, left, right)
@@ -171,10 +183,10 @@ class FEELTransformer(Transformer):
         return Date(value)
 
     def date_func(self, value):
-        return Expr(value)
+        return value
 
     def timezone(self, value):
-        return Expr(value)
+        return value
 
     def tz_offset(self, token):
         return TZInfo("offset", token.value)
@@ -193,10 +205,10 @@ class FEELTransformer(Transformer):
         return DateAndTime(date, time)
 
     def time_func(self, value):
-        return Expr(value)
+        return value
 
     def date_and_time_func(self, value):
-        return Expr(value)
+        return value
 
     def now_func(self):
         return NowFunc()
@@ -238,7 +250,7 @@ class FEELTransformer(Transformer):
         return Pair(key=String(key_token.value.strip('"')), value=value)
 
     def bracket(self, value):
-        return Expr(value)
+        return value
 
     def to_string(self, value):
         return ToString(value)
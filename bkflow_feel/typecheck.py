@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Static type inference
+
+Result types are inferred from literals, builtin functions and an optional schema of the context. Binary
+operations whose operand types are proven to pass the runtime same-type check skip it, and operations proven to
+fail it are reported when compiling instead of on each evaluation.
+
+A schema maps top level context keys to Python types, a nested dict describes the keys of a context value:
+
+    {"amount": int, "tier": str, "order": {"price": float}}
+
+Values of the context must exactly have the declared types, the skipped runtime checks do not detect violations.
+"""
+import datetime
+
+from . import parsers
+from .analysis import BOOLEAN_NODES, COMPARISONS, free_variable_nodes
+from .exceptions import ValidationError
+from .visitors import walk
+
+NoneType = type(None)
+NUMBER_TYPES = (int, float)
+ARITHMETICS = {"add", "subtract", "multiply"}
+LITERAL_TYPES = {
+    parsers.Date: datetime.date,
+    parsers.Time: datetime.time,
+    parsers.DateAndTime: datetime.datetime,
+    parsers.NowFunc: datetime.datetime,
+    parsers.TodayFunc: datetime.date,
+    parsers.DayOfWeekFunc: str,
+    parsers.MonthOfYearFunc: str,
+    parsers.ToString: str,
+    parsers.List: list,
+    parsers.Context: dict,
+    parsers.Null: NoneType,
+}
+
+
+def infer_types(ast, schema=None):
+    """
+    Map id of each node of ast to the type of its result, None when unknown
+    """
+    schema = schema or {}
+    free_nodes = {id(node) for node in free_variable_nodes(ast)}
+    types = {}
+    # 先序遍历的逆序保证子节点总是先于父节点被推导
+    for node in reversed(list(walk(ast))):
+        types[id(node)] = _node_type(node, types, schema, free_nodes)
+    return types
+
+
+def _schema_type(schema, name, keys=()):
+    value = schema.get(name)
+    for key in keys:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    if isinstance(value, dict):
+        return dict
+    return value if isinstance(value, type) else None
+
+
+def _node_type(node, types, schema, free_nodes):
+    node_type = LITERAL_TYPES.get(type(node))
+    if node_type is not None:
+        return node_type
+    if isinstance(node, (parsers.Number, parsers.String, parsers.Boolean, parsers.Constant)):
+        return type(node.value)
+    if isinstance(node, parsers.Variable):
+        # some / every 绑定的变量及列表过滤条件中的变量不读取上下文
+        return _schema_type(schema, node.name) if id(node) in free_nodes else None
+    if isinstance(node, parsers.ContextItem):
+        if isinstance(node.expr, parsers.Variable) and id(node.expr) in free_nodes:
+            return _schema_type(schema, node.expr.name, node.keys)
+        return None
+    if isinstance(node, parsers.Expr):
+        return types[id(node.value)]
+    if isinstance(node, BOOLEAN_NODES):
+        return bool
+    if isinstance(node, parsers.SameTypeBinaryOperator):
+        return _binary_type(node.operation, types[id(node.left)], types[id(node.right)])
+    if isinstance(node, parsers.BooleanOperator):
+        return bool if all(types[id(operand)] is bool for operand in node.operands) else None
+    if isinstance(node, parsers.ListOperator):
+        return int if node.operation == "list_count" else bool
+    if isinstance(node, parsers.GetOrElseFunc):
+        left, right = types[id(node.left)], types[id(node.right)]
+        return left if left is right else None
+    return None
+
+
+def _binary_type(operation, left, right):
+    if operation in COMPARISONS:
+        return bool
+    # 只推导两侧类型完全相同的情况，bool 参与运算时结果为 int
+    if left is not right or left is bool:
+        return None
+    if operation in ARITHMETICS and left in NUMBER_TYPES:
+        return left
+    if operation == "add" and left is str:
+        return str
+    if operation == "divide" and left in NUMBER_TYPES:
+        return float
+    if operation == "power" and left is float:
+        return float
+    return None
+
+
+def schema_key(schema):
+    """
+    Hashable form of schema, used in cache keys
+    """
+    if not schema:
+        return ()
+    items = ((name, schema_key(value) if isinstance(value, dict) else value) for name, value in schema.items())
+    return tuple(sorted(items, key=repr))
+
+
+def _same_type_passes(left, right, instance_type=None):
+    # 与 BinaryOperationValidator 的 isinstance(left, type(right)) 一致
+    return issubclass(left, right) and (instance_type is None or issubclass(left, instance_type))
+
+
+def check_types(ast, schema=None):
+    """
+    Let operations of ast proven type safe skip the runtime check, the tree is modified in place
+
+    Raise ValidationError if an operation always fails the check. Operations which would never be evaluated,
+    e.g. behind a short circuited `and`, are checked as well.
+    """
+    types = infer_types(ast, schema)
+    for node in walk(ast):
+        if isinstance(node, parsers.SameTypeBinaryOperator):
+            instance_type = None
+        elif isinstance(node, parsers.StringOperator):
+            instance_type = str
+        else:
+            continue
+        left, right = types[id(node.left)], types[id(node.right)]
+        if left is None or right is None:
+            continue
+        if not _same_type_passes(left, right, instance_type):
+            expected = "same" if instance_type is None else str(instance_type)
+            raise ValidationError(f"Type of both operators must be {expected}, get {left} and {right}")
+        node.checked = False
+    return ast
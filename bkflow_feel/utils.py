@@ -2,6 +2,7 @@
 import abc
 import importlib
 import logging
+import threading
 from typing import Callable
 
 from pydantic import BaseModel
@@ -14,58 +15,73 @@ logger = logging.getLogger(__name__)
 
 
 class FEELFunctionsManager:
+    """
+    Registry of custom functions
+
+    The registry is copy-on-write: readers use the current dict without locking, registration builds a new dict
+    under a lock and replaces the old one, so concurrent evaluations never observe a partial update.
+    """
+
     __hub = {}
+    # 无副作用的函数，表达式优化时允许调整其计算顺序
+    __pure_funcs = frozenset()
+    __lock = threading.Lock()
 
     @classmethod
     def register_invocation_cls(cls, invocation_cls):
         func_name = invocation_cls.Meta.func_name
-        existed_invocation_cls = cls.__hub.get(func_name)
-        if existed_invocation_cls:
-            raise RuntimeError(
-                "func register error, {}'s func_name {} conflict with {}".format(
-                    existed_invocation_cls, func_name, invocation_cls
+        with cls.__lock:
+            existed_invocation_cls = cls.__hub.get(func_name)
+            if existed_invocation_cls:
+                raise RuntimeError(
+                    "func register error, {}'s func_name {} conflict with {}".format(
+                        existed_invocation_cls, func_name, invocation_cls
+                    )
                 )
-            )
 
-        cls.__hub[func_name] = invocation_cls
+            cls.__hub = {**cls.__hub, func_name: invocation_cls}
+            if getattr(invocation_cls.Meta, "pure", False):
+                cls.__pure_funcs = cls.__pure_funcs | {func_name}
 
     @classmethod
-    def register_funcs(cls, func_dict):
-        for func_name, func_path in func_dict.items():
-            if not isinstance(func_name, str):
-                raise ValueError(f"func_name {func_name} should be string")
-            if func_name in cls.__hub:
-                raise ValueError(
-                    "func register error, {}'s func_name {} conflict with {}".format(
-                        func_path, func_name, cls.__hub[func_name]
+    def register_funcs(cls, func_dict, pure=False):
+        with cls.__lock:
+            hub = dict(cls.__hub)
+            for func_name, func_path in func_dict.items():
+                if not isinstance(func_name, str):
+                    raise ValueError(f"func_name {func_name} should be string")
+                if func_name in hub:
+                    raise ValueError(
+                        "func register error, {}'s func_name {} conflict with {}".format(
+                            func_path, func_name, hub[func_name]
+                        )
                     )
-                )
-            cls.__hub[func_name] = func_path
+                hub[func_name] = func_path
+            # 全部校验通过后再发布，注册失败时不会留下部分函数
+            cls.__hub = hub
+            if pure:
+                cls.__pure_funcs = cls.__pure_funcs | set(func_dict)
 
     @classmethod
     def clear(cls):
-        cls.__hub = {}
+        with cls.__lock:
+            cls.__hub = {}
+            cls.__pure_funcs = frozenset()
+
+    @classmethod
+    def is_pure(cls, func_name):
+        return func_name in cls.__pure_funcs
 
     @classmethod
     def all_funcs(cls):
-        funcs = {}
-        for version, invocation_cls in cls.__hub.items():
-            funcs[version] = invocation_cls
-        return funcs
+        return dict(cls.__hub)
 
     @classmethod
     def get_func(cls, func_name) -> Callable:
         func_obj = cls.__hub.get(func_name)
         if not func_obj:
             raise ValueError("func object {} not found".format(func_name))
-
-        if isinstance(func_obj, FEELInvocationMeta):
-            return func_obj()
-        else:
-            module_path, func_name = str(func_obj).rsplit(".", 1)
-            module = importlib.import_module(module_path)
-            func = getattr(module, func_name)
-            return func
+        return _load_func(func_obj)
 
     @classmethod
     def func_call(cls, func_name, *args, **kwargs):
@@ -73,6 +89,71 @@ class FEELFunctionsManager:
         return func(*args, **kwargs)
 
 
+class FunctionRegistry:
+    """
+    Function registry of one engine, layered over a parent registry (the global FEELFunctionsManager by default)
+
+    Names registered here shadow those of the parent. Registered values are function paths, invocation classes or
+    plain callables, updates are copy-on-write like FEELFunctionsManager.
+    """
+
+    def __init__(self, parent=FEELFunctionsManager):
+        self.parent = parent
+        self._hub = {}
+        self._pure_funcs = frozenset()
+        self._lock = threading.Lock()
+
+    def register_funcs(self, func_dict, pure=False):
+        with self._lock:
+            hub = dict(self._hub)
+            for func_name, func_obj in func_dict.items():
+                if not isinstance(func_name, str):
+                    raise ValueError(f"func_name {func_name} should be string")
+                if func_name in hub:
+                    raise ValueError(
+                        "func register error, {}'s func_name {} conflict with {}".format(
+                            func_obj, func_name, hub[func_name]
+                        )
+                    )
+                hub[func_name] = func_obj
+            self._hub = hub
+            if pure:
+                self._pure_funcs = self._pure_funcs | set(func_dict)
+
+    def clear(self):
+        with self._lock:
+            self._hub = {}
+            self._pure_funcs = frozenset()
+
+    def is_pure(self, func_name):
+        if func_name in self._hub:
+            return func_name in self._pure_funcs
+        return self.parent is not None and self.parent.is_pure(func_name)
+
+    def all_funcs(self):
+        funcs = self.parent.all_funcs() if self.parent is not None else {}
+        funcs.update(self._hub)
+        return funcs
+
+    def get_func(self, func_name) -> Callable:
+        func_obj = self._hub.get(func_name)
+        if func_obj is None:
+            if self.parent is None:
+                raise ValueError("func object {} not found".format(func_name))
+            return self.parent.get_func(func_name)
+        return _load_func(func_obj)
+
+
+def _load_func(func_obj):
+    if isinstance(func_obj, FEELInvocationMeta):
+        return func_obj()
+    if callable(func_obj):
+        return func_obj
+    module_path, func_name = str(func_obj).rsplit(".", 1)
+    module = importlib.import_module(module_path)
+    return getattr(module, func_name)
+
+
 class FEELInvocationMeta(type):
     """
     Metaclass for FEEL function invocation
@@ -99,6 +180,10 @@ class FEELInvocationMeta(type):
         if desc is not None and not isinstance(desc, str):
             raise AttributeError("desc in Meta should be str")
 
+        pure = getattr(meta_obj, "pure", False)
+        if not isinstance(pure, bool):
+            raise AttributeError("pure in Meta should be bool")
+
         # register func
         FEELFunctionsManager.register_invocation_cls(new_cls)
 
@@ -1,9 +1,20 @@
 # -*- coding: utf-8 -*-
 import abc
+import re
+
+try:
+    import re._constants as sre_constants
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
 
 from .exceptions import ValidationError
 
 
+POSSESSIVE_REPEAT = getattr(sre_constants, "POSSESSIVE_REPEAT", None)
+
+
 class ValidationResult:
     def __init__(self, result: bool, err_msg: str = None, *args, **kwargs):
         self.result = result
@@ -45,3 +56,50 @@ class BinaryOperationValidator(Validator):
                 False, f"Type of both operators must be {instance_type}, get {type(left_item)} and {type(right_item)}",
             )
         return ValidationResult(True)
+
+
+class RegexComplexityValidator(Validator):
+    """
+    Reject regex patterns which are likely to cause catastrophic backtracking
+    """
+
+    def __init__(self, max_length=256, max_repeat=1000, allow_nested_quantifiers=False):
+        self.max_length = max_length
+        self.max_repeat = max_repeat
+        self.allow_nested_quantifiers = allow_nested_quantifiers
+
+    def validate(self, pattern, *args, **kwargs) -> ValidationResult:
+        if self.max_length is not None and len(pattern) > self.max_length:
+            return ValidationResult(False, f"regex pattern too long: {len(pattern)} > {self.max_length}")
+        try:
+            parsed = sre_parse.parse(pattern)
+        except re.error as e:
+            return ValidationResult(False, f"invalid regex pattern {pattern!r}: {e}")
+        err_msg = self._check(parsed, inside_unbounded_repeat=False)
+        if err_msg:
+            return ValidationResult(False, f"regex pattern {pattern!r} rejected: {err_msg}")
+        return ValidationResult(True)
+
+    def _check(self, items, inside_unbounded_repeat):
+        for op, av in items:
+            if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, POSSESSIVE_REPEAT):
+                min_repeat, max_repeat, sub_items = av
+                unbounded = max_repeat == sre_constants.MAXREPEAT
+                if self.max_repeat is not None and not unbounded and max_repeat > self.max_repeat:
+                    return f"repeat count {max_repeat} exceeds {self.max_repeat}"
+                if unbounded and inside_unbounded_repeat and not self.allow_nested_quantifiers:
+                    return "nested unbounded quantifiers"
+                err_msg = self._check(sub_items, inside_unbounded_repeat or unbounded)
+            elif op == sre_constants.SUBPATTERN:
+                err_msg = self._check(av[-1], inside_unbounded_repeat)
+            elif op == sre_constants.BRANCH:
+                err_msg = next(
+                    (msg for msg in (self._check(branch, inside_unbounded_repeat) for branch in av[1]) if msg), None
+                )
+            elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                err_msg = self._check(av[1], inside_unbounded_repeat)
+            else:
+                err_msg = None
+            if err_msg:
+                return err_msg
+        return None
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import copy
+
+from . import parsers
+
+
+def _iter_nodes_in_value(value):
+    if isinstance(value, parsers.Expression):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _iter_nodes_in_value(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_nodes_in_value(item)
+
+
+def _map_nodes_in_value(value, func):
+    if isinstance(value, parsers.Expression):
+        return func(value)
+    elif isinstance(value, list):
+        return [_map_nodes_in_value(item, func) for item in value]
+    elif isinstance(value, tuple):
+        return tuple(_map_nodes_in_value(item, func) for item in value)
+    elif isinstance(value, dict):
+        return {key: _map_nodes_in_value(item, func) for key, item in value.items()}
+    return value
+
+
+def iter_child_nodes(node):
+    """
+    Yield all direct child expressions of node
+    """
+    for value in vars(node).values():
+        yield from _iter_nodes_in_value(value)
+
+
+def map_child_nodes(node, func):
+    """
+    Return a shallow copy of node whose child expressions are replaced by func(child)
+    """
+    new_node = copy.copy(node)
+    for attr, value in vars(node).items():
+        setattr(new_node, attr, _map_nodes_in_value(value, func))
+    return new_node
+
+
+def walk(node):
+    """
+    Iterate node and all its descendants in pre-order, without recursion
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = list(iter_child_nodes(node))
+        stack.extend(reversed(children))
+
+
+def transform_nodes(node, func):
+    """
+    Rebuild the tree bottom-up without recursion, func receives each node after its children have been transformed
+    """
+    transformed = {}
+    # 先序遍历的逆序保证子节点总是先于父节点被处理
+    for current in reversed(list(walk(node))):
+        transformed[id(current)] = func(map_child_nodes(current, lambda child: transformed[id(child)]))
+    return transformed[id(node)]
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import dataclasses
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from bkflow_feel import accessors
+from bkflow_feel.accessors import AttributeAccessor, ObjectContext, accessor_for, register_accessor, unregister_accessor
+from bkflow_feel.api import compile_expression
+
+
+@dataclasses.dataclass
+class Customer:
+    tier: str
+    tags: List[str]
+
+
+class Item(BaseModel):
+    name: str
+    price: float
+
+
+class Order(BaseModel):
+    customer: Customer
+    items: List[Item]
+    amount: int
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+class Plain:
+    def __init__(self, region):
+        self.region = region
+        self._secret = "hidden"
+
+
+ORDER = Order(
+    customer=Customer(tier="gold", tags=["vip"]),
+    items=[Item(name="a", price=5.0), Item(name="b", price=20.0)],
+    amount=150,
+)
+
+
+def _evaluate(expression, context):
+    return compile_expression(expression, use_cache=False).evaluate(context)
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ('order.customer.tier = "gold"', True),
+        ("order.amount > 100", True),
+        ("order.customer.missing", None),
+        ("order.customer.tier.length", None),
+        ('list contains(order.customer.tags, "vip")', True),
+    ],
+)
+def test_nested_objects(expression, expected):
+    assert _evaluate(expression, {"order": ORDER}) == expected
+
+
+def test_object_context_root():
+    context = ObjectContext(ORDER)
+    assert _evaluate("items[price > 10.0]", context) == [ORDER.items[1]]
+    assert _evaluate('amount > 100 and customer.tier = "gold"', context) is True
+    assert _evaluate("every x in [1, 2] satisfies x < amount", context) is True
+    assert _evaluate("some x in [1, 2] satisfies x > amount", context) is False
+    # 迭代变量不写入原上下文
+    assert context.bindings == {}
+
+
+def test_mappings():
+    assert _evaluate("a.b.c", {"a": MappingProxyType({"b": OrderedDict(c=1)})}) == 1
+
+
+def test_registered_classes():
+    assert _evaluate("p.region", {"p": Plain("cn")}) is None
+    register_accessor(Plain)
+    try:
+        assert _evaluate("p.region", {"p": Plain("cn")}) == "cn"
+        assert _evaluate("p._secret", {"p": Plain("cn")}) is None
+        assert _evaluate('[p][region = "cn"]', {"p": Plain("cn")})[0].region == "cn"
+    finally:
+        unregister_accessor(Plain)
+    assert _evaluate("p.region", {"p": Plain("cn")}) is None
+
+
+def test_declared_fields_only():
+    getter = accessor_for(Item)
+    assert getter(ORDER.items[0], "name") == "a"
+    assert getter(ORDER.items[0], "dict") is None
+    assert accessor_for(int) is None
+
+
+def test_resolved_once(monkeypatch):
+    class Point:
+        x = 1
+
+    calls = []
+    resolve = accessors._resolve
+    monkeypatch.setattr(accessors, "_resolve", lambda cls: calls.append(cls) or resolve(cls))
+    register_accessor(Point, AttributeAccessor())
+    try:
+        for _ in range(3):
+            assert _evaluate("p.x", {"p": Point()}) == 1
+    finally:
+        unregister_accessor(Point)
+    assert calls == [Point]
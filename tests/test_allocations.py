@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from benchmarks.allocations import SCALAR_CASES, allocated_bytes, allocation_report, evaluation_allocations
+
+
+@pytest.mark.parametrize("name,expression,context", SCALAR_CASES)
+def test_scalar_evaluation_allocation_free(name, expression, context):
+    assert evaluation_allocations(expression, context) == 0
+    assert evaluation_allocations(expression, context, optimize=True) == 0
+
+
+@pytest.mark.parametrize(
+    "expression,context",
+    [
+        ("before(x, [1..5])", {"x": 0}),
+        ("after((1..5], x)", {"x": 0}),
+        ("includes([1..10], x)", {"x": 3}),
+        ("includes([1..10], (2..5))", {}),
+    ],
+)
+def test_range_functions_allocation_free(expression, context):
+    assert evaluation_allocations(expression, context) == 0
+
+
+def test_typed_evaluation_allocation_free():
+    assert evaluation_allocations("a + 1 > b", {"a": 1, "b": 1}, schema={"a": int, "b": int}) == 0
+
+
+def test_allocated_bytes():
+    assert allocated_bytes(lambda: None) == 0
+    assert allocated_bytes(lambda: [object() for _ in range(10)]) > 0
+
+
+def test_allocation_report():
+    report = list(allocation_report(corpus={"lists": [("some", "some x in [1, 2] satisfies x > 1", {})]}))
+    assert report[-1][:2] == ("lists", "some")
+    assert report[-1][2] > 0
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from benchmarks.runner import build_phase_cases, collect_cases, compare, run
+from benchmarks.threads import thread_scaling
+
+
+def test_all_cases_evaluate():
+    for case in collect_cases(phases=("evaluate",)):
+        case.func()
+
+
+def test_compare():
+    baseline = {"a/b/parse": 10.0, "a/b/evaluate": 1.0}
+    results = {"a/b/parse": 11.0, "a/b/evaluate": 1.5, "a/c/evaluate": 3.0}
+    assert compare(results, baseline, threshold=0.2) == [("a/b/evaluate", 1.0, 1.5, 1.5)]
+
+
+def test_run():
+    cases = build_phase_cases("arithmetic", "add", "a + b", {"a": 1, "b": 2})
+    results = run(cases, repeat=1, min_time=0.001, include_import=False, output=None)
+    assert set(results) == {"arithmetic/add/parse", "arithmetic/add/transform", "arithmetic/add/evaluate"}
+
+
+def test_thread_scaling():
+    results = list(thread_scaling((1, 2), calls_per_thread=20))
+    assert [threads for threads, _, _ in results] == [1, 2]
+    assert results[0][2] == 1.0
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from benchmarks.fuzz import _same, outcome
+from bkflow_feel import parser, transformer
+from bkflow_feel.api import compile_expression
+from bkflow_feel.canonical import canonical_form, fingerprint, group_equivalent
+from bkflow_feel.engine import Engine
+from bkflow_feel.exceptions import ValidationError
+from bkflow_feel.generator import ExpressionGenerator
+from bkflow_feel.parsers import Expr
+from bkflow_feel.visitors import walk
+
+
+@pytest.mark.parametrize(
+    "left,right",
+    [
+        ("a = 1 and b > 2", "(b>2)   and (a = 1)"),
+        ('{"x": 1}.x', "{x: 1}.x"),
+        ("a > 1 and (b > 1 and c > 1)", "(c > 1 and a > 1) and b > 1"),
+        ("a > 1 or b > 1", "b > 1 or (a > 1)"),
+        ('date("2020-01-01") < d', '(date("2020-01-01")) < d'),
+    ],
+)
+def test_equivalent(left, right):
+    assert fingerprint(left) == fingerprint(right)
+
+
+@pytest.mark.parametrize(
+    "left,right",
+    [
+        ("a > 1", "1 > a"),
+        ("a - b", "b - a"),
+        ("a = 1", "a = 1.0"),
+        ("a = 1", 'a = "1"'),
+        ("a = 1", "a = true"),
+        # 类型校验不对称，相等判断两侧不交换
+        ("a = true", "true = a"),
+        ("a != b", "b != a"),
+        # 非布尔操作数不调整顺序
+        ("b and a = 1", "a = 1 and b"),
+        ("f(a) > 1 and b > 1", "b > 1 and f(a) > 1"),
+        ('"a" + b', 'b + "a"'),
+    ],
+)
+def test_not_equivalent(left, right):
+    assert fingerprint(left) != fingerprint(right)
+
+
+def test_canonical_form_is_readable():
+    ast = transformer.transform(parser.parse("b > 2 and 1 = a"))
+    assert canonical_form(ast) == (
+        "And(SameTypeBinaryOperator(left=Number(value=int:1),operation='equal',right=Variable(name='a')),"
+        "SameTypeBinaryOperator(left=Variable(name='b'),operation='greater_than',right=Number(value=int:2)))"
+    )
+
+
+def test_group_equivalent():
+    groups = group_equivalent(["a = 1", "b", "1 = a", "(a = 1)"])
+    assert list(groups.values()) == [["a = 1", "(a = 1)"], ["b"], ["1 = a"]]
+
+
+def test_no_expr_wrappers():
+    compiled = compile_expression('date("2020-01-01") < d and time("10:00:00@Asia/Shanghai") != t', use_cache=False)
+    assert not any(isinstance(node, Expr) for node in walk(compiled.ast))
+
+
+def test_engine_shares_equivalent_expressions():
+    engine = Engine()
+    first = engine.compile("a = 1 and b > 2", canonical=True)
+    second = engine.compile("b > 2 and a = 1", canonical=True)
+    assert second is first and first.fingerprint == fingerprint("a = 1 and b > 2")
+    assert engine.compile("b > 2 and a = 1", canonical=True) is first
+    assert engine.compile("b > 2 and a = 1") is not first
+    assert engine.compile("a = 1 and b > 2", canonical=True, schema={"a": int}) is not first
+    assert first.evaluate({"a": 1, "b": 3}) is True
+    # 结果缓存随编译结果共享
+    first.enable_result_cache()
+    assert second.result_cache is first.result_cache
+
+
+def test_preload_canonical_in_workers():
+    engine = Engine()
+    report = engine.preload(["a = 1", "(a = 1)", "a = 2"], workers=2, chunk_size=1, freeze=False, canonical=True)
+    assert report.compiled == 3
+    assert engine.compile("(a = 1)", canonical=True) is engine.compile("a = 1", canonical=True)
+    assert engine.compile("a = 2", canonical=True) is not engine.compile("a = 1", canonical=True)
+
+
+@pytest.mark.parametrize("order", [("a = true", "true = a"), ("true = a", "a = true")])
+def test_equality_outcome_independent_of_compile_order(order):
+    engine = Engine()
+    compiled = {expression: engine.compile(expression, canonical=True) for expression in order}
+    with pytest.raises(ValidationError):
+        compiled["a = true"].evaluate({"a": 1})
+    assert compiled["true = a"].evaluate({"a": 1}) is compile_expression("true = a").evaluate({"a": 1})
+
+
+def test_same_outcome_as_plain_compile():
+    generator = ExpressionGenerator(seed=11, variables=("a", "b", "c"))
+    engine = Engine()
+    for expression in generator.expressions(300):
+        context = {name: generator.scalar() for name in ("a", "b", "c")}
+        expected = outcome(lambda: compile_expression(expression, use_cache=False).evaluate(context))
+        actual = outcome(lambda: engine.compile(expression, canonical=True).evaluate(context))
+        assert expected[0] == actual[0] and _same(expected[1], actual[1]), expression
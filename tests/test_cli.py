@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+
+from bkflow_feel.cli import Stats, main, percentile, run
+
+LINES = ['{"a": 2}\n', '{"a": "x"}\n', "not json\n", "\n", "[1]\n", '{"a": 0}\n']
+
+
+def _rows(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_run():
+    output = io.StringIO()
+    stats = run(["a > 1", "a"], LINES, output, stats=Stats())
+    rows = _rows(output.getvalue())
+    assert [row["results"] for row in rows] == [
+        [True, 2],
+        [None, "x"],
+        [None, None],
+        [None, None],
+        [None, None],
+        [False, 0],
+    ]
+    assert rows[1]["errors"][0].startswith("ValidationError")
+    assert rows[2]["errors"][1].startswith("JSONDecodeError") and rows[2]["errors"][1].endswith("(input line 3)")
+    assert rows[3]["errors"] == ["ValueError: empty line (input line 4)"] * 2
+    assert rows[4]["errors"][0].startswith("ValueError") and rows[4]["errors"][0].endswith("(input line 5)")
+    assert stats.lines == 6 and stats.errors == 4
+    assert "p99" in stats.summary()
+
+
+def test_workers_keep_order():
+    lines = [json.dumps({"a": index}) for index in range(200)]
+    output = io.StringIO()
+    run(["a * 2"], lines, output, workers=2, chunk_size=7)
+    assert [row["results"][0] for row in _rows(output.getvalue())] == [index * 2 for index in range(200)]
+
+
+def test_line_numbers_across_chunks():
+    lines = [json.dumps({"a": index}) if index % 50 else "\n" for index in range(1, 201)]
+    output = io.StringIO()
+    run(["a"], lines, output, workers=2, chunk_size=7)
+    rows = _rows(output.getvalue())
+    assert len(rows) == 200
+    assert [index + 1 for index, row in enumerate(rows) if row["errors"][0]] == [50, 100, 150, 200]
+    assert rows[99]["errors"][0].endswith("(input line 100)")
+
+
+def test_main(tmp_path, capsys):
+    source = tmp_path / "contexts.jsonl"
+    target = tmp_path / "results.jsonl"
+    source.write_text("".join(LINES), encoding="utf-8")
+    assert main(["-e", 'date("2020-01-01")', str(source), "-o", str(target), "--stats"]) == 0
+    assert _rows(target.read_text(encoding="utf-8"))[0] == {"results": ["2020-01-01"], "errors": [None]}
+    assert "lines: 6" in capsys.readouterr().err
+
+
+def test_main_invalid_expression(capsys):
+    assert main(["-e", "a >"]) == 2
+    assert "invalid expression" in capsys.readouterr().err
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
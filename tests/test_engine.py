@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from bkflow_feel import parser
+from bkflow_feel.api import compile_expression, default_engine, expression_cache
+from bkflow_feel.engine import Engine, estimate_size
+from bkflow_feel.optimizer import ReorderedAnd
+from bkflow_feel.parsers import And
+from bkflow_feel.patterns import pattern_cache
+from bkflow_feel.specializer import specialize
+from bkflow_feel.utils import FEELFunctionsManager, FunctionRegistry
+
+
+def test_functions_isolated_between_engines():
+    tenant_a, tenant_b = Engine(), Engine()
+    tenant_a.register_funcs({"discount": lambda amount: amount * 0.9})
+    tenant_b.register_funcs({"discount": lambda amount: amount - 1})
+    assert tenant_a.parse_expression("discount(amount)", {"amount": 100}) == 90
+    assert tenant_b.parse_expression("discount(amount)", {"amount": 100}) == 99
+    # 全局 API 看不到引擎中注册的函数
+    assert "discount" not in FEELFunctionsManager.all_funcs()
+    assert compile_expression("discount(amount)").evaluate({"amount": 100}) is None
+
+
+def test_global_functions_visible_and_shadowed():
+    engine = Engine()
+    assert engine.parse_expression('contains("abc", "b")') is True
+    FEELFunctionsManager.register_funcs({"engine test greeting": lambda: "global"})
+    assert engine.parse_expression("engine test greeting()") == "global"
+    engine.register_funcs({"engine test greeting": lambda: "tenant"})
+    assert engine.parse_expression("engine test greeting()") == "tenant"
+    assert default_engine.parse_expression("engine test greeting()") == "global"
+
+
+def test_registry_without_parent():
+    engine = Engine(functions=FunctionRegistry(parent=None))
+    engine.register_funcs({"double": lambda x: x * 2})
+    assert engine.parse_expression("double(2)") == 4
+    assert engine.parse_expression("unknown(2)") is None
+    with pytest.raises(ValueError):
+        engine.register_funcs({"double": lambda x: x})
+
+
+def test_engine_pure_functions_reordered():
+    engine = Engine()
+    engine.register_funcs({"score": lambda: 1}, pure=True)
+    compiled = engine.compile("score() > 0 and flag = true", optimize=True)
+    # 纯函数调用开销更高，排到变量比较之后计算
+    assert isinstance(compiled.ast, ReorderedAnd)
+    assert compiled.ast.order == (1, 0)
+    assert compiled.ast.operands[0].left.functions is engine.functions
+    assert type(Engine().compile("score() > 0 and flag = true").ast) is And
+
+
+def test_expression_entry_quota():
+    engine = Engine(max_expressions=2)
+    for index in range(5):
+        engine.compile(f"a > {index}")
+    stats = engine.stats()["expression"]
+    assert stats.size == 2
+    assert stats.evictions == 3
+
+
+def test_expression_byte_quota():
+    small = estimate_size(compile_expression("a > 1"))
+    engine = Engine(max_expression_bytes=small * 3)
+    for index in range(10):
+        engine.compile(f"a > {index}")
+    assert 0 < len(engine.expression_cache) < 10
+    assert engine.expression_cache.weight <= small * 3
+    # 单个超过配额的表达式不缓存，但仍可编译
+    huge = " and ".join(f"a{index} > {index}" for index in range(50))
+    assert engine.compile(huge).evaluate({f"a{index}": index + 1 for index in range(50)}) is True
+    assert huge not in engine.expression_cache
+
+
+def test_noisy_engine_does_not_evict_default_cache():
+    compile_expression("shared > 1")
+    noisy = Engine(max_expressions=8)
+    for index in range(100):
+        noisy.compile(f"noisy > {index}")
+    assert "shared > 1" in expression_cache
+    assert noisy.stats()["expression"].size == 8
+
+
+def test_engine_pattern_cache():
+    engine = Engine(max_patterns=2)
+    assert engine.parse_expression("matches(s, p)", {"s": "abc", "p": "^a"}) is True
+    assert engine.parse_expression('matches(s, "a+")', {"s": "abc"}) is True
+    assert engine.stats()["pattern"].size == 2
+    for pattern in ("x", "y", "z"):
+        engine.parse_expression("matches(s, p)", {"s": "abc", "p": pattern})
+    assert engine.stats()["pattern"].size == 2
+
+
+def test_engine_literal_patterns_isolated():
+    pattern_cache.clear()
+    engine = Engine()
+    compiled = engine.compile('matches(s, "^isolated-[0-9]+")')
+    assert compiled.evaluate({"s": "isolated-1"}) is True
+    assert engine.stats()["pattern"].size == 1
+    assert pattern_cache.stats().size == 0
+    residual = specialize(engine.compile('matches(s, p) and a > 1', optimize=False), {"p": "^other"})
+    assert residual.evaluate({"s": "other", "a": 2}) is True
+    assert engine.stats()["pattern"].size == 2
+    assert pattern_cache.stats().size == 0
+
+
+def test_engine_cheap_to_create():
+    start = time.perf_counter()
+    engines = [Engine() for _ in range(100)]
+    assert time.perf_counter() - start < 1
+    assert all(engine.parser is parser for engine in engines)
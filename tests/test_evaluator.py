@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from benchmarks.chains import nest
+from bkflow_feel import parser, transformer
+from bkflow_feel.api import compile_expression, parse_expression
+from bkflow_feel.exceptions import ValidationError
+from bkflow_feel.evaluator import ITERATIVE_DEPTH_THRESHOLD, evaluate_iteratively, tree_depth
+from bkflow_feel.generator import and_chain, or_chain
+from bkflow_feel.parsers import And, Or
+
+
+def _ast(expression):
+    return transformer.transform(parser.parse(expression))
+
+
+@pytest.mark.parametrize(
+    "expression,node_cls,size",
+    [
+        ("a or b or c or d", Or, 4),
+        ("a and b and c", And, 3),
+        ("a or (b or c) or d", Or, 4),
+        ("(a and b) and (c and d)", And, 4),
+    ],
+)
+def test_flatten(expression, node_cls, size):
+    ast = _ast(expression)
+    assert type(ast) is node_cls
+    assert len(ast.operands) == size
+
+
+def test_flatten_keeps_precedence():
+    ast = _ast("a or b and c or d")
+    assert type(ast) is Or
+    assert [type(operand).__name__ for operand in ast.operands] == ["Variable", "And", "Variable"]
+
+
+@pytest.mark.parametrize(
+    "expression,context,expected",
+    [
+        ("a or b or c", {"a": False, "b": 0, "c": "x"}, "x"),
+        ("a or b or c", {"a": False, "b": 2, "c": "x"}, 2),
+        ("a or b or c", {"a": False, "b": 0, "c": None}, None),
+        ("a and b and c", {"a": True, "b": 0, "c": "x"}, 0),
+        ("a and b and c", {"a": True, "b": 1, "c": "x"}, "x"),
+    ],
+)
+def test_short_circuit_values(expression, context, expected):
+    ast = _ast(expression)
+    assert ast.evaluate(context) == expected
+    assert evaluate_iteratively(ast, context) == expected
+    assert nest(ast).evaluate(context) == expected
+
+
+def test_short_circuit_skips_operands():
+    # 第二个操作数计算会因类型不同报错，短路时不会被计算
+    assert parse_expression('a = 1 or a > "x"', {"a": 1}) is True
+    assert parse_expression('a = 2 and a > "x"', {"a": 1}) is False
+    ast = _ast('a = 1 or a > "x"')
+    assert evaluate_iteratively(ast, {"a": 1}) is True
+
+
+def test_large_chains():
+    assert parse_expression(or_chain(5000), {"a": 4999}) is True
+    assert parse_expression(or_chain(5000), {"a": 5000}) is False
+    assert parse_expression(and_chain(5000), {"a": 1}) is True
+
+
+def test_deep_expression_uses_iterative_evaluator():
+    size = 3000
+    compiled = compile_expression("(" * size + "a" + " + 1)" * size)
+    assert compiled.depth > ITERATIVE_DEPTH_THRESHOLD
+    assert compiled.evaluate({"a": 0}) == size
+    with pytest.raises(RecursionError):
+        compiled.ast.evaluate({"a": 0})
+
+
+@pytest.mark.parametrize(
+    "expression,context",
+    [
+        ("a between 1 and 10", {"a": 5}),
+        ("a between 1 and 10", {"a": 0}),
+        ("not(a > 1)", {"a": 2}),
+        ("[a, a + 1, (a * 2)]", {"a": 2}),
+        ("a != b", {"a": 1, "b": 2}),
+        ('date("2023-01-01") < date("2023-02-01")', {}),
+        ("items[item > 1]", {"items": [1, 2, 3]}),
+    ],
+)
+def test_iterative_matches_recursive(expression, context):
+    ast = _ast(expression)
+    assert evaluate_iteratively(ast, context) == ast.evaluate(context)
+
+
+def test_iterative_error():
+    with pytest.raises(ValidationError):
+        evaluate_iteratively(_ast('(a + 1) - "x"'), {"a": 1})
+
+
+def test_tree_depth():
+    assert tree_depth(_ast("a")) == 1
+    assert tree_depth(_ast("a + b")) == 2
+    assert tree_depth(_ast("a or b or c")) == 2
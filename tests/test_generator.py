@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from benchmarks.fuzz import check, fuzz
+from bkflow_feel import parser
+from bkflow_feel.api import parse_expression
+from bkflow_feel.generator import ExpressionGenerator, and_chain, in_list, nested_context, or_chain
+
+
+def test_same_seed_same_expressions():
+    assert ExpressionGenerator(seed=7).expressions(20) == ExpressionGenerator(seed=7).expressions(20)
+    assert ExpressionGenerator(seed=7).context() == ExpressionGenerator(seed=7).context()
+
+
+def test_expressions_parse():
+    generator = ExpressionGenerator(seed=1)
+    for expression in generator.expressions(100):
+        parser.parse(expression)
+
+
+def test_max_tokens():
+    generator = ExpressionGenerator(seed=2, max_tokens=10, max_depth=30)
+    lengths = [len(generator.tokens()) for _ in range(50)]
+    assert max(lengths) < 200
+
+
+def test_functions():
+    generator = ExpressionGenerator(seed=3, functions=("hello",), exclude=())
+    expressions = generator.expressions(300)
+    assert any("hello (" in expression for expression in expressions)
+
+
+def test_context_defines_variables():
+    generator = ExpressionGenerator(seed=4, variables=("a", "b"))
+    assert set(generator.context()) == {"a", "b"}
+
+
+@pytest.mark.parametrize(
+    "expression,context,expected",
+    [
+        (or_chain(50), {"a": 49}, True),
+        (or_chain(50), {"a": 50}, False),
+        (and_chain(50), {"a": 1}, True),
+        (nested_context(20, leaf="2"), {}, 2),
+        (in_list(100), {"a": 99}, True),
+    ],
+)
+def test_shape_helpers(expression, context, expected):
+    assert parse_expression(expression, context) == expected
+
+
+def test_check_modes_agree():
+    assert check("a + 1", {"a": 1}) is None
+    assert check("a + 1", {"a": "x"}) is None
+
+
+def test_check_mismatch():
+    modes = {"one": lambda expression, context: 1, "two": lambda expression, context: 2}
+    assert check("a", {}, modes) == {"one": ("ok", 1), "two": ("ok", 2)}
+
+
+def test_fuzz():
+    assert list(fuzz(count=100, seed=5)) == []
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from bkflow_feel.api import compile_expression, parse_expression
+from bkflow_feel.exceptions import BudgetExceededError
+from bkflow_feel.governor import EvaluationBudget
+from bkflow_feel.instrumentation import EvaluationHook
+from bkflow_feel.utils import BaseFEELInvocation
+
+
+class SlowFunc(BaseFEELInvocation):
+    class Meta:
+        func_name = "slow func"
+
+    def invoke(self, seconds, *args, **kwargs):
+        time.sleep(seconds)
+        return True
+
+
+@pytest.mark.parametrize(
+    "expression, context, budget, limit",
+    [
+        ("2 ** 99999999", {}, EvaluationBudget(max_number_bits=4096), "number_bits"),
+        ("a ** b", {"a": 3, "b": 10000}, EvaluationBudget(max_number_bits=4096), "number_bits"),
+        ("a * b", {"a": 2**3000, "b": 2**3000}, EvaluationBudget(max_number_bits=4096), "number_bits"),
+        ("a + b", {"a": "x" * 10, "b": "y" * 10}, EvaluationBudget(max_string_length=15), "string_length"),
+        ("[1, 2, 3, 4]", {}, EvaluationBudget(max_list_length=3), "list_length"),
+        ("[[[[1]]]]", {}, EvaluationBudget(max_depth=3), "depth"),
+        (
+            "every x in {0}, y in {0} satisfies x < y + 1".format(list(range(100))),
+            {},
+            EvaluationBudget(max_steps=300),
+            "steps",
+        ),
+        ("[1, 2, 3][item > 1]", {}, EvaluationBudget(max_steps=6), "steps"),
+        ("slow func(0.05) and 1 > 0", {}, EvaluationBudget(timeout=0.01), "time"),
+    ],
+)
+def test_budget_exceeded(expression, context, budget, limit):
+    with pytest.raises(BudgetExceededError) as exc_info:
+        parse_expression(expression, context, budget=budget)
+    assert exc_info.value.limit == limit
+    assert parse_expression(expression, context, raise_exception=False, budget=budget) is None
+
+
+def test_budget_not_exceeded():
+    budget = EvaluationBudget(
+        max_steps=100, max_depth=10, timeout=1, max_number_bits=64, max_string_length=10, max_list_length=10
+    )
+    compiled = compile_expression("[1, 2, 3][item > 1]")
+    assert compiled.evaluate(budget=budget) == [2, 3]
+    assert parse_expression("2 ** 10", budget=budget) == 1024
+    assert parse_expression('"a" + "b"', budget=budget) == "ab"
+
+
+def test_budget_does_not_change_plain_evaluation():
+    compiled = compile_expression("2 ** 100")
+    assert compiled.evaluate(budget=EvaluationBudget()) == 2**100
+    assert compiled.evaluate() == 2**100
+    assert type(compiled.ast).__dict__.get("__instrumented__") is None
+
+
+def test_evaluate_without_budget_benchmark(benchmark):
+    compiled = compile_expression("a > 1 and b < 10 and c = \"x\"")
+    assert benchmark(compiled.evaluate, {"a": 2, "b": 3, "c": "x"}) is True
+
+
+def test_evaluate_with_budget_benchmark(benchmark):
+    compiled = compile_expression("a > 1 and b < 10 and c = \"x\"")
+    budget = EvaluationBudget(max_steps=1000, max_depth=100, timeout=1)
+    assert benchmark(compiled.evaluate, {"a": 2, "b": 3, "c": "x"}, budget=budget) is True
+
+
+@pytest.mark.parametrize(
+    "expression, context, expected",
+    [
+        ("x in [1..5]", {"x": 3}, True),
+        ("x in (1..5)", {"x": 5}, False),
+        ("before(x, [4..5])", {"x": 3}, True),
+        ("after((1..5], x)", {"x": 0}, True),
+        ("includes([1..10], (2..5))", {}, True),
+        ("includes((1..10], 1)", {}, False),
+    ],
+)
+def test_ranges_in_instrumented_tree(expression, context, expected):
+    compiled = compile_expression(expression)
+    assert compiled.evaluate(context) is expected
+    assert compiled.evaluate(context, budget=EvaluationBudget(max_steps=1000)) is expected
+    assert compiled.evaluate(context, hook=EvaluationHook()) is expected
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from bkflow_feel import parser, transformer
+from bkflow_feel.analysis import free_variables, is_volatile
+from bkflow_feel.exceptions import ValidationError
+from bkflow_feel.incremental import IncrementalEvaluator, ResultChange
+
+
+def _ast(expression):
+    return transformer.transform(parser.parse(expression))
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ("a + b", {"a", "b"}),
+        ("order.status = 1", {"order"}),
+        ('{"x": a}.x', {"a"}),
+        ("items[amount > limit]", {"items"}),
+        ("some x in [a, b], y in [1, 2] satisfies x > y + z", {"a", "b", "z"}),
+        ("every x in [1] satisfies x > 0", set()),
+        ("a in [b .. c]", {"a", "b", "c"}),
+        ("get or else(a, b) and is defined(c)", {"a", "b", "c"}),
+        ("hello(a, b)", {"a", "b"}),
+        ("hello(b: c)", {"c"}),
+    ],
+)
+def test_free_variables(expression, expected):
+    assert free_variables(_ast(expression)) == expected
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [("a > 1", False), ("now() > a", True), ("a and today() > a", True), ("unknown func(a) > 1", True)],
+)
+def test_is_volatile(expression, expected):
+    assert is_volatile(_ast(expression)) is expected
+
+
+def test_update_only_affected():
+    evaluator = IncrementalEvaluator({"a": 1, "b": 1, "order": {"status": "open"}})
+    assert evaluator.register("gt", "a > 0") is True
+    assert evaluator.register("status", 'order.status = "open"') is True
+    assert evaluator.register("sum", "a + b") == 2
+    assert evaluator.dependents("a") == {"gt", "sum"}
+
+    evaluator.context["b"] = 2
+    assert evaluator.update(["b"]) == [ResultChange("sum", 2, 3)]
+
+    assert evaluator.update({"a": -1}) == [ResultChange("gt", True, False), ResultChange("sum", 3, 1)]
+    assert evaluator.update({"order": {"status": "open"}}) == []
+    evaluator.context["order"]["status"] = "closed"
+    assert evaluator.update(["order.status"]) == [ResultChange("status", True, False)]
+    assert evaluator.results == {"gt": False, "status": False, "sum": 1}
+
+
+def test_unchanged_keys_not_evaluated():
+    evaluator = IncrementalEvaluator({"a": 1, "b": 1})
+    evaluator.register("a", "a > 0")
+    evaluator.register("b", "b > 0")
+    evaluated = []
+    original = evaluator._evaluate
+
+    def _evaluate(subscription):
+        evaluated.append(subscription.key)
+        original(subscription)
+
+    evaluator._evaluate = _evaluate
+    evaluator.update({"b": 2})
+    assert evaluated == ["b"]
+
+
+def test_volatile_always_evaluated():
+    evaluator = IncrementalEvaluator({"a": 1})
+    evaluator.register("now", 'now() > date and time("2000-01-01T00:00:00")')
+    evaluator.register("a", "a > 0")
+    evaluated = []
+    original = evaluator._evaluate
+
+    def _evaluate(subscription):
+        evaluated.append(subscription.key)
+        original(subscription)
+
+    evaluator._evaluate = _evaluate
+    assert evaluator.update({"x": 1}) == []
+    assert evaluated == ["now"]
+
+
+def test_errors():
+    evaluator = IncrementalEvaluator({"a": 1})
+    evaluator.register("gt", "a > 0")
+    changes = evaluator.update({"a": "x"})
+    assert len(changes) == 1
+    assert changes[0].old is True and isinstance(changes[0].new_error, ValidationError)
+    with pytest.raises(ValidationError):
+        evaluator.result("gt")
+    assert evaluator.update({"a": "y"}) == []
+    assert [change.new for change in evaluator.update({"a": 2})] == [True]
+    assert evaluator.errors == {}
+
+
+def test_unregister():
+    evaluator = IncrementalEvaluator({"a": 1})
+    evaluator.register("gt", "a > 0")
+    evaluator.register("gt", "a > 5")
+    assert evaluator.result("gt") is False
+    evaluator.unregister("gt")
+    assert evaluator.dependents("a") == set()
+    assert evaluator.update({"a": 10}) == []
+
+
+def test_refresh():
+    context = {"a": 1}
+    evaluator = IncrementalEvaluator(context)
+    evaluator.register("gt", "a > 0")
+    context["a"] = -1
+    assert evaluator.refresh() == [ResultChange("gt", True, False)]
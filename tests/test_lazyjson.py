@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from bkflow_feel import lazyjson
+from bkflow_feel.api import compile_expression, parse_expression
+from bkflow_feel.lazyjson import LazyJSON, json_loads_scope, memoized_json_loads
+from bkflow_feel.slowlog import context_shape
+
+DOCUMENT = {
+    "order": {"status": "open", "items": [{"amount": 10}, {"amount": 300}], "note": 'a "quoted" [value] {x}'},
+    "amount": 150,
+    "tags": ["a", "b"],
+    "flag": True,
+    "missing": None,
+    "unicode": "中文é",
+}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [json.dumps(DOCUMENT), json.dumps(DOCUMENT).encode(), memoryview(b" \n" + json.dumps(DOCUMENT, indent=2).encode())],
+)
+def test_mapping(data):
+    context = LazyJSON(data)
+    assert len(context) == len(DOCUMENT)
+    assert list(context) == list(DOCUMENT)
+    assert dict(context) == DOCUMENT
+    assert context.decode() == DOCUMENT
+    assert "order" in context and "other" not in context
+    assert context.get("other") is None
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        'order.status = "open" and amount > 100',
+        'tags[item = "a"]',
+        "order.note",
+        "order.status.x",
+        "order.other.x",
+        "unknown.x",
+        "tags",
+        "is defined(missing)",
+        "unicode",
+        "some x in [1, 2] satisfies x < amount",
+    ],
+)
+def test_same_result_as_decoded(expression):
+    expected = parse_expression(expression, DOCUMENT)
+    assert parse_expression(expression, LazyJSON(json.dumps(DOCUMENT))) == expected
+
+
+def test_only_accessed_paths_decoded(monkeypatch):
+    decoded = []
+
+    class Decoder(json.JSONDecoder):
+        def raw_decode(self, text, index=0):
+            value, end = super().raw_decode(text, index)
+            decoded.append(text[index:end])
+            return value, end
+
+    monkeypatch.setattr(lazyjson, "_decoder", Decoder())
+    document = {"order": {"status": "open", "items": list(range(100))}, "amount": 150, "tail": list(range(100))}
+    context = LazyJSON(json.dumps(document))
+    assert compile_expression('order.status = "open"').evaluate(context) is True
+    assert decoded == ['"open"']
+    assert compile_expression("amount > 100").evaluate(context) is True
+    # 跳过 order 时解码了整个值，tail 未被访问
+    assert decoded[-1] == "150" and len(decoded) == 3
+    assert compile_expression("amount > 100").evaluate(context) is True
+    assert len(decoded) == 3
+
+
+def test_quantifier_decodes_only_touched_keys(monkeypatch):
+    decoded = []
+
+    class Decoder(json.JSONDecoder):
+        def raw_decode(self, text, index=0):
+            value, end = super().raw_decode(text, index)
+            decoded.append(text[index:end])
+            return value, end
+
+    monkeypatch.setattr(lazyjson, "_decoder", Decoder())
+    document = {"amount": 150, "order": {"status": "open", "items": list(range(100))}, "tail": list(range(100))}
+    context = LazyJSON(json.dumps(document))
+    assert compile_expression("some x in [1, 2] satisfies x < amount").evaluate(context) is True
+    assert compile_expression('every x in [1, 2] satisfies x < amount and order.status = "open"').evaluate(context)
+    assert context_shape(context) == {"order": {"status": "str"}, "amount": "int"}
+    assert decoded == ["150", '"open"']
+    # 迭代变量不会写入文档
+    assert "x" not in context
+
+
+def test_access_after_decoded():
+    context = LazyJSON(json.dumps(DOCUMENT))
+    assert context["order"] == DOCUMENT["order"]
+    assert context["amount"] == 150
+    assert parse_expression("order.status", context) == "open"
+    assert list(context) == list(DOCUMENT)
+
+
+def test_bool():
+    assert not LazyJSON(" { } ")
+    assert LazyJSON('{"a": 1}')
+
+
+def test_invalid_document():
+    with pytest.raises(ValueError):
+        LazyJSON("[1, 2]")
+    with pytest.raises(ValueError):
+        LazyJSON('{"a": "unterminated').get("a")
+    with pytest.raises(ValueError):
+        LazyJSON('{"a": [1, 2}').get("a")
+
+
+def test_json_loads_memoized(monkeypatch):
+    calls = []
+    loads = lazyjson.json.loads
+
+    def _loads(text, *args, **kwargs):
+        calls.append(text)
+        return loads(text, *args, **kwargs)
+
+    monkeypatch.setattr(lazyjson.json, "loads", _loads)
+    compiled = compile_expression("json loads(s) = json loads(s)")
+    assert compiled.uses_json_loads
+    assert compiled.evaluate({"s": '{"a": 2}'}) is True
+    assert len(calls) == 1
+    # 每次计算使用独立的缓存
+    assert compiled.evaluate({"s": '{"a": 2}'}) is True
+    assert len(calls) == 2
+
+
+def test_memoized_json_loads_scope():
+    assert memoized_json_loads('{"a": 1}') is not memoized_json_loads('{"a": 1}')
+    with json_loads_scope():
+        assert memoized_json_loads('{"a": 1}') is memoized_json_loads('{"a": 1}')
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import pytest
+import pytz
+
+from bkflow_feel.api import compile_expression, parse_expression
+from bkflow_feel.literals import get_offset_timezone, get_timezone, parse_date, parse_time
+
+
+def test_parse_date():
+    assert parse_date("2023-08-21") == datetime.date(2023, 8, 21)
+    with pytest.raises(ValueError):
+        parse_date("2023-8-21")
+    with pytest.raises(ValueError):
+        parse_date("2023-02-30")
+
+
+def test_parse_time():
+    assert parse_time("09:05:01") == (9, 5, 1)
+    with pytest.raises(ValueError):
+        parse_time("9:05:01")
+
+
+@pytest.mark.parametrize("value,minutes", [("+08:00", 480), ("-05:30", -330), ("-00:30", -30), ("+00:00", 0)])
+def test_offset_timezone(value, minutes):
+    assert get_offset_timezone(value).utcoffset(None) == datetime.timedelta(minutes=minutes)
+
+
+def test_timezone_cache():
+    assert get_timezone("Asia/Shanghai") is get_timezone("Asia/Shanghai")
+    assert get_timezone("Asia/Shanghai") is pytz.timezone("Asia/Shanghai")
+    assert get_offset_timezone("+08:00") is get_offset_timezone("+08:00")
+    with pytest.raises(pytz.UnknownTimeZoneError):
+        get_timezone("Unknown/Zone")
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ('time("10:00:00")', datetime.time(10, 0, 0)),
+        ('time("10:00:00+08:00")', datetime.time(10, 0, 0, tzinfo=pytz.FixedOffset(480))),
+        ('time("10:00:00@Asia/Shanghai")', datetime.time(10, 0, 0, tzinfo=pytz.timezone("Asia/Shanghai"))),
+        ('date and time("2023-08-21T10:00:00Z")', datetime.datetime(2023, 8, 21, 10, tzinfo=pytz.UTC)),
+    ],
+)
+def test_literals(expression, expected):
+    compiled = compile_expression(expression, use_cache=False)
+    assert compiled.evaluate() == expected
+    # 第二次计算使用缓存的解析结果
+    assert compiled.evaluate() is compiled.evaluate()
+
+
+def test_invalid_literal_raises_on_evaluate():
+    compiled = compile_expression('date("2023-02-30")', use_cache=False)
+    with pytest.raises(ValueError):
+        compiled.evaluate()
+    with pytest.raises(ValueError):
+        parse_expression('time("25:00:00")')
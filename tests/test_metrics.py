@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from bkflow_feel.api import compile_expression, parse_expression
+from bkflow_feel.metrics import InProcessCollector, StatsDSink, format_prometheus, metrics
+from bkflow_feel.utils import BaseFEELInvocation
+
+
+class MetricsDemoFunc(BaseFEELInvocation):
+    class Meta:
+        func_name = "metrics demo"
+
+    def invoke(self, value, *args, **kwargs):
+        if value < 0:
+            raise ValueError("negative value")
+        return value * 2
+
+
+@pytest.fixture
+def collector():
+    collector = metrics.add_sink(InProcessCollector())
+    yield collector
+    metrics.remove_sink(collector)
+
+
+def test_disabled_by_default():
+    assert metrics.enabled is False
+
+
+def test_collect_phases_and_errors(collector):
+    compiled = compile_expression("metrics demo(value) + 1", use_cache=False)
+    assert compiled.evaluate({"value": 2}) == 5
+    assert parse_expression("metrics demo(value)", {"value": -1}, raise_exception=False) is None
+    assert parse_expression("1 + \"a\"", raise_exception=False) is None
+
+    assert collector.get_histogram("parse_seconds").count >= 1
+    assert collector.get_histogram("transform_seconds").count >= 1
+    assert collector.get_histogram("evaluate_seconds").count == 3
+    assert collector.get_counter("evaluation_errors_total", exception="ValueError") == 1
+    assert collector.get_counter("evaluation_errors_total", exception="ValidationError") == 1
+    assert collector.get_counter("function_calls_total", function="metrics demo") == 2
+    assert collector.get_counter("function_errors_total", function="metrics demo", exception="ValueError") == 1
+    assert collector.get_histogram("function_call_seconds", function="metrics demo").count == 2
+
+
+def test_compile_errors_counted(collector):
+    for expression in ("a >", '1 + "a"'):
+        with pytest.raises(Exception):
+            compile_expression(expression, use_cache=False, type_check=True)
+    assert collector.get_counter("compile_errors_total", exception="UnexpectedToken") == 1
+    assert collector.get_counter("compile_errors_total", exception="ValidationError") == 1
+
+
+def test_cache_gauges(collector):
+    compile_expression('matches(a, "^a+$")')
+    compile_expression('matches(a, "^a+$")')
+    metrics.collect_caches()
+    assert collector.get_gauge("cache_hits", cache="expression") >= 1
+    assert 0 <= collector.get_gauge("cache_hit_ratio", cache="pattern") <= 1
+
+
+def test_format_prometheus():
+    collector = InProcessCollector(buckets=(0.001, 0.01))
+    collector.increment("evaluation_errors_total", labels={"exception": "ValueError"})
+    collector.gauge("cache_size", 3, labels={"cache": "expression"})
+    collector.observe("evaluate_seconds", 0.002)
+    collector.observe("evaluate_seconds", 0.02)
+    assert format_prometheus(collector) == (
+        "# TYPE bkflow_feel_evaluation_errors_total counter\n"
+        'bkflow_feel_evaluation_errors_total{exception="ValueError"} 1\n'
+        "# TYPE bkflow_feel_cache_size gauge\n"
+        'bkflow_feel_cache_size{cache="expression"} 3\n'
+        "# TYPE bkflow_feel_evaluate_seconds histogram\n"
+        'bkflow_feel_evaluate_seconds_bucket{le="0.001"} 0\n'
+        'bkflow_feel_evaluate_seconds_bucket{le="0.01"} 1\n'
+        'bkflow_feel_evaluate_seconds_bucket{le="+Inf"} 2\n'
+        "bkflow_feel_evaluate_seconds_sum 0.022\n"
+        "bkflow_feel_evaluate_seconds_count 2\n"
+    )
+
+
+def test_statsd_sink():
+    lines = []
+    sink = metrics.add_sink(StatsDSink(lines.append))
+    try:
+        parse_expression("metrics demo(1)")
+    finally:
+        metrics.remove_sink(sink)
+    assert "bkflow_feel.function_calls_total:1|c|#function:metrics demo" in lines
+    assert any(line.startswith("bkflow_feel.evaluate_seconds:") and line.endswith("|ms") for line in lines)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from bkflow_feel import parser, transformer
+from bkflow_feel.api import compile_expression, parse_expression
+from bkflow_feel.evaluator import evaluate_iteratively
+from bkflow_feel.exceptions import ValidationError
+from bkflow_feel.instrumentation import EvaluationHook
+from bkflow_feel.optimizer import AdaptiveAnd, ReorderedAnd, ReorderedOr, analyze, optimize
+from bkflow_feel.parsers import And, Or
+from bkflow_feel.profiler import Profiler
+from bkflow_feel.utils import BaseFEELInvocation
+from bkflow_feel.visitors import walk
+
+CALLS = []
+
+
+class PureScoreFunc(BaseFEELInvocation):
+    class Meta:
+        func_name = "optimizer pure score"
+        pure = True
+
+    def invoke(self, value, *args, **kwargs):
+        CALLS.append(("pure", value))
+        return value * 2
+
+
+class ImpureScoreFunc(BaseFEELInvocation):
+    class Meta:
+        func_name = "optimizer impure score"
+
+    def invoke(self, value, *args, **kwargs):
+        CALLS.append(("impure", value))
+        return value * 2
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    CALLS.clear()
+
+
+def _optimize(expression, adaptive=False):
+    return optimize(transformer.transform(parser.parse(expression)), adaptive=adaptive)
+
+
+def test_pure_function_moved_last():
+    ast = _optimize('optimizer pure score(a) > 10 and status = "open"')
+    assert type(ast) is ReorderedAnd
+    assert ast.order == (1, 0)
+    assert ast.evaluate({"a": 10, "status": "closed"}) is False
+    assert CALLS == []
+    assert ast.evaluate({"a": 10, "status": "open"}) is True
+    assert CALLS == [("pure", 10)]
+
+
+def test_impure_function_keeps_order():
+    ast = _optimize('optimizer impure score(a) > 10 and status = "open"')
+    assert type(ast) is And
+    assert ast.evaluate({"a": 10, "status": "closed"}) is False
+    assert CALLS == [("impure", 10)]
+
+
+def test_impure_operand_is_a_barrier():
+    ast = _optimize('matches(s, "^a") and b = 1 and optimizer impure score(a) > 1 and matches(s, "b") and c = 1')
+    assert type(ast) is ReorderedAnd
+    assert ast.order == (1, 0, 2, 4, 3)
+
+
+def test_non_boolean_operands_keep_order():
+    ast = _optimize('matches(s, "^a") or a')
+    assert type(ast) is Or
+
+
+def test_list_filter_is_expensive():
+    ast = _optimize("items[amount > 100] != null and owner = 1")
+    assert ast.order == (1, 0)
+
+
+@pytest.mark.parametrize(
+    "expression,context,expected",
+    [
+        # 重排后先计算 a > 1 会因类型不同报错，按原始顺序重新计算
+        ('matches(a, "x") or a > 1', {"a": "x"}, True),
+        ('matches(a, "x") and a > 1', {"a": "y"}, False),
+    ],
+)
+def test_fallback_to_original_order(expression, context, expected):
+    ast = _optimize(expression)
+    assert type(ast) in (ReorderedAnd, ReorderedOr)
+    assert ast.evaluate(context) is expected
+    assert evaluate_iteratively(ast, context) is expected
+
+
+def test_fallback_error():
+    compiled = compile_expression('matches(a, "x") and a > 1', optimize=True)
+    with pytest.raises(Exception):
+        compiled.evaluate({"a": "x"})
+
+
+def test_written_order_errors_kept_by_default():
+    expression = 'matches(s, "x") and a = 1'
+    with pytest.raises(ValidationError):
+        compile_expression(expression).evaluate({"s": 1, "a": 2})
+    # 重排后先计算 a = 1 并短路，不再报错
+    assert compile_expression(expression, optimize=True).evaluate({"s": 1, "a": 2}) is False
+
+
+class CountingHook(EvaluationHook):
+    def __init__(self):
+        self.counts = {}
+
+    def enter(self, node, context):
+        self.counts[id(node)] = self.counts.get(id(node), 0) + 1
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+def test_fallback_evaluates_operands_once(adaptive):
+    compiled = compile_expression(
+        'optimizer pure score(a) > 10 and status = "open" and matches(s, "x")', optimize=True, adaptive=adaptive
+    )
+    assert compiled.ast.order == (1, 2, 0)
+    hook = CountingHook()
+    with pytest.raises(ValidationError):
+        compiled.evaluate({"a": 10, "status": "open", "s": 1}, hook=hook)
+    assert all(hook.counts.get(id(operand)) == 1 for operand in compiled.instrumented_ast.operands)
+    assert CALLS == [("pure", 10)]
+    # 原始顺序中出错操作数之前的操作数短路时返回短路结果
+    assert compiled.evaluate({"a": 1, "status": "open", "s": 1}) is False
+    ast = compiled.ast
+    assert evaluate_iteratively(ast, {"a": 1, "status": "open", "s": 1}) is False
+    with pytest.raises(ValidationError):
+        evaluate_iteratively(ast, {"a": 10, "status": "open", "s": 1})
+
+
+def test_opt_in():
+    expression = 'optimizer pure score(a) > 10 and status = "open"'
+    assert type(compile_expression(expression).ast) is And
+    assert type(compile_expression(expression, optimize=True).ast) is ReorderedAnd
+    assert type(compile_expression(expression, adaptive=True).ast) is AdaptiveAnd
+    assert parse_expression(expression, {"a": 10, "status": "closed"}, optimize=False) is False
+    assert CALLS == [("pure", 10)]
+
+
+def test_adaptive():
+    ast = _optimize("a > 0 and b > 0 and c > 0", adaptive=True)
+    assert type(ast) is AdaptiveAnd
+    assert ast.order == (0, 1, 2)
+    ast.adapt_interval = 10
+    for _ in range(30):
+        assert ast.evaluate({"a": 1, "b": 1, "c": -1}) is False
+    assert ast.order[0] == 2
+    assert ast.evaluate({"a": -1, "b": 1, "c": 1}) is False
+
+
+def test_hook_on_reordered_node():
+    compiled = compile_expression('optimizer pure score(a) > 10 and status = "open"', optimize=True)
+    profiler = Profiler()
+    assert compiled.evaluate({"a": 10, "status": "closed"}, hook=profiler) is False
+    assert "FuncInvocation" not in profiler.type_stats
+    assert profiler.type_stats["ReorderedAnd"].calls == 1
+
+
+def test_analyze_cost():
+    simple = _optimize("a = 1")
+    expensive = _optimize("optimizer pure score(a) = 1")
+    info = {}
+    for ast in (simple, expensive):
+        for node in reversed(list(walk(ast))):
+            info[id(node)] = analyze(node, info)
+    assert info[id(simple)].cost < info[id(expensive)].cost
+    assert info[id(simple)].reorderable and info[id(expensive)].reorderable
+
+
+def test_meta_pure_should_be_bool():
+    with pytest.raises(AttributeError):
+
+        class InvalidPureFunc(BaseFEELInvocation):
+            class Meta:
+                func_name = "optimizer invalid pure"
+                pure = "yes"
+
+            def invoke(self, *args, **kwargs):
+                pass
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from bkflow_feel.api import compile_expression, parse_expression
+from bkflow_feel.exceptions import ValidationError
+from bkflow_feel.patterns import PatternCache
+from bkflow_feel.validators import RegexComplexityValidator
+
+
+def test_literal_pattern_compiled_with_expression():
+    compiled = compile_expression('matches("foobar", "^fo*bar")', use_cache=False)
+    assert compiled.ast.pattern is not None
+    assert compiled.ast.pattern.pattern == "^fo*bar"
+    assert compiled.evaluate() is True
+
+
+def test_dynamic_pattern_uses_cache():
+    cache = PatternCache(maxsize=2)
+    first = cache.compile("^a+")
+    assert cache.compile("^a+") is first
+    cache.compile("^b+")
+    cache.compile("^c+")
+    stats = cache.stats()
+    assert stats.size == 2
+    assert stats.hits == 1
+    assert stats.misses == 3
+    assert stats.evictions == 1
+
+
+def test_dynamic_pattern_evaluate():
+    assert parse_expression("matches(text, pattern)", {"text": "order-123", "pattern": r"order-\d+"}) is True
+    assert parse_expression("matches(text, pattern)", {"text": "order-abc", "pattern": r"order-\d+"}) is False
+
+
+def test_invalid_literal_pattern_raises_when_evaluate():
+    compiled = compile_expression('matches("foobar", "(")', use_cache=False)
+    assert compiled.ast.pattern is None
+    assert parse_expression('matches("foobar", "(")', raise_exception=False) is None
+
+
+@pytest.mark.parametrize(
+    "pattern, valid",
+    [
+        (r"^fo*bar", True),
+        (r"order-\d+", True),
+        (r"(a|b)*c", True),
+        (r"(a+)+$", False),
+        (r"(\w*)*x", False),
+        (r"a{1,5000}", False),
+        ("a" * 300, False),
+    ],
+)
+def test_regex_complexity_validator(pattern, valid):
+    validator = RegexComplexityValidator()
+    if valid:
+        validator(pattern)
+    else:
+        with pytest.raises(ValidationError):
+            validator(pattern)
+
+
+def test_pattern_cache_complexity_guard():
+    cache = PatternCache()
+    cache.compile(r"(a+)+$")
+    cache.enable_complexity_guard()
+    with pytest.raises(ValidationError):
+        cache.compile(r"(a+)+$")
+    cache.disable_complexity_guard()
+    assert cache.compile(r"(a+)+$").pattern == r"(a+)+$"
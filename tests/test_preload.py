@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import gc
+
+from bkflow_feel.api import compile_expression, default_engine, preload
+from bkflow_feel.engine import Engine
+
+EXPRESSIONS = [f'amount > {index} and tier = "t{index}"' for index in range(20)]
+
+
+def test_preload_fills_cache_and_reports_failures():
+    engine = Engine()
+    report = engine.preload(EXPRESSIONS + ["1 +", EXPRESSIONS[0]], freeze=False)
+    assert report.compiled == len(EXPRESSIONS)
+    assert list(report.failures) == ["1 +"]
+    assert report.failures["1 +"].startswith("UnexpectedToken")
+    assert report.slowest(3)[0][1] >= report.slowest(3)[-1][1]
+    assert all(engine.expression_cache.get(expression) is not None for expression in EXPRESSIONS)
+    assert engine.compile(EXPRESSIONS[3]).evaluate({"amount": 5, "tier": "t3"}) is True
+
+
+def test_preload_in_workers_matches_sequential():
+    engine = Engine()
+    report = engine.preload(EXPRESSIONS + ["x."], workers=2, chunk_size=4, freeze=False, schema={"amount": int})
+    assert report.compiled == len(EXPRESSIONS)
+    assert list(report.failures) == ["x."]
+    compiled = engine.compile(EXPRESSIONS[1], schema={"amount": int})
+    assert compiled is engine.expression_cache.get(engine._cache_key(EXPRESSIONS[1], schema={"amount": int}))
+    assert compiled.evaluate({"amount": 5, "tier": "t1"}) is True
+    # 编译期类型错误同样计入失败
+    report = engine.preload(['1 + "a"', "a + 1"], workers=2, freeze=False, type_check=True)
+    assert list(report.failures) == ['1 + "a"']
+
+
+def test_preload_default_engine_and_freeze():
+    expression = 'tier = "preload"'
+    try:
+        report = preload([expression])
+        assert report.frozen > 0
+    finally:
+        gc.unfreeze()
+    assert default_engine.expression_cache.get(expression) is compile_expression(expression)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import io
+
+from bkflow_feel.api import compile_expression, parse_expression
+from bkflow_feel.governor import EvaluationBudget
+from bkflow_feel.instrumentation import EvaluationHook
+from bkflow_feel.profiler import Profiler, describe_node, profile_expression
+
+
+class RecordHook(EvaluationHook):
+    def __init__(self):
+        self.events = []
+
+    def enter(self, node, context):
+        self.events.append(("enter", type(node).__name__))
+
+    def exit(self, node, token, result=None, error=None):
+        self.events.append(("exit", type(node).__name__, result))
+
+
+def test_custom_hook():
+    hook = RecordHook()
+    assert parse_expression("a + 1", {"a": 1}, hook=hook) == 2
+    assert hook.events == [
+        ("enter", "SameTypeBinaryOperator"),
+        ("enter", "Variable"),
+        ("exit", "Variable", 1),
+        ("enter", "Number"),
+        ("exit", "Number", 1),
+        ("exit", "SameTypeBinaryOperator", 2),
+    ]
+
+
+def test_hook_with_budget():
+    hook = RecordHook()
+    compiled = compile_expression("a + 1")
+    assert compiled.evaluate({"a": 1}, budget=EvaluationBudget(max_steps=10), hook=hook) == 2
+    assert len(hook.events) == 6
+
+
+def test_profiler():
+    profiler = Profiler()
+    compiled = compile_expression("[1, 2, 3, 4][item > 2]")
+    for _ in range(3):
+        assert compiled.evaluate(hook=profiler) == [3, 4]
+
+    assert profiler.type_stats["ListFilter"].calls == 3
+    assert profiler.type_stats["SameTypeBinaryOperator"].calls == 12
+    filter_stats = profiler.type_stats["ListFilter"]
+    assert filter_stats.total_time >= filter_stats.self_time >= 0
+    assert {stats.name for stats in profiler.node_stats.values()} >= {"ListFilter", "Variable(item)"}
+    assert "ListFilter" in profiler.report()
+
+
+def test_profile_expression():
+    output = io.StringIO()
+    profiler = profile_expression('time("10:00:00") < time("11:00:00")', repeat=5, file=output)
+    assert profiler.type_stats["Time"].calls == 10
+    assert "Time('10:00:00')" in output.getvalue()
+
+
+def test_describe_node():
+    assert describe_node(compile_expression("a").ast) == "Variable(a)"
+    assert describe_node(compile_expression("hello world()").ast) == "FuncInvocation(hello world)"
+    assert describe_node(compile_expression('"abc"').ast) == "String('abc')"
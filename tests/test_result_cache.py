@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from bkflow_feel.api import compile_expression
+from bkflow_feel.engine import read_path
+from bkflow_feel.lazyjson import LazyJSON
+from bkflow_feel.instrumentation import EvaluationHook
+from bkflow_feel.metrics import InProcessCollector, metrics
+from bkflow_feel.utils import FEELFunctionsManager
+
+
+def _cached(expression, maxsize=1024):
+    compiled = compile_expression(expression, use_cache=False)
+    assert compiled.enable_result_cache(maxsize)
+    return compiled
+
+
+def test_key_holds_only_values_read():
+    compiled = _cached('order.tier = "gold" and region = "cn"')
+    assert compiled.result_paths == (("order", ("tier",)), ("region", ()))
+    assert compiled.evaluate({"order": {"tier": "gold", "id": 1}, "region": "cn", "user": "a"}) is True
+    assert compiled.evaluate({"order": {"tier": "gold", "id": 2}, "region": "cn", "user": "b"}) is True
+    assert compiled.evaluate({"order": {"tier": "gold"}, "region": "us"}) is False
+    stats = compiled.result_cache_stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 2)
+
+
+def test_whole_value_read_wins_over_path():
+    compiled = _cached('order.tier = "gold" and order != null')
+    assert compiled.result_paths == (("order", ()),)
+
+
+def test_hit_skips_evaluation(monkeypatch):
+    compiled = _cached("a + 1")
+    assert compiled.evaluate({"a": 1}) == 2
+    monkeypatch.setattr(compiled, "_evaluate_entry", lambda *args: pytest.fail("evaluated again"))
+    assert compiled.evaluate({"a": 1, "b": 2}) == 2
+
+
+@pytest.mark.parametrize("expression", ["now() > x", "today() = x"])
+def test_volatile_expressions_not_cached(expression):
+    compiled = compile_expression(expression, use_cache=False)
+    assert compiled.enable_result_cache() is False
+    assert compiled.result_cache_stats() is None
+
+
+def test_custom_functions():
+    FEELFunctionsManager.register_funcs({"result_cache_impure": "tests.functions.func_with_params"})
+    FEELFunctionsManager.register_funcs({"result_cache_pure": "tests.functions.func_with_params"}, pure=True)
+    assert compile_expression("result_cache_impure(a, 1, 2)", use_cache=False).enable_result_cache() is False
+    assert compile_expression("result_cache_pure(a, 1, 2)", use_cache=False).enable_result_cache() is True
+
+
+def test_equal_values_of_different_types_are_distinct():
+    compiled = _cached("string(x)")
+    assert [compiled.evaluate({"x": value}) for value in (1, True, 1.0)] == ["1", "True", "1.0"]
+
+
+def test_unhashable_values_fall_back():
+    compiled = _cached("items != null")
+    assert compiled.evaluate({"items": [1, 2]}) is True
+    assert compiled.evaluate({"items": {"a": 1}}) is True
+    assert compiled.result_cache_stats().size == 0
+
+
+def test_errors_not_cached():
+    compiled = _cached("a > 1")
+    for _ in range(2):
+        with pytest.raises(Exception):
+            compiled.evaluate({"a": "x"})
+    assert compiled.result_cache_stats().size == 0
+
+
+def test_bounded_and_disabled():
+    compiled = _cached("a * 2", maxsize=2)
+    for value in range(5):
+        compiled.evaluate({"a": value})
+    stats = compiled.result_cache_stats()
+    assert (stats.size, stats.evictions) == (2, 3)
+    assert compiled.enable_result_cache(8)
+    assert compiled.result_cache_stats().maxsize == 8
+    compiled.disable_result_cache()
+    assert compiled.result_cache_stats() is None
+    assert compiled.evaluate({"a": 3}) == 6
+
+
+def test_budget_and_hook_bypass_cache():
+    compiled = _cached("a * 2")
+    compiled.evaluate({"a": 1}, hook=EvaluationHook())
+    assert compiled.result_cache_stats().size == 0
+
+
+def test_read_path_matches_evaluation():
+    context = {"a": {"b": {"c": 1}}, "s": "x"}
+    assert read_path(context, "a", ("b", "c")) == 1
+    assert read_path(context, "s", ("b",)) is None
+    assert read_path(context, "missing") is None
+    assert read_path(LazyJSON('{"a": {"b": {"c": 1}}}'), "a", ("b", "c")) == 1
+
+
+def test_metrics():
+    compiled = _cached("a - 1")
+    collector = metrics.add_sink(InProcessCollector())
+    try:
+        compiled.evaluate({"a": 1})
+        compiled.evaluate({"a": 1})
+    finally:
+        metrics.remove_sink(collector)
+    assert collector.get_counter("result_cache_hits_total") == 1
+    assert collector.get_counter("result_cache_misses_total") == 1
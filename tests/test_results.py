@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import logging
+
+import pytest
+
+from bkflow_feel.api import compile_expression, evaluate_result, parse_expression
+from bkflow_feel.engine import Engine
+from bkflow_feel.exceptions import BudgetExceededError, ValidationError
+from bkflow_feel.governor import EvaluationBudget
+from bkflow_feel.results import (
+    BUDGET_EXCEEDED,
+    EVALUATION_ERROR,
+    INVALID_EXPRESSION,
+    SYNTAX_ERROR,
+    TYPE_ERROR,
+    RateLimitedLog,
+    error_log,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_error_log():
+    error_log.reset()
+    yield
+    error_log.reset()
+
+
+def test_success():
+    result = evaluate_result("a + 1", {"a": 1})
+    assert result.ok and result.value == 2 and result.error_code is None and result.message is None
+    assert result.unwrap() == 2
+    assert result.to_dict() == {"value": 2, "error_code": None, "message": None}
+
+
+@pytest.mark.parametrize(
+    "expression,context,code",
+    [
+        ("a >", {}, SYNTAX_ERROR),
+        ('a > "x"', {"a": 1}, TYPE_ERROR),
+        ("a / b", {"a": 1, "b": 0}, EVALUATION_ERROR),
+    ],
+)
+def test_error_codes(expression, context, code):
+    result = evaluate_result(expression, context)
+    assert not result.ok and result.error_code == code and result.value is None
+    assert result.message.startswith(type(result.error).__name__)
+    with pytest.raises(type(result.error)):
+        result.unwrap()
+
+
+def test_compile_time_error_codes():
+    assert evaluate_result("1 + \"a\"", type_check=True).error_code == TYPE_ERROR
+    budget = EvaluationBudget(max_steps=1)
+    assert compile_expression("a + 1 > b").evaluate_result({"a": 1, "b": 1}, budget=budget).error_code == (
+        BUDGET_EXCEEDED
+    )
+    assert isinstance(compile_expression("a + 1 > b").evaluate_result({}, budget=budget).error, BudgetExceededError)
+
+
+def test_invalid_expression_code(monkeypatch):
+    engine = Engine()
+    monkeypatch.setattr(engine, "compile", lambda expression, **options: (_ for _ in ()).throw(ValueError("bad")))
+    assert engine.evaluate_result("a").error_code == INVALID_EXPRESSION
+
+
+def test_compile_errors_cached(monkeypatch):
+    engine = Engine()
+    first = engine.evaluate_result("a >")
+    monkeypatch.setattr(engine, "compile", lambda *args, **kwargs: pytest.fail("compiled again"))
+    second = engine.evaluate_result("a >")
+    assert second.error is first.error and second.error_code == SYNTAX_ERROR
+
+
+def test_rate_limited_log(caplog):
+    log = RateLimitedLog(logging.getLogger("bkflow_feel.tests"), interval=60)
+    with caplog.at_level(logging.ERROR, logger="bkflow_feel.tests"):
+        assert log.error("key", "failed %s", 1) is True
+        assert log.error("key", "failed %s", 2) is False
+        assert log.error("other", "failed %s", 3) is True
+    assert [record.getMessage() for record in caplog.records] == ["failed 1", "failed 3"]
+    assert log.suppressed("key") == 1
+
+    log.interval = 0
+    with caplog.at_level(logging.ERROR, logger="bkflow_feel.tests"):
+        assert log.error("key", "failed %s", 4) is True
+    assert caplog.records[-1].getMessage() == "failed 4 (1 identical errors suppressed in the last 0s)"
+
+
+def test_rate_limited_log_bounded():
+    log = RateLimitedLog(logging.getLogger("bkflow_feel.tests"), max_keys=2)
+    for key in range(5):
+        log.error(key, "failed")
+    assert list(log._entries) == [3, 4]
+
+
+def test_parse_expression_logs_repeated_errors_once(caplog):
+    with caplog.at_level(logging.ERROR, logger="bkflow_feel.engine"):
+        for _ in range(5):
+            assert parse_expression('a > "x"', {"a": 1}, raise_exception=False) is None
+        with pytest.raises(ValidationError):
+            parse_expression('a > "x"', {"a": 1})
+    assert len(caplog.records) == 1
+    assert caplog.records[0].exc_info is not None
+
+
+def test_list_filter_errors_logged_once(caplog):
+    with caplog.at_level(logging.ERROR, logger="bkflow_feel.parsers"):
+        result = parse_expression('[{x: 1}, {x: "a"}, {x: "b"}, {x: 3}][x > 1]')
+    assert result == [{"x": 3}]
+    assert len(caplog.records) == 1
+
+
+def test_evaluate_result_accepts_compile_options():
+    engine = Engine()
+    assert engine.evaluate_result("a > 1", {"a": 2}, use_cache=False).value is True
+    assert engine.evaluate_result("a > 1", {"a": 2}, parser=engine.parser, transformer=engine.transformer).ok
+    assert engine.evaluate_result("a >", use_cache=False).error_code == SYNTAX_ERROR
+    assert engine.evaluate_result("a >", parser=engine.parser).error_code == SYNTAX_ERROR
+    assert len(engine.compile_errors) == 1
+    assert engine.evaluate_result("a > 1", {"a": 2}, unknown=True).error_code == INVALID_EXPRESSION
+
+
+def test_cached_compile_errors_keep_no_traceback():
+    engine = Engine()
+    error = engine.evaluate_result("a >").error
+    assert error.__traceback__ is None
+    assert error.__context__ is None or error.__context__.__traceback__ is None
+
+
+def _traceback_depth(error):
+    depth, traceback = 0, error.__traceback__
+    while traceback is not None:
+        depth, traceback = depth + 1, traceback.tb_next
+    return depth
+
+
+@pytest.mark.parametrize("expression,options", [("a >", {}), ('1 + "a"', {"type_check": True})])
+def test_unwrap_does_not_grow_cached_traceback(expression, options):
+    engine = Engine()
+    depths = []
+    for _ in range(5):
+        result = engine.evaluate_result(expression, **options)
+        with pytest.raises(type(result.error)) as info:
+            result.unwrap()
+        assert str(info.value) == str(result.error)
+        depths.append(_traceback_depth(info.value))
+        assert result.error.__traceback__ is None
+    assert len(set(depths)) == 1
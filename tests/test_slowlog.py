@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from bkflow_feel.api import parse_expression
+from bkflow_feel.slowlog import SlowLog, context_shape, slow_log
+from bkflow_feel.utils import BaseFEELInvocation
+
+
+class SleepFunc(BaseFEELInvocation):
+    class Meta:
+        func_name = "sleep for"
+
+    def invoke(self, seconds, *args, **kwargs):
+        time.sleep(seconds)
+        return True
+
+
+@pytest.fixture
+def enabled_slow_log():
+    records = []
+    slow_log.enable(threshold=0.005, sample_rate=1.0, sink=records.append)
+    yield records
+    slow_log.disable()
+    slow_log.sink = None
+    slow_log.clear()
+
+
+def test_record_slow_evaluation(enabled_slow_log):
+    context = {"user": {"name": "secret", "tags": ["a", "b"]}, "amount": 100}
+    assert parse_expression("sleep for(0.01) and amount > 1", context) is True
+    assert parse_expression("amount > 1", context) is True
+
+    records = slow_log.query()
+    assert len(records) == 1
+    assert enabled_slow_log == records
+    record = records[0]
+    assert record.expression == "sleep for(0.01) and amount > 1"
+    assert record.duration >= 0.01
+    assert record.context_shape == {
+        "user": {"name": "str", "tags": {"type": "list", "length": 2, "items": "str"}},
+        "amount": "int",
+    }
+    assert "secret" not in str(record.to_dict())
+    assert record.breakdown[0]["name"] == "FuncInvocation(sleep for)"
+
+
+def test_record_error(enabled_slow_log):
+    assert parse_expression('sleep for(0.01) + "a"', raise_exception=False) is None
+    assert slow_log.query()[0].error.startswith("ValidationError")
+
+
+def test_sample_rate(enabled_slow_log):
+    slow_log.sample_rate = 0
+    assert parse_expression("sleep for(0.01)") is True
+    assert slow_log.query() == []
+
+
+def test_query_ring_buffer():
+    log = SlowLog(threshold=0, capacity=2)
+    for index, duration in enumerate([0.1, 0.3, 0.2]):
+        log.record(f"expr {index}", duration, {})
+    assert [record.expression for record in log.query()] == ["expr 1", "expr 2"]
+    assert [record.expression for record in log.query(min_duration=0.25)] == ["expr 1"]
+    assert [record.expression for record in log.query(expression="expr 2")] == ["expr 2"]
+
+
+def test_context_shape_limits():
+    shape = context_shape({"k%d" % i: i for i in range(3)}, max_keys=2)
+    assert shape == {"k0": "int", "k1": "int", "...": "1 more keys"}
+    assert context_shape({"a": {"b": {"c": 1}}}, max_depth=2) == {"a": {"b": "dict"}}
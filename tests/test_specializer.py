@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from benchmarks.fuzz import _same, outcome
+from bkflow_feel.api import compile_expression
+from bkflow_feel.exceptions import ValidationError
+from bkflow_feel.generator import ExpressionGenerator
+from bkflow_feel.parsers import And, Constant, NowFunc, SameTypeBinaryOperator, Variable
+from bkflow_feel.specializer import specialize
+from bkflow_feel.visitors import walk
+
+
+def test_residual_expression():
+    compiled = compile_expression('tier = "gold" and amount > threshold')
+    residual = specialize(compiled, {"tier": "gold", "threshold": 100})
+    assert type(residual.ast) is SameTypeBinaryOperator
+    assert type(residual.ast.right) is Constant
+    assert residual.evaluate({"amount": 150}) is True
+    assert residual.evaluate({"amount": 50}) is False
+    assert residual.expression == compiled.expression
+    # 原表达式不受影响
+    assert compiled.evaluate({"tier": "gold", "threshold": 200, "amount": 150}) is False
+
+
+def test_fold_to_constant():
+    residual = specialize('tier = "gold" and amount > threshold', {"tier": "silver"})
+    assert type(residual.ast) is Constant
+    assert residual.evaluate({}) is False
+    assert type(specialize("a + b * 2", {"a": 1, "b": 2}).ast) is Constant
+
+
+@pytest.mark.parametrize(
+    "expression,known,context,expected_type",
+    [
+        ("a or b > 1", {"a": False}, {"b": 2}, SameTypeBinaryOperator),
+        ("a or b > 1", {"a": True}, {}, Constant),
+        ("a > 1 and b", {"b": True}, {"a": 3}, SameTypeBinaryOperator),
+        # a 不一定是布尔值，a and true 的结果可能是 true 而不是 a
+        ("a and b", {"b": True}, {"a": 3}, And),
+        ("a and b and c > 1", {"b": 0}, {"a": 1}, And),
+        ("a and b and c > 1", {"a": 1, "b": 2}, {"c": 3}, SameTypeBinaryOperator),
+    ],
+)
+def test_boolean_identities(expression, known, context, expected_type):
+    residual = specialize(expression, known, optimize=False)
+    assert type(residual.ast) is expected_type
+    expected = compile_expression(expression, optimize=False).evaluate({**known, **context})
+    assert residual.evaluate(context) == expected
+
+
+def test_scoped_names_not_substituted():
+    residual = specialize("items[amount > limit]", {"limit": 1, "amount": 1000})
+    items = [{"amount": 5, "limit": 3}, {"amount": 1, "limit": 3}]
+    assert residual.evaluate({"items": items}) == [{"amount": 5, "limit": 3}]
+
+    residual = specialize("some x in [a, 2] satisfies x > b", {"x": 100, "b": 1})
+    assert residual.evaluate({"a": 0}) is True
+    assert not any(isinstance(node, Variable) and node.name == "b" for node in walk(residual.ast))
+
+
+def test_constant_list_filter_folded():
+    residual = specialize("items[amount > 1] = n", {"items": [{"amount": 1}, {"amount": 2}]})
+    assert residual.evaluate({"n": [{"amount": 2}]}) is True
+    assert type(residual.ast.left) is Constant
+
+
+def test_folded_containers_not_shared():
+    residual = specialize('[a, {"items": [b]}]', {"a": 1, "b": 2})
+    assert type(residual.ast) is Constant
+    result = residual.evaluate({})
+    result.append(3)
+    result[1]["items"].append(4)
+    assert residual.evaluate({}) == [1, {"items": [2]}]
+    known = {"tags": ["a", "b"]}
+    residual = specialize("tags", known)
+    residual.evaluate({}).append("c")
+    assert residual.evaluate({}) == ["a", "b"] and known["tags"] == ["a", "b"]
+
+
+def test_volatile_kept():
+    residual = specialize("now() > d", {"d": 1})
+    assert any(isinstance(node, NowFunc) for node in walk(residual.ast))
+
+
+def test_error_kept():
+    residual = specialize("a > 1", {"a": "x"})
+    with pytest.raises(ValidationError):
+        residual.evaluate({})
+
+
+def test_matches_pattern_precompiled():
+    residual = specialize("matches(s, p) or x", {"p": "^a"})
+    assert residual.ast.operands[0].pattern is not None
+    assert residual.evaluate({"s": "abc", "x": False}) is True
+
+
+def test_same_outcome_as_original():
+    generator = ExpressionGenerator(seed=11, variables=("a", "b", "c", "d"))
+    for expression in generator.expressions(300):
+        context = generator.context(depth=1)
+        known = {name: context[name] for name in ("a", "b")}
+        rest = {name: context[name] for name in ("c", "d")}
+        expected = outcome(lambda: compile_expression(expression, optimize=False).evaluate(context))
+        actual = outcome(lambda: specialize(expression, known, optimize=False).evaluate(rest))
+        assert expected[0] == actual[0] and _same(expected[1], actual[1]), expression
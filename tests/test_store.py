@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from bkflow_feel import store as store_module
+from bkflow_feel.engine import Engine
+from bkflow_feel.exceptions import ValidationError
+from bkflow_feel.store import RuleStore, build_rule_store
+from bkflow_feel.utils import FunctionRegistry
+
+RULES = {
+    "gold": 'amount > 100 and tier = "gold"',
+    "region": 'region in ["cn", "hk"]',
+    "pattern": 'matches(name, "^a+$")',
+    "中文": 'tier = "银"',
+}
+CONTEXT = {"amount": 150, "tier": "gold", "region": "cn", "name": "aaa"}
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "rules.bin")
+    assert build_rule_store(path, RULES) == len(RULES)
+    return path
+
+
+def test_lookup_and_evaluate(path):
+    with RuleStore(path) as rule_store:
+        assert len(rule_store) == len(RULES)
+        assert sorted(rule_store) == sorted(RULES)
+        assert "gold" in rule_store and "missing" not in rule_store
+        assert rule_store.expression("中文") == RULES["中文"]
+        assert [rule_store.evaluate(key, CONTEXT) for key in ("gold", "region", "pattern", "中文")] == [
+            True,
+            True,
+            True,
+            False,
+        ]
+        with pytest.raises(KeyError):
+            rule_store.get("missing")
+
+
+def test_decoded_rules_are_bounded(path):
+    with RuleStore(path, cache_size=2) as rule_store:
+        for key in RULES:
+            rule_store.get(key)
+        assert rule_store.get("中文") is rule_store.get("中文")
+        stats = rule_store.cache_stats()
+        assert stats.size == 2 and stats.evictions == 2
+
+
+def test_rebuild_replaces_file(path):
+    build_rule_store(path, [("gold", "amount > 1000")])
+    with RuleStore(path) as rule_store:
+        assert list(rule_store) == ["gold"]
+        assert rule_store.evaluate("gold", CONTEXT) is False
+
+
+def test_invalid_build(tmp_path):
+    with pytest.raises(ValueError):
+        build_rule_store(str(tmp_path / "rules.bin"), [("a", "1"), ("a", "2")])
+    with pytest.raises(Exception):
+        build_rule_store(str(tmp_path / "rules.bin"), {"a": "1 +"})
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_not_a_store(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a rule store at all")
+    with pytest.raises(ValueError):
+        RuleStore(str(path))
+
+
+def test_other_version_compiles_expressions(path, monkeypatch):
+    monkeypatch.setattr(store_module, "__version__", "0.0.0")
+    with RuleStore(path) as rule_store:
+        assert rule_store.trees_compatible is False
+        assert rule_store.evaluate("gold", CONTEXT) is True
+
+
+def test_engine_binding(tmp_path):
+    path = str(tmp_path / "rules.bin")
+    build_rule_store(path, {"double": "double(x)"})
+    functions = FunctionRegistry()
+    functions.register_funcs({"double": "tests.functions.func_with_params"})
+    engine = Engine(functions=functions)
+    with RuleStore(path, engine=engine) as rule_store:
+        compiled = rule_store.get("double")
+        assert compiled.ast.functions is functions
+
+
+def test_build_with_engine(tmp_path):
+    path = str(tmp_path / "rules.bin")
+    functions = FunctionRegistry()
+    functions.register_funcs({"store double": lambda x: x * 2})
+    engine = Engine(functions=functions)
+    build_rule_store(path, {"double": 'store double(x) > 4 and matches(s, "^a")'}, engine=engine, schema={"x": int})
+    with pytest.raises(ValidationError):
+        build_rule_store(path, {"double": 'x + "a"'}, engine=engine, schema={"x": int})
+    with RuleStore(path, engine=engine) as rule_store:
+        compiled = rule_store.get("double")
+        assert compiled.evaluate({"x": 3, "s": "abc"}) is True
+        assert compiled.ast.operands[0].left.functions is functions
+        assert compiled.ast.operands[1].pattern_cache is engine.pattern_cache
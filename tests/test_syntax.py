@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+from lark import Lark
+from lark.exceptions import UnexpectedInput
+
+from bkflow_feel import parser
+from bkflow_feel.engine import Engine
+from bkflow_feel.generator import ExpressionGenerator
+from bkflow_feel.syntax import check_syntax, check_syntax_many
+
+
+@pytest.mark.parametrize(
+    "expression,line,column,token",
+    [
+        ("a >", 1, 4, None),
+        ("a @ 1", 1, 3, "@"),
+        ("a > 1 )", 1, 7, ")"),
+        ("[1, 2", 1, 6, None),
+        ("", 1, 1, None),
+    ],
+)
+def test_error_position(expression, line, column, token):
+    issue = check_syntax(expression)
+    assert (issue.line, issue.column, issue.token) == (line, column, token)
+    assert issue.position == (issue.column - 1)
+    assert issue.expected
+
+
+def test_expected_tokens():
+    issue = check_syntax("[1, 2")
+    assert issue.expected == ["')'", "','", "']'"]
+    assert issue.to_dict()["message"] == "Unexpected end of expression"
+    assert "NAME" in check_syntax("a >").expected
+
+
+def test_valid_expressions():
+    assert check_syntax('a > 1 and b = "x"') is None
+    assert check_syntax("some x in [1, 2] satisfies x > 1") is None
+    # 只校验语法，非法的日期字面量在转换时才报错
+    assert check_syntax('date("2023-13-45")') is None
+
+
+def _lark_accepts(expression):
+    try:
+        parser.parse(expression)
+    except UnexpectedInput as e:
+        return False, (e.line, e.column)
+    return True, None
+
+
+def test_same_as_lark_parser():
+    generator = ExpressionGenerator(seed=7)
+    rand = random.Random(7)
+    for expression in generator.expressions(300):
+        # 随机删除一段字符构造语法错误
+        start = rand.randrange(len(expression))
+        mutated = expression[:start] + expression[start + rand.randint(1, 3) :]
+        for candidate in (expression, mutated):
+            accepted, position = _lark_accepts(candidate)
+            issue = check_syntax(candidate)
+            assert (issue is None) is accepted, candidate
+            if issue is not None and issue.token is not None:
+                assert (issue.line, issue.column) == position, candidate
+
+
+def test_check_syntax_many():
+    expressions = ["a > 1", "a >", "a > 1", "b ="]
+    issues = check_syntax_many(expressions)
+    assert [issue is None for issue in issues] == [True, False, True, False]
+    parallel = check_syntax_many(expressions * 100, workers=2, chunk_size=1)
+    assert [issue is None for issue in parallel] == [True, False, True, False] * 100
+    assert parallel[1].to_dict() == issues[1].to_dict()
+
+
+def test_check_syntax_many_custom_parser():
+    custom = Lark('start: "x" | "y"', parser="lalr")
+    expressions = ["x", "a > 1", "y"]
+    expected = [issue is None for issue in check_syntax_many(expressions, parser=custom)]
+    assert expected == [True, False, True]
+    parallel = check_syntax_many(expressions * 10, workers=2, chunk_size=1, parser=custom)
+    assert [issue is None for issue in parallel] == expected * 10
+
+
+def test_engine_check_syntax():
+    assert Engine().check_syntax("a > 1") is None
+    assert Engine().check_syntax("a >").column == 4
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bkflow_feel import parser, transformer
+from bkflow_feel.caches import LRUCache
+from bkflow_feel.utils import FEELFunctionsManager
+
+EXPRESSIONS = [
+    ('a > 1 and b = "x"', {"a": 2, "b": "x"}, True),
+    ("a + 2 * 3", {"a": 1}, 7),
+    ('date and time("2023-08-21T10:00:00") < date and time("2023-08-22T10:00:00")', {}, True),
+    ("items[amount > 1]", {"items": [{"amount": 1}, {"amount": 2}]}, [{"amount": 2}]),
+]
+
+
+def _run_concurrently(func, threads=8):
+    barrier = threading.Barrier(threads)
+
+    def _target(index):
+        barrier.wait()
+        return func(index)
+
+    with ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(_target, range(threads)))
+
+
+def test_shared_parser_and_transformer():
+    def _parse(index):
+        results = []
+        for _ in range(100):
+            for expression, context, _ in EXPRESSIONS:
+                results.append(transformer.transform(parser.parse(expression)).evaluate(context))
+        return results
+
+    expected = [value for _, _, value in EXPRESSIONS] * 100
+    assert all(results == expected for results in _run_concurrently(_parse))
+
+
+def test_lru_cache_concurrent_access():
+    cache = LRUCache(maxsize=16)
+
+    def _access(index):
+        for number in range(2000):
+            key = (index * 7 + number) % 64
+            value = cache.get(key)
+            assert value is None or value == key * 2
+            cache.set(key, key * 2)
+        return True
+
+    assert all(_run_concurrently(_access))
+    assert len(cache) == 16
+
+
+def test_lru_cache_reorders_under_lock():
+    cache = LRUCache(maxsize=4)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    assert list(cache._data) == ["b", "a"]
+    # 锁被占用时命中不等待，也不调整顺序
+    with cache._lock:
+        assert cache.get("b") == 2
+    assert list(cache._data) == ["b", "a"]
+    assert not cache._lock.locked()
+
+
+def test_register_while_reading():
+    names = [f"thread safe func {index}" for index in range(200)]
+
+    def _work(index):
+        if index == 0:
+            for name in names:
+                FEELFunctionsManager.register_funcs({name: "builtins.len"}, pure=True)
+            return True
+        for _ in range(2000):
+            funcs = FEELFunctionsManager.all_funcs()
+            registered = [name for name in names if name in funcs]
+            # 注册按顺序发布，读到的总是前缀
+            assert registered == names[: len(registered)]
+        return True
+
+    assert all(_run_concurrently(_work))
+    assert all(FEELFunctionsManager.is_pure(name) for name in names)
+
+
+def test_failed_batch_registers_nothing():
+    FEELFunctionsManager.register_funcs({"thread safe batch existing": "builtins.len"})
+    try:
+        FEELFunctionsManager.register_funcs(
+            {"thread safe batch new": "builtins.len", "thread safe batch existing": "builtins.len"}
+        )
+    except ValueError:
+        pass
+    assert "thread safe batch new" not in FEELFunctionsManager.all_funcs()
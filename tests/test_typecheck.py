@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import pytest
+
+from benchmarks.fuzz import _same, outcome
+from bkflow_feel.api import compile_expression
+from bkflow_feel.exceptions import ValidationError
+from bkflow_feel.generator import ExpressionGenerator
+from bkflow_feel.parsers import SameTypeBinaryOperator, StringOperator
+from bkflow_feel.typecheck import infer_types, schema_key
+from bkflow_feel.visitors import walk
+
+
+def _checked_operations(compiled):
+    return [
+        node.checked for node in walk(compiled.ast) if isinstance(node, (SameTypeBinaryOperator, StringOperator))
+    ]
+
+
+@pytest.mark.parametrize(
+    "expression,schema,expected_type",
+    [
+        ("1 + 2 * 3", None, int),
+        ("1 / 2", None, float),
+        ('"a" + string(x)', None, str),
+        ("a > 1 and b", {"a": int, "b": bool}, bool),
+        ("a and b", {"a": int, "b": bool}, None),
+        ('date("2023-08-21")', None, datetime.date),
+        ("order.amount * 2.5", {"order": {"amount": float}}, float),
+        ("count([1, 2])", None, int),
+        ("x", None, None),
+    ],
+)
+def test_infer_types(expression, schema, expected_type):
+    compiled = compile_expression(expression, use_cache=False, optimize=False)
+    assert infer_types(compiled.ast, schema)[id(compiled.ast)] is expected_type
+
+
+def test_scoped_variables_not_typed():
+    compiled = compile_expression("some x in [1, 2] satisfies x > 1", use_cache=False)
+    types = infer_types(compiled.ast, {"x": str})
+    condition = compiled.ast.expr
+    assert types[id(condition.left)] is None
+
+
+def test_proven_operations_unchecked():
+    compiled = compile_expression("a + 2 * n > 10", schema={"a": int, "n": int})
+    assert _checked_operations(compiled) == [False, False, False]
+    assert compiled.evaluate({"a": 1, "n": 5}) is True
+    assert _checked_operations(compile_expression('"a" + string(x)', type_check=True)) == [False]
+    # 未知类型的变量保留运行时校验
+    partial = compile_expression("a + 1 > b", schema={"a": int})
+    assert _checked_operations(partial) == [True, False]
+    with pytest.raises(ValidationError):
+        partial.evaluate({"a": 1, "b": "x"})
+
+
+@pytest.mark.parametrize(
+    "expression,schema",
+    [
+        ('1 + "a"', None),
+        ('a > 1 and "x" + 1 > 2', None),
+        ("contains(s, 1)", {"s": str}),
+        ("order.amount > 1", {"order": {"amount": str}}),
+    ],
+)
+def test_type_errors_at_compile_time(expression, schema):
+    with pytest.raises(ValidationError):
+        compile_expression(expression, type_check=True, schema=schema)
+
+
+@pytest.mark.parametrize("schema", [None, {"a": float, "b": float}])
+def test_negative_base_fractional_power(schema):
+    compiled = compile_expression("a ** b", use_cache=False, schema=schema)
+    with pytest.raises(ValidationError):
+        compiled.evaluate({"a": -8.0, "b": 0.5})
+    assert compiled.evaluate({"a": -8.0, "b": 2.0}) == 64.0
+    with pytest.raises(ValidationError):
+        compile_expression("(-8) ** 0.5").evaluate()
+    with pytest.raises(ValidationError):
+        compile_expression("(-8.0) ** 0.5").evaluate()
+
+
+def test_compile_cache_keyed_by_schema():
+    unchecked = compile_expression("a > 1")
+    typed = compile_expression("a > 1", schema={"a": int})
+    assert typed is not unchecked
+    assert typed is compile_expression("a > 1", schema={"a": int})
+    assert compile_expression("a > 1", schema={"a": bool}) is not typed
+    assert schema_key({"b": {"c": int}, "a": str}) == schema_key({"a": str, "b": {"c": int}})
+
+
+def test_same_outcome_as_unchecked():
+    generator = ExpressionGenerator(seed=5, variables=("a", "b", "c"))
+    for expression in generator.expressions(300):
+        context = {name: generator.scalar() for name in ("a", "b", "c")}
+        schema = {name: type(value) for name, value in context.items()}
+        try:
+            typed = compile_expression(expression, use_cache=False, schema=schema)
+        except ValidationError:
+            continue
+        expected = outcome(lambda: compile_expression(expression, use_cache=False).evaluate(context))
+        actual = outcome(lambda: typed.evaluate(context))
+        assert expected[0] == actual[0] and _same(expected[1], actual[1]), expression